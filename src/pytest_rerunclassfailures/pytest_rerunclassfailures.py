@@ -1,13 +1,29 @@
 """Rerun failed tests in a class to eliminate flaky failures"""
 
+# pylint: disable=too-many-lines
+
+import dataclasses
+import enum
+import json
 import logging
+import marshal
+import os
+import pkgutil
+import pickle  # nosec B403 - only ever loads what this plugin itself dumped in the same process
+import random
+import re
+import tempfile
+import traceback
+import zlib
+from array import array
+from collections import deque
 from copy import deepcopy
-from time import sleep
-from typing import Tuple, Literal, Optional, Union
+from time import monotonic, sleep
+from typing import Any, List, Tuple, Literal, Optional, Union
 
 import pytest
 import _pytest.nodes
-from pydantic import BaseModel, Field, ValidationError
+from pydantic import BaseModel, Field, ValidationError, field_validator, model_validator
 from _pytest.terminal import TerminalReporter
 from _pytest.config import Config
 from _pytest.config.argparsing import Parser
@@ -15,6 +31,720 @@ from _pytest.reports import TestReport
 from _pytest.runner import runtestprotocol
 from _pytest._code.code import ExceptionInfo, TerminalRepr  # pylint: disable=protected-access
 
+# values of these (exact) types can't be mutated in place, so a snapshot may keep a reference instead of a copy
+IMMUTABLE_TYPES = (type(None), type(Ellipsis), bool, int, float, complex, str, bytes, range)
+_MISSING = object()  # sentinel for an attribute deleted from the class
+IMMUTABLE_TYPE_REGISTRY: set = set()  # user types declared immutable, see register_immutable_type
+# user property recording why a class wasn't rerun again -> title of its terminal summary section
+RERUNS_STOPPED_SECTIONS = {
+    "rerun_class_budget_exhausted": "RERUN BUDGET EXHAUSTED",
+    "rerun_class_abandoned": "RERUNS ABANDONED",
+    "rerun_class_breaker_open": "RERUN CIRCUIT BREAKER OPEN",
+}
+HISTORY_CACHE_KEY = "rerunclassfailures/history"  # pytest cache key of the per-class rerun history
+HISTORY_MIN_FAILURES = 3  # sessions a class must have failed in, never recovering, before it isn't rerun anymore
+ARTIFACT_MESSAGE_HEAD = 200  # characters of the failure message kept in a compacted report
+_VOLATILE_PATTERN = re.compile(r"0x[0-9a-fA-F]+|\d+(?:\.\d+)?")  # addresses and numbers left out of signatures
+
+
+def register_immutable_type(*types: type) -> None:
+    """
+    Declare types whose instances are never mutated in place, so class snapshots keep them by reference.
+
+    Instances of subclasses are treated as immutable too. Types can also be declared with the
+    ``rerun_class_immutable_types`` ini option.
+
+    :param types: types to declare immutable
+    :type types: type
+    :return: None
+    :rtype: None
+    """
+    for value_type in types:
+        if not isinstance(value_type, type):
+            raise TypeError(f"pytest-rerunclassfailures: {value_type!r} is not a type")
+        IMMUTABLE_TYPE_REGISTRY.add(value_type)
+
+
+def _is_immutable(value: Any, extra_types: tuple = ()) -> bool:
+    """
+    Check whether a value can't be mutated in place, so keeping a reference to it is as good as copying it.
+
+    :param value: value to check
+    :type value: Any
+    :param extra_types: types declared immutable on top of the registry
+    :type extra_types: tuple
+    :return: True for immutable builtins, tuples/frozensets of immutable values, enum members, frozen dataclasses
+             with immutable fields and instances of registered types
+    :rtype: bool
+    """
+    value_type = type(value)
+    if value_type in IMMUTABLE_TYPES:
+        return True
+    if value_type in (tuple, frozenset):
+        return all(_is_immutable(element, extra_types) for element in value)
+    if isinstance(value, enum.Enum):  # members are singletons, deepcopy returns them as they are anyway
+        return True
+    if isinstance(value, (*IMMUTABLE_TYPE_REGISTRY, *extra_types)):
+        return True
+    params = getattr(value_type, "__dataclass_params__", None)
+    if params is not None and params.frozen and dataclasses.is_dataclass(value):
+        return all(_is_immutable(getattr(value, field.name), extra_types) for field in dataclasses.fields(value))
+    return False
+
+
+def _is_hashable_by_content(value: Any) -> bool:
+    """
+    Check whether the hash of a value is derived from its whole content (and not from its identity).
+
+    :param value: value to check
+    :type value: Any
+    :return: True if the value is an immutable builtin, or a tuple/frozenset of such values
+    :rtype: bool
+    """
+    if type(value) in IMMUTABLE_TYPES:
+        return True
+    if type(value) in (tuple, frozenset):
+        return all(_is_hashable_by_content(element) for element in value)
+    return False
+
+
+def _deepcopy_shared(value: Any, memo: dict) -> Any:
+    """
+    Deep-copy a value with a memo shared by every attribute of one snapshot, so shared sub-objects are copied once
+    and keep their identity relationships. Memo entries added by a copy that fails halfway are rolled back.
+
+    :param value: value to copy
+    :type value: Any
+    :param memo: memo shared by the whole snapshot (or restore)
+    :type memo: dict
+    :return: deep copy of the value
+    :rtype: Any
+    """
+    size = len(memo)
+    try:
+        return deepcopy(value, memo)
+    except Exception:
+        for key in list(memo)[size:]:  # don't let other attributes reuse a half-built copy
+            del memo[key]
+        raise
+
+
+def _fingerprint(value: Any) -> Optional[tuple]:
+    """
+    Compute a cheap fingerprint of a value: its identity plus its hash, or its size and checksum if it is buffer-backed.
+
+    :param value: value to fingerprint
+    :type value: Any
+    :return: fingerprint, or None if no cheap fingerprint faithfully reflects the value's content
+    :rtype: Optional[tuple]
+    """
+    if _is_hashable_by_content(value):
+        return id(value), hash(value)
+    try:
+        view = memoryview(value)
+    except (TypeError, ValueError, BufferError):
+        return None
+    with view:
+        if not view.c_contiguous:
+            return None
+        return id(value), view.format, view.shape, view.nbytes, zlib.crc32(view)
+
+
+def _content_digest(value: Any) -> Optional[tuple]:
+    """
+    Compute a digest of a value that changes whenever its content changes: its fingerprint if it has one, otherwise
+    its identity plus a checksum of its marshal dump for values made of builtin types only.
+
+    :param value: value to digest
+    :type value: Any
+    :return: digest, or None if the value has neither a fingerprint nor a marshal dump
+    :rtype: Optional[tuple]
+    """
+    fingerprint = _fingerprint(value)
+    if fingerprint is not None:
+        return fingerprint
+    try:
+        return id(value), zlib.crc32(marshal.dumps(value))
+    except ValueError:
+        return None
+
+
+def _match_failure(report: TestReport, patterns: list) -> Optional[str]:
+    """
+    Find the first pattern matching the failure of a report: either the name of the exception type (or of one of
+    its bases, qualified with its module or not), or a regex searched in the crash message.
+
+    :param report: failed test report
+    :type report: TestReport
+    :param patterns: regular expressions
+    :type patterns: list
+    :return: first matching pattern, None if no pattern matches
+    :rtype: Optional[str]
+    """
+    reprcrash = getattr(report.longrepr, "reprcrash", None)
+    message = reprcrash.message if reprcrash is not None else report.longreprtext
+    type_names = getattr(report, "rerun_class_exception_types", [])
+    for pattern in patterns:
+        if any(re.fullmatch(pattern, name) for name in type_names) or re.search(pattern, message):
+            return pattern
+    return None
+
+
+def _failure_signature(report: TestReport) -> tuple:
+    """
+    Compute the signature of a failure: the failing test and phase, the exception type, the first line of the crash
+    message with its addresses and numbers masked, and the crash location.
+
+    :param report: failed test report
+    :type report: TestReport
+    :return: signature of the failure
+    :rtype: tuple
+    """
+    reprcrash = getattr(report.longrepr, "reprcrash", None)
+    message = reprcrash.message if reprcrash is not None else report.longreprtext
+    location = (reprcrash.path, reprcrash.lineno) if reprcrash is not None else None
+    type_names = getattr(report, "rerun_class_exception_types", None) or [None]
+    first_line = message.split("\n", 1)[0]  # the explanation below may show the values that changed
+    return report.nodeid, report.when, type_names[0], _VOLATILE_PATTERN.sub("#", first_line), location
+
+
+def _truncate(text: str, max_size: int) -> str:
+    """
+    Truncate a text to a maximum size, noting how much was left out.
+
+    :param text: text to truncate
+    :type text: str
+    :param max_size: maximum number of characters kept
+    :type max_size: int
+    :return: truncated text
+    :rtype: str
+    """
+    if len(text) <= max_size:
+        return text
+    return f"{text[:max_size]}\n... ({len(text) - max_size} more characters truncated)"
+
+
+def _compact_report(report: TestReport) -> None:
+    """
+    Reduce a report to a compact summary: its captured sections are dropped, and a failure is reduced to its
+    exception type, the head of its message and its location.
+
+    :param report: test report
+    :type report: TestReport
+    :return: None
+    :rtype: None
+    """
+    report.sections = []
+    if not report.failed or isinstance(report.longrepr, str):
+        return
+    reprcrash = getattr(report.longrepr, "reprcrash", None)
+    message = reprcrash.message if reprcrash is not None else report.longreprtext
+    type_names = getattr(report, "rerun_class_exception_types", None)
+    head = message.split("\n", 1)[0][:ARTIFACT_MESSAGE_HEAD]
+    summary = f"{type_names[0]}: {head}" if type_names else head
+    report.longrepr = f"{summary} ({reprcrash.path}:{reprcrash.lineno})" if reprcrash is not None else summary
+
+
+def _cap_report(report: TestReport, max_size: int) -> None:
+    """
+    Cap the size of each captured section of a report, and of the representation of its failure.
+
+    :param report: test report
+    :type report: TestReport
+    :param max_size: maximum number of characters kept of each of them
+    :type max_size: int
+    :return: None
+    :rtype: None
+    """
+    report.sections = [(title, _truncate(content, max_size)) for title, content in report.sections]
+    if report.failed and report.longrepr is not None and not isinstance(report.longrepr, tuple):
+        text = report.longreprtext
+        if len(text) > max_size:
+            report.longrepr = _truncate(text, max_size)
+
+
+def _estimate_report_size(report: TestReport) -> int:
+    """
+    Estimate the memory held by a report from the size of its captured sections and failure representation.
+
+    :param report: test report
+    :type report: TestReport
+    :return: estimated size in characters
+    :rtype: int
+    """
+    size = sum(len(content) for _, content in report.sections)
+    return size + len(report.longreprtext) if report.failed else size
+
+
+class SpilledReports(list):
+    """Placeholder of the reports of a test for an attempt spilled to the report spool: an empty list."""
+
+    def __init__(self, offset: int, size: int) -> None:
+        """
+        Initialize SpilledReports class.
+
+        :param offset: offset of the reports in the spool file
+        :type offset: int
+        :param size: size of the serialized reports in bytes
+        :type size: int
+        :return: None
+        :rtype: None
+        """
+        super().__init__()
+        self.offset = offset
+        self.size = size
+
+
+class ReportSpool:
+    """Temporary file the reports of rerun attempts are spilled to, serialized, until they are reported."""
+
+    __slots__ = ("config", "file")
+
+    def __init__(self, config: Config) -> None:
+        """
+        Initialize ReportSpool class.
+
+        :param config: pytest config, its hooks serializing the reports
+        :type config: Config
+        :return: None
+        :rtype: None
+        """
+        self.config = config
+        self.file: Optional[Any] = None  # created on the first spill
+
+    def dump(self, reports: list) -> Optional[SpilledReports]:
+        """
+        Spill reports to the spool file, unless they can't be serialized (e.g. a ``user_properties`` value that isn't
+        JSON-serializable): those must stay in memory, as they would be reported differently once loaded back.
+
+        :param reports: test reports
+        :type reports: list
+        :return: placeholder of the reports, to load them back with; None if they can't be spilled
+        :rtype: Optional[SpilledReports]
+        """
+        hook = self.config.hook
+        try:
+            serialized = [hook.pytest_report_to_serializable(config=self.config, report=r) for r in reports]
+            data = json.dumps(serialized).encode()
+        except Exception:  # pylint: disable=broad-except
+            return None
+        if self.file is None:
+            self.file = tempfile.TemporaryFile(prefix="rerunclassfailures-")  # pylint: disable=consider-using-with
+        offset = self.file.seek(0, os.SEEK_END)
+        self.file.write(data)
+        return SpilledReports(offset, len(data))
+
+    def load(self, spilled: SpilledReports) -> list:
+        """
+        Load spilled reports back from the spool file.
+
+        :param spilled: placeholder of the reports
+        :type spilled: SpilledReports
+        :return: test reports
+        :rtype: list
+        """
+        self.file.seek(spilled.offset)  # type: ignore
+        data = json.loads(self.file.read(spilled.size))  # type: ignore
+        return [self.config.hook.pytest_report_from_serializable(config=self.config, data=report) for report in data]
+
+    def close(self) -> None:
+        """
+        Close the spool file, deleting it.
+
+        :return: None
+        :rtype: None
+        """
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class ClassSnapshot(dict):
+    """Saved initial state of a test class: attribute name -> saved value."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        """
+        Initialize ClassSnapshot class.
+
+        :return: None
+        :rtype: None
+        """
+        super().__init__(*args, **kwargs)
+        self.by_reference: set = set()  # immutable attributes: the saved value is the original object itself
+        self.fingerprints: dict = {}  # attribute name -> fingerprint of the value currently set on the class
+        self.encoded: dict = {}  # attribute name -> "pickle"/"marshal" if the saved value is serialized bytes
+        self.owners: dict = {}  # attribute name -> base class owning it, for attributes not owned by the class itself
+
+
+class Attempt:
+    """Outcome of an attempt of a test class: the outcome of each of its tests, and how long it took."""
+
+    __slots__ = ("number", "outcomes", "duration")
+
+    NOT_RUN, PASSED, FAILED = 0, 1, 2  # outcome codes of a test in an attempt
+
+    def __init__(self, number: int, size: int) -> None:
+        """
+        Initialize Attempt class.
+
+        :param number: index of the attempt
+        :type number: int
+        :param size: number of tests of the class
+        :type size: int
+        :return: None
+        :rtype: None
+        """
+        self.number = number
+        self.outcomes = array("b", bytes(size))  # sibling index -> outcome code of the test
+        self.duration = 0.0  # seconds spent running the attempt
+
+    def record(self, failed: Optional[int]) -> None:
+        """
+        Record the outcome of a finished attempt: the tests before the failed one passed (run in this attempt or
+        carried over from an earlier one), and the tests after it didn't run.
+
+        :param failed: index of the sibling that failed, None if the class passed
+        :type failed: Optional[int]
+        :return: None
+        :rtype: None
+        """
+        passed = len(self.outcomes) if failed is None else failed
+        self.outcomes[:passed] = array("b", [self.PASSED]) * passed
+        if failed is not None:
+            self.outcomes[failed] = self.FAILED
+
+    @property
+    def failed(self) -> Optional[int]:
+        """
+        Index of the sibling that failed in the attempt.
+
+        :return: index of the failed sibling, None if none failed
+        :rtype: Optional[int]
+        """
+        return self.outcomes.index(self.FAILED) if self.FAILED in self.outcomes else None
+
+
+class ClassRun:  # pylint: disable=too-few-public-methods,too-many-instance-attributes
+    """State of the attempts of a test class, kept between attempts (and until the end of the session if deferred)."""
+
+    __slots__ = (
+        "module",
+        "item",
+        "parent_class",
+        "siblings",
+        "positions",
+        "test_class",
+        "options",
+        "initial_state",
+        "checkpoints",
+        "attempt",
+        "attempts",
+        "failed",
+        "start",
+        "last_delay",
+        "last_duration",
+        "attempts_time",
+        "max_attempts",
+        "rerun_time",
+        "last_signature",
+        "same_failures",
+        "trimmed",
+        "spilled",
+        "kept_size",
+    )
+
+    def __init__(  # pylint: disable=too-many-positional-arguments
+        self,
+        module: str,
+        item: _pytest.nodes.Item,
+        parent_class: pytest.Class,
+        siblings: list,
+        test_class: dict,
+        options: "RerunClassOptions",
+    ) -> None:
+        """
+        Initialize ClassRun class.
+
+        :param module: module node id
+        :type module: str
+        :param item: first item of the class
+        :type item: _pytest.nodes.Item
+        :param parent_class: pytest class
+        :type parent_class: pytest.Class
+        :param siblings: sibling items of the class, terminated by None
+        :type siblings: list
+        :param test_class: test class results, node id -> reports of each attempt
+        :type test_class: dict
+        :param options: effective options of the class
+        :type options: RerunClassOptions
+        :return: None
+        :rtype: None
+        """
+        self.module = module
+        self.item = item
+        self.parent_class = parent_class
+        self.siblings = siblings
+        self.positions = {sibling.nodeid: index for index, sibling in enumerate(siblings[:-1])}  # node id -> index
+        self.test_class = test_class
+        self.options = options
+        self.initial_state: dict = {}  # class state saved before the first attempt
+        self.checkpoints: dict = {}  # sibling index -> class state saved right before that checkpoint test ran
+        self.attempt = 0  # index of the next attempt
+        self.attempts: List[Attempt] = []  # outcome of each attempt run so far, the probe excluded
+        self.failed: Optional[int] = 0  # index of the sibling that failed in the last attempt, None if it passed
+        self.start = 0  # index of the sibling the next attempt starts from
+        self.last_delay = options.delay  # delay waited before the last rerun, the base of the next jittered one
+        self.last_duration = 0.0  # duration of the last attempt in seconds, the estimate of the next one
+        self.attempts_time = 0.0  # seconds spent running the attempts of the class so far, waits excluded
+        self.max_attempts = 0  # number of attempts the class may run, the initial one included
+        self.rerun_time = 0.0  # seconds spent on the reruns of the class so far, waiting before them included
+        self.last_signature: Optional[tuple] = None  # failure signatures of the last failed attempt
+        self.same_failures = 0  # number of consecutive failed attempts with that signature
+        self.trimmed = 0  # number of attempts whose reports were trimmed to the artifacts kept
+        self.spilled = 0  # number of attempts whose reports were kept in memory or spilled, within the memory budget
+        self.kept_size = 0  # estimated size of the reports of those attempts kept in memory
+
+
+class RerunCircuitBreaker:  # pylint: disable=too-many-instance-attributes
+    """
+    Session-wide circuit breaker stopping the reruns when they keep failing, e.g. while a shared dependency is down.
+
+    Closed, it lets classes be rerun and records whether their reruns ended up passing. It opens once too many
+    rerun classes failed in a row, or once the success rate of the last rerun classes drops below a threshold. Open,
+    it refuses every rerun; after the cooldown (if any) it turns half-open and lets the next failed class be rerun as
+    a probe, closing again if that class passes and opening again otherwise.
+    """
+
+    def __init__(
+        self, max_failures: Optional[int], min_rate: Optional[float], window: int, cooldown: Optional[float]
+    ) -> None:
+        """
+        Initialize RerunCircuitBreaker class.
+
+        :param max_failures: number of rerun classes failing in a row opening the breaker, None to disable
+        :type max_failures: Optional[int]
+        :param min_rate: success rate of the reruns below which the breaker opens, None to disable
+        :type min_rate: Optional[float]
+        :param window: number of the last rerun classes the success rate is computed over
+        :type window: int
+        :param cooldown: time (seconds) after which an open breaker turns half-open, None to stay open
+        :type cooldown: Optional[float]
+        :return: None
+        :rtype: None
+        """
+        self.max_failures = max_failures
+        self.min_rate = min_rate
+        self.cooldown = cooldown
+        self.state = "closed"  # "closed", "open" or "half-open"
+        self.outcomes: deque = deque(maxlen=window)  # whether the reruns of the last rerun classes passed
+        self.failures = 0  # number of rerun classes failing in a row
+        self.opened_at = 0.0  # monotonic time the breaker last opened
+        self.reason = ""  # why the breaker last opened
+
+    def allow(self) -> bool:
+        """
+        Tell whether a class may be rerun, turning an open breaker half-open once its cooldown is over.
+
+        :return: True if the class may be rerun
+        :rtype: bool
+        """
+        if self.state == "open" and self.cooldown is not None and monotonic() - self.opened_at >= self.cooldown:
+            self.state = "half-open"
+        return self.state != "open"
+
+    def record(self, passed: bool) -> Optional[str]:
+        """
+        Record the outcome of the reruns of a class.
+
+        :param passed: whether the class passed in the end
+        :type passed: bool
+        :return: new state if the breaker changed state, None otherwise
+        :rtype: Optional[str]
+        """
+        if self.state == "half-open":
+            if passed:
+                self.state = "closed"
+                self.outcomes.clear()
+                self.failures = 0
+                return self.state
+            return self._open("the half-open probe class failed again")
+        self.outcomes.append(passed)
+        self.failures = 0 if passed else self.failures + 1
+        if self.max_failures is not None and self.failures >= self.max_failures:
+            return self._open(f"{self.failures} rerun classes failed in a row")
+        if self.min_rate is not None and len(self.outcomes) == self.outcomes.maxlen:
+            rate = sum(self.outcomes) / len(self.outcomes)
+            if rate < self.min_rate:
+                return self._open(f"rerun success rate {rate:.0%} over the last {len(self.outcomes)} rerun classes")
+        return None
+
+    def _open(self, reason: str) -> str:
+        """
+        Open the breaker.
+
+        :param reason: why the breaker opens
+        :type reason: str
+        :return: new state
+        :rtype: str
+        """
+        self.state = "open"
+        self.opened_at = monotonic()
+        self.reason = reason
+        return self.state
+
+
+class RerunRegistry:
+    """
+    Results of the test classes run by the plugin, keyed by class node id. The reports of a class are released as
+    soon as all its tests are reported, only compact counters of it are kept for the terminal summary.
+    """
+
+    __slots__ = ("classes", "pending", "attempts", "finished", "tests", "rerun_classes", "reruns")
+
+    def __init__(self) -> None:
+        """
+        Initialize RerunRegistry class.
+
+        :return: None
+        :rtype: None
+        """
+        self.classes: dict = {}  # key -> test class results (node id -> reports of each attempt) not reported yet
+        self.pending: dict = {}  # key -> node ids of the tests of the class not reported yet
+        self.attempts: dict = {}  # key -> attempts of the class, from the tests already reported
+        self.finished: set = set()  # keys of the classes fully reported
+        self.tests = 0  # tests reported so far
+        self.rerun_classes = 0  # finished classes run more than once
+        self.reruns = 0  # reruns of the finished classes
+
+    def __contains__(self, key: str) -> bool:
+        """
+        Tell whether a class was already run.
+
+        :param key: class node id
+        :type key: str
+        :return: True if the class was already run
+        :rtype: bool
+        """
+        return key in self.classes or key in self.finished
+
+    def start(self, key: str, nodeids: list) -> dict:
+        """
+        Register a class about to run.
+
+        :param key: class node id
+        :type key: str
+        :param nodeids: node ids of the tests of the class
+        :type nodeids: list
+        :return: test class results, node id -> reports of each attempt, to fill in
+        :rtype: dict
+        """
+        test_class: dict = {}
+        self.classes[key] = test_class
+        self.pending[key] = set(nodeids)
+        return test_class
+
+    def get(self, key: str) -> dict:
+        """
+        Get the results of a class not fully reported yet.
+
+        :param key: class node id
+        :type key: str
+        :return: test class results, empty once the class is fully reported
+        :rtype: dict
+        """
+        return self.classes.get(key, {})
+
+    def release(self, key: str, nodeid: str) -> None:
+        """
+        Release the reports of a reported test, and the class itself once all its tests are reported.
+
+        :param key: class node id
+        :type key: str
+        :param nodeid: node id of the reported test
+        :type nodeid: str
+        :return: None
+        :rtype: None
+        """
+        pending = self.pending.get(key)
+        if pending is None or nodeid not in pending:
+            return
+        pending.discard(nodeid)
+        reruns = self.classes[key].pop(nodeid, [])
+        self.attempts[key] = max(self.attempts.get(key, 1), len(reruns))
+        self.tests += 1
+        if pending:
+            return
+        del self.classes[key], self.pending[key]
+        attempts = self.attempts.pop(key)
+        self.finished.add(key)
+        if attempts > 1:
+            self.rerun_classes += 1
+            self.reruns += attempts - 1
+
+
+class RerunClassHookSpecs:
+    """Hooks a conftest (or plugin) can implement to customize how class attributes are saved and restored."""
+
+    @pytest.hookspec(firstresult=True)
+    def pytest_rerunclass_snapshot_attribute(self, config: Config, cls: type, name: str, value: Any) -> Optional[Any]:
+        """
+        Save a class attribute before the first run of its class, e.g. with ``ndarray.copy()`` or, for a sqlite
+        connection, ``backup()`` into a new in-memory database.
+
+        Called for every attribute that isn't immutable. The first non-None result is kept as the saved state of the
+        attribute and passed back to ``pytest_rerunclass_restore_attribute``.
+
+        :param config: pytest config
+        :type config: pytest.Config
+        :param cls: test class being saved
+        :type cls: type
+        :param name: attribute name
+        :type name: str
+        :param value: attribute value
+        :type value: Any
+        :return: saved state of the attribute, or None to let the plugin save it (with the snapshot backend)
+        :rtype: Optional[Any]
+        """
+
+    @pytest.hookspec(firstresult=True)
+    def pytest_rerunclass_restore_attribute(  # pylint: disable=too-many-positional-arguments
+        self, config: Config, cls: type, name: str, value: Any, saved: Any
+    ) -> Optional[Any]:
+        """
+        Restore a class attribute saved by ``pytest_rerunclass_snapshot_attribute`` before a rerun of its class,
+        e.g. by copying the saved array back into the one still set on the class.
+
+        :param config: pytest config
+        :type config: pytest.Config
+        :param cls: test class being restored
+        :type cls: type
+        :param name: attribute name
+        :type name: str
+        :param value: value currently set on the class, None if the attribute was deleted
+        :type value: Any
+        :param saved: saved state returned by ``pytest_rerunclass_snapshot_attribute``
+        :type saved: Any
+        :return: value to set on the class, or None to set a deep copy of the saved state
+        :rtype: Optional[Any]
+        """
+
+    @pytest.hookspec
+    def pytest_rerunclass_ready(self, config: Config, cls: type, attempt: int) -> Optional[bool]:
+        """
+        Tell whether a failed class can be rerun, e.g. by checking that the backend it talks to accepts connections
+        again. Once a probe returns a result, it is polled instead of waiting for the rerun delay, until every probe
+        returns True or the ready timeout expires.
+
+        :param config: pytest config
+        :type config: pytest.Config
+        :param cls: test class about to be rerun
+        :type cls: type
+        :param attempt: number of the coming rerun, starting at 1
+        :type attempt: int
+        :return: True if ready, False if not, None if this probe doesn't apply to the class
+        :rtype: Optional[bool]
+        """
+
 
 class RerunClassOptions(BaseModel):  # pylint: disable=too-few-public-methods
     """Validated CLI options for the rerun-class-failures plugin."""
@@ -23,6 +753,176 @@ class RerunClassOptions(BaseModel):  # pylint: disable=too-few-public-methods
     delay: float = Field(ge=0)
     only_last: bool
     hide_terminal_output: bool
+    snapshot_mode: Literal["eager", "fork"] = "eager"
+    snapshot_backend: Literal["deepcopy", "pickle", "marshal"] = "deepcopy"
+    resume: Literal["restart", "failed", "checkpoint"] = "restart"
+    defer: bool = False
+    probe: bool = False
+    stream: bool = False
+    delay_policy: Literal["fixed", "linear", "exponential", "jitter"] = "fixed"
+    delay_max: Optional[float] = Field(default=None, ge=0)
+    ready_interval: float = Field(default=0.05, gt=0)
+    ready_timeout: float = Field(default=30.0, ge=0)
+    session_budget: Optional[float] = Field(default=None, ge=0)
+    class_budget: Optional[float] = Field(default=None, ge=0)
+    same_failure_max: Optional[int] = Field(default=None, ge=2)
+    history: bool = False
+    adaptive: bool = False
+    flaky_first: bool = False
+    breaker_failures: Optional[int] = Field(default=None, ge=1)
+    breaker_rate: Optional[float] = Field(default=None, ge=0, le=1)
+    breaker_window: int = Field(default=10, ge=1)
+    breaker_cooldown: Optional[float] = Field(default=None, ge=0)
+    only_on: List[str] = []
+    except_on: List[str] = []
+    keep_artifacts: Literal["all", "first-last", "last", "none"] = "all"
+    artifact_max_size: Optional[int] = Field(default=None, ge=1)
+    memory_budget: Optional[float] = Field(default=None, ge=0)
+    distributed: bool = False  # tests are distributed by pytest-xdist
+
+    @field_validator("snapshot_mode")
+    @classmethod
+    def _check_fork_available(cls, value: str) -> str:
+        """
+        Check that the platform can fork when the fork snapshot mode is requested.
+
+        :param value: snapshot mode
+        :type value: str
+        :return: snapshot mode
+        :rtype: str
+        """
+        if value == "fork" and not hasattr(os, "fork"):
+            raise ValueError("the 'fork' snapshot mode needs os.fork(), which isn't available on this platform")
+        return value
+
+    @field_validator("only_on", "except_on", mode="before")
+    @classmethod
+    def _check_failure_patterns(cls, value: Any) -> Any:
+        """
+        Check that the failure patterns are valid regular expressions, accepting a single pattern or none at all.
+
+        :param value: pattern(s), None for none
+        :type value: Any
+        :return: list of patterns
+        :rtype: Any
+        """
+        if value is None:
+            return []
+        if isinstance(value, str):
+            value = [value]
+        for pattern in value if isinstance(value, (list, tuple)) else []:  # other types are rejected by pydantic
+            try:
+                re.compile(pattern)
+            except (re.error, TypeError) as error:
+                raise ValueError(f"invalid failure pattern {pattern!r}: {error}") from error
+        return value
+
+    @model_validator(mode="after")
+    def _check_delay_max(self) -> "RerunClassOptions":
+        """
+        Check that the delay cap isn't below the base delay.
+
+        :return: validated options
+        :rtype: RerunClassOptions
+        """
+        if self.delay_max is not None and self.delay_max < self.delay:
+            raise ValueError(f"delay_max ({self.delay_max}) can't be lower than delay ({self.delay})")
+        return self
+
+    @model_validator(mode="after")
+    def _check_resume_not_forked(self) -> "RerunClassOptions":
+        """
+        Check that a class isn't both forked and resumed: a forked attempt leaves nothing behind to resume from.
+
+        :return: validated options
+        :rtype: RerunClassOptions
+        """
+        if self.snapshot_mode == "fork" and self.resume != "restart":
+            raise ValueError(f"resume={self.resume!r} can't be used with the 'fork' snapshot mode")
+        return self
+
+    @model_validator(mode="after")
+    def _check_probe_restarts(self) -> "RerunClassOptions":
+        """
+        Check that a probed class is rerun from its start in this process: the probe already reruns the failed test
+        alone, and a forked attempt leaves no class to probe.
+
+        :return: validated options
+        :rtype: RerunClassOptions
+        """
+        if self.probe and (self.snapshot_mode == "fork" or self.resume != "restart"):
+            raise ValueError("probe can only be used with resume='restart' and the 'eager' snapshot mode")
+        return self
+
+    @model_validator(mode="after")
+    def _check_defer_not_distributed(self) -> "RerunClassOptions":
+        """
+        Check that a class isn't deferred with pytest-xdist: a worker may only report the test it is running, so the
+        results of a class rerun after the session can't be reported anymore.
+
+        :return: validated options
+        :rtype: RerunClassOptions
+        """
+        if self.defer and self.distributed:
+            raise ValueError("defer can't be used when pytest-xdist distributes the tests")
+        return self
+
+    @model_validator(mode="after")
+    def _check_stream_not_deferred(self) -> "RerunClassOptions":
+        """
+        Check that a streamed class isn't deferred: the tests it already reported as passed would be reported again
+        with the results of its deferred reruns.
+
+        :return: validated options
+        :rtype: RerunClassOptions
+        """
+        if self.stream and self.defer:
+            raise ValueError("defer can't be used with stream")
+        return self
+
+    @model_validator(mode="after")
+    def _check_stream_not_forked(self) -> "RerunClassOptions":
+        """
+        Check that a streamed class isn't forked: its first attempt runs test by test in this process, as pytest
+        reaches each of them, so there is no attempt to run in a child process.
+
+        :return: validated options
+        :rtype: RerunClassOptions
+        """
+        if self.stream and self.snapshot_mode == "fork":
+            raise ValueError("stream can't be used with the 'fork' snapshot mode")
+        return self
+
+
+# options that may be overridden per class with @pytest.mark.rerun_class(...)
+CLASS_MARKER_OPTIONS = (
+    "snapshot_mode",
+    "snapshot_backend",
+    "resume",
+    "defer",
+    "probe",
+    "delay",
+    "delay_policy",
+    "delay_max",
+    "ready_interval",
+    "ready_timeout",
+    "class_budget",
+    "same_failure_max",
+    "only_on",
+    "except_on",
+)
+
+
+def pytest_addhooks(pluginmanager: pytest.PytestPluginManager) -> None:
+    """
+    Add the plugin hooks.
+
+    :param pluginmanager: pytest plugin manager
+    :type pluginmanager: pytest.PytestPluginManager
+    :return: None
+    :rtype: None
+    """
+    pluginmanager.add_hookspecs(RerunClassHookSpecs)
 
 
 def pytest_addoption(parser: Parser) -> None:
@@ -47,19 +947,282 @@ def pytest_addoption(parser: Parser) -> None:
         help="add time (seconds) delay between reruns",
     )
     group.addoption(
-        "--rerun-show-only-last",
-        action="store_true",
-        dest="rerun_show_only_last",
-        default=False,
-        help="show only the last rerun if passed",
-    )
-    group.addoption(
+        "--rerun-delay-policy",
+        action="store",
+        dest="rerun_delay_policy",
+        choices=("fixed", "linear", "exponential", "jitter"),
+        default="fixed",
+        help=(
+            "how the delay grows with each rerun of a class: 'fixed' (default) always waits --rerun-delay, 'linear' "
+            "waits it times the rerun number, 'exponential' doubles it on each rerun and 'jitter' waits a random "
+            "time between --rerun-delay and three times the previous delay (decorrelated jitter)"
+        ),
+    )
+    group.addoption(
+        "--rerun-delay-max",
+        action="store",
+        dest="rerun_delay_max",
+        type=float,
+        default=None,
+        help="cap (seconds) of the delay between reruns, whatever the delay policy",
+    )
+    group.addoption(
+        "--rerun-ready-interval",
+        action="store",
+        dest="rerun_ready_interval",
+        type=float,
+        default=0.05,
+        help="interval (seconds) between two polls of the pytest_rerunclass_ready hook before a rerun",
+    )
+    group.addoption(
+        "--rerun-ready-timeout",
+        action="store",
+        dest="rerun_ready_timeout",
+        type=float,
+        default=30.0,
+        help="time (seconds) after which a class is rerun even if the pytest_rerunclass_ready hook isn't ready yet",
+    )
+    group.addoption(
+        "--rerun-class-budget",
+        action="store",
+        dest="rerun_class_budget",
+        type=float,
+        default=None,
+        help=(
+            "total time (seconds) the session may spend rerunning classes; a class isn't rerun again once the time "
+            "left is shorter than its last attempt"
+        ),
+    )
+    group.addoption(
+        "--rerun-class-budget-per-class",
+        action="store",
+        dest="rerun_class_budget_per_class",
+        type=float,
+        default=None,
+        help="time (seconds) each class may spend being rerun, see --rerun-class-budget",
+    )
+    group.addoption(
+        "--rerun-class-same-failure-max",
+        action="store",
+        dest="rerun_class_same_failure_max",
+        type=int,
+        default=None,
+        help=(
+            "stop rerunning a class once this many consecutive attempts failed with the same failure (same test, "
+            "exception type, message and location), as a deterministic failure"
+        ),
+    )
+    group.addoption(
+        "--rerun-class-history",
+        action="store_true",
+        dest="rerun_class_history",
+        default=False,
+        help=(
+            "record in the pytest cache, for each class, how many attempts it took to pass (or that it failed "
+            "anyway) and how long its attempts took"
+        ),
+    )
+    group.addoption(
+        "--rerun-class-adaptive",
+        action="store_true",
+        dest="rerun_class_adaptive",
+        default=False,
+        help=(
+            "adapt the number of reruns of each class to its history (implies --rerun-class-history): as many "
+            "as it ever needed to pass if that is more than --rerun-class-max, none if it never recovered"
+        ),
+    )
+    group.addoption(
+        "--rerun-class-flaky-first",
+        action="store_true",
+        dest="rerun_class_flaky_first",
+        default=False,
+        help=(
+            "run the classes that recovered on a rerun in past sessions first, the flakiest first (implies "
+            "--rerun-class-history), so their reruns overlap with the rest of the session"
+        ),
+    )
+    group.addoption(
+        "--rerun-class-breaker-failures",
+        action="store",
+        dest="rerun_class_breaker_failures",
+        type=int,
+        default=None,
+        help="stop rerunning classes for the rest of the session once this many rerun classes failed in a row",
+    )
+    group.addoption(
+        "--rerun-class-breaker-rate",
+        action="store",
+        dest="rerun_class_breaker_rate",
+        type=float,
+        default=None,
+        help=(
+            "stop rerunning classes for the rest of the session once the share (0 to 1) of rerun classes passing "
+            "drops below this rate, over the last --rerun-class-breaker-window rerun classes"
+        ),
+    )
+    group.addoption(
+        "--rerun-class-breaker-window",
+        action="store",
+        dest="rerun_class_breaker_window",
+        type=int,
+        default=10,
+        help="number of the last rerun classes --rerun-class-breaker-rate is computed over",
+    )
+    group.addoption(
+        "--rerun-class-breaker-cooldown",
+        action="store",
+        dest="rerun_class_breaker_cooldown",
+        type=float,
+        default=None,
+        help=(
+            "time (seconds) after which the reruns stopped by the circuit breaker resume with a single probe class, "
+            "going on if it passes; by default they stay stopped"
+        ),
+    )
+    group.addoption(
+        "--rerun-class-only-on",
+        action="append",
+        dest="rerun_class_only_on",
+        default=None,
+        help=(
+            "rerun a failed class only if its failure matches this pattern: the name of the exception type (or of "
+            "one of its bases) or a regex searched in the failure message; may be given several times"
+        ),
+    )
+    group.addoption(
+        "--rerun-class-except",
+        action="append",
+        dest="rerun_class_except",
+        default=None,
+        help="don't rerun a failed class if its failure matches this pattern, see --rerun-class-only-on",
+    )
+    group.addoption(
+        "--rerun-show-only-last",
+        action="store_true",
+        dest="rerun_show_only_last",
+        default=False,
+        help="show only the last rerun if passed",
+    )
+    group.addoption(
         "--hide-rerun-details",
         action="store_true",
         dest="hide_rerun_details",
         default=False,
         help="hide rerun details in terminal output if passed",
     )
+    group.addoption(
+        "--rerun-class-snapshot",
+        action="store",
+        dest="rerun_class_snapshot",
+        choices=("eager", "fork"),
+        default="eager",
+        help=(
+            "how class state is saved before the first run: 'eager' restores every class attribute on rerun, "
+            "'fork' (POSIX only) saves nothing and runs every attempt of the class in a forked child process instead"
+        ),
+    )
+    group.addoption(
+        "--rerun-class-snapshot-backend",
+        action="store",
+        dest="rerun_class_snapshot_backend",
+        choices=("deepcopy", "pickle", "marshal"),
+        default=None,
+        help=(
+            "how copied class attributes are stored: 'deepcopy' (default), 'pickle' (serialized once, loaded on "
+            "every restore) or 'marshal' (builtin types only); an attribute the backend can't handle falls back "
+            "to the next one, down to deepcopy and finally a plain reference. 'pickle' and 'marshal' serialize "
+            "each attribute on its own, so attributes sharing an object no longer share it once restored"
+        ),
+    )
+    parser.addini(
+        "rerun_class_snapshot_backend",
+        help="default of --rerun-class-snapshot-backend",
+        default="deepcopy",
+    )
+    group.addoption(
+        "--rerun-class-resume",
+        action="store",
+        dest="rerun_class_resume",
+        choices=("restart", "failed", "checkpoint"),
+        default="restart",
+        help=(
+            "where a rerun of a class starts: 'restart' (default) from its first test, 'failed' from the test that "
+            "failed, keeping the class attributes as they are, or 'checkpoint' from the last test marked with "
+            "rerun_class_checkpoint before the failed one, with the class attributes saved right before it ran"
+        ),
+    )
+    group.addoption(
+        "--rerun-class-defer",
+        action="store_true",
+        dest="rerun_class_defer",
+        default=False,
+        help=(
+            "don't rerun a failed class right away: release its fixtures, go on with the session and rerun all "
+            "failed classes at its end, after a single delay; their results are reported then"
+        ),
+    )
+    group.addoption(
+        "--rerun-class-stream",
+        action="store_true",
+        dest="rerun_class_stream",
+        default=False,
+        help=(
+            "run the first attempt of a class test by test as pytest reaches them, reporting each test right away "
+            "if it passes, instead of once the whole class is done; a failure falls back to rerunning the class"
+        ),
+    )
+    group.addoption(
+        "--rerun-class-probe",
+        action="store_true",
+        dest="rerun_class_probe",
+        default=False,
+        help=(
+            "before rerunning a failed class, rerun only its failed test, from the restored class state: if it "
+            "fails the same way, the class fails without a full rerun; otherwise the class is rerun (the probe "
+            "doesn't count as a rerun)"
+        ),
+    )
+    group.addoption(
+        "--rerun-class-keep-artifacts",
+        action="store",
+        dest="rerun_class_keep_artifacts",
+        choices=("all", "first-last", "last", "none"),
+        default="all",
+        help=(
+            "which attempts of a class keep their full reports (failure tracebacks and captured output): 'all' "
+            "(default), 'first-last', 'last' or 'none'; the others are reduced to the exception type, the head of "
+            "the message and the location of their failure"
+        ),
+    )
+    group.addoption(
+        "--rerun-class-artifact-max-size",
+        action="store",
+        dest="rerun_class_artifact_max_size",
+        type=int,
+        default=None,
+        help="maximum number of characters kept of each captured section and failure traceback of a rerun class",
+    )
+    group.addoption(
+        "--rerun-class-memory-budget",
+        action="store",
+        dest="rerun_class_memory_budget",
+        type=float,
+        default=None,
+        help=(
+            "megabytes of reports of the earlier attempts of a class kept in memory; above it, their reports are "
+            "spilled to a temporary file until they are reported"
+        ),
+    )
+    parser.addini(
+        "rerun_class_immutable_types",
+        type="linelist",
+        help=(
+            "dotted paths of types (e.g. 'mypackage.settings:Color') whose instances are never mutated in place, "
+            "so class snapshots keep them by reference instead of copying them"
+        ),
+        default=[],
+    )
     group.addoption(
         "--allow-rerunfailures",
         action="store_true",
@@ -75,179 +1238,1230 @@ def pytest_addoption(parser: Parser) -> None:
     )
 
 
-class RerunClassPlugin:  # pylint: disable=too-few-public-methods
-    """Re-run failed tests in a class"""
+class RerunClassPlugin:  # pylint: disable=too-few-public-methods,too-many-instance-attributes
+    """Re-run failed tests in a class"""
+
+    def __init__(self, config: pytest.Config) -> None:
+        """
+        Initialize RerunClassPlugin class.
+
+        :param config: pytest config
+        :type config: _pytest.config.Config
+        :return: None
+        :rtype: None
+        """
+        self.logger = logging.getLogger("pytest")
+        self.registry = RerunRegistry()  # results of the test classes run, released once reported
+        self.spool = ReportSpool(config)  # reports of attempts spilled above the memory budget
+        self.class_index: dict = {}  # pytest.Class node -> its items, in session order
+        self.item_positions: dict = {}  # item -> its index in session.items when the class index was built
+        try:
+            options = RerunClassOptions(
+                rerun_max=config.getoption("--rerun-class-max"),
+                delay=config.getoption("--rerun-delay"),
+                only_last=config.getoption("--rerun-show-only-last"),
+                hide_terminal_output=config.getoption("--hide-rerun-details"),
+                snapshot_mode=config.getoption("--rerun-class-snapshot"),
+                snapshot_backend=config.getoption("--rerun-class-snapshot-backend")
+                or config.getini("rerun_class_snapshot_backend"),
+                resume=config.getoption("--rerun-class-resume"),
+                defer=config.getoption("--rerun-class-defer"),
+                probe=config.getoption("--rerun-class-probe"),
+                stream=config.getoption("--rerun-class-stream"),
+                delay_policy=config.getoption("--rerun-delay-policy"),
+                delay_max=config.getoption("--rerun-delay-max"),
+                ready_interval=config.getoption("--rerun-ready-interval"),
+                ready_timeout=config.getoption("--rerun-ready-timeout"),
+                session_budget=config.getoption("--rerun-class-budget"),
+                class_budget=config.getoption("--rerun-class-budget-per-class"),
+                same_failure_max=config.getoption("--rerun-class-same-failure-max"),
+                history=config.getoption("--rerun-class-history")
+                or config.getoption("--rerun-class-adaptive")
+                or config.getoption("--rerun-class-flaky-first"),
+                adaptive=config.getoption("--rerun-class-adaptive"),
+                flaky_first=config.getoption("--rerun-class-flaky-first"),
+                breaker_failures=config.getoption("--rerun-class-breaker-failures"),
+                breaker_rate=config.getoption("--rerun-class-breaker-rate"),
+                breaker_window=config.getoption("--rerun-class-breaker-window"),
+                breaker_cooldown=config.getoption("--rerun-class-breaker-cooldown"),
+                only_on=config.getoption("--rerun-class-only-on"),
+                except_on=config.getoption("--rerun-class-except"),
+                keep_artifacts=config.getoption("--rerun-class-keep-artifacts"),
+                artifact_max_size=config.getoption("--rerun-class-artifact-max-size"),
+                memory_budget=config.getoption("--rerun-class-memory-budget"),
+                distributed=hasattr(config, "workerinput")
+                or (config.pluginmanager.has_plugin("xdist") and config.getoption("dist", default="no") != "no"),
+            )
+        except ValidationError as error:
+            self.logger.warning("pytest-rerunclassfailures: invalid option value(s): %s", error)
+            raise pytest.UsageError(f"pytest-rerunclassfailures: invalid option value(s):\n{error}") from error
+        self.logger.debug("pytest-rerunclassfailures options validated: %s", options)
+        # increment by 1 to include the initial run
+        self.rerun_max = options.rerun_max + 1 if options.rerun_max > 0 else 0
+        self.delay = options.delay  # delay between reruns in seconds
+        self.only_last = options.only_last  # rerun only the last failed test
+        self.hide_terminal_output = options.hide_terminal_output  # hide rerun details in terminal output
+        self.options = options  # defaults for per-class options, see _get_class_options
+        self.class_options: dict = {}  # pytest.Class node -> its effective options
+        self.attribute_plans: dict = {}  # python class -> (keys of its own __dict__, {own name: is data attribute})
+        self.base_snapshots: dict = {}  # (base class, name, backend) -> (content digest, saved value, encoding)
+        self.immutable_types = self._resolve_immutable_types(config.getini("rerun_class_immutable_types"))
+        self.deferred_classes: dict = {}  # class node id -> ClassRun of a failed class awaiting its reruns
+        self.streamed_classes: dict = {}  # class node id -> ClassRun of a class streaming its first attempt
+        self.rerun_time = 0.0  # seconds spent on reruns in the session so far, waiting before them included
+        self.reruns_stopped: dict = {}  # user property -> {class node id: why it wasn't rerun again}, from the reports
+        self.history: dict = {}  # class node id -> its rerun history, loaded from the pytest cache
+        self.history_results: dict = {}  # class node id -> result of its attempts in this session, from the reports
+        self.breaker = RerunCircuitBreaker(
+            options.breaker_failures, options.breaker_rate, options.breaker_window, options.breaker_cooldown
+        )
+        self.logger.debug("pytest-rerunclassfailures plugin initialized!")
+
+    @staticmethod
+    def _resolve_immutable_types(paths: list) -> tuple:
+        """
+        Resolve the types declared immutable in the ``rerun_class_immutable_types`` ini option.
+
+        :param paths: dotted paths of the types, either 'package.module.Type' or 'package.module:Type'
+        :type paths: list
+        :return: resolved types
+        :rtype: tuple
+        """
+        types = []
+        for path in paths:
+            try:
+                value_type = pkgutil.resolve_name(path)
+            except (ImportError, AttributeError, ValueError) as error:
+                raise pytest.UsageError(
+                    f"pytest-rerunclassfailures: can't import immutable type {path!r}: {error}"
+                ) from error
+            if not isinstance(value_type, type):
+                raise pytest.UsageError(f"pytest-rerunclassfailures: immutable type {path!r} is not a type")
+            types.append(value_type)
+        return tuple(types)
+
+    @staticmethod
+    def _generate_fake_report(
+        nodeid: str,
+        longrepr: Union[None, ExceptionInfo[BaseException], Tuple[str, int, str], str, TerminalRepr],
+        sections: list,
+        location: tuple,
+        outcome: Literal["passed", "failed", "skipped", "rerun", "error", "xfailed", "xpassed"],
+    ) -> TestReport:
+        """
+        Generate a fake report for the skipped or error test.
+        :param nodeid: node id
+        :type nodeid: str
+        :param longrepr: longrepr
+        :type longrepr: Union[None, ExceptionInfo[BaseException], Tuple[str, int, str], str, TerminalRepr]
+        :param sections: sections
+        :type sections: list
+        :param location: location
+        :type location: tuple
+        :param outcome: outcome
+        :type outcome: Literal["passed", "failed", "skipped", "rerun", "error", "xfailed", "xpassed"]
+        :return: fake report
+        :rtype: TestReport
+        """
+        fake_report = TestReport(
+            nodeid=nodeid,
+            location=location,
+            keywords={},
+            outcome=outcome,  # type: ignore
+            longrepr=longrepr,
+            when="call",
+            sections=sections,
+            duration=0.0,
+            start=0.0,
+            stop=0.0,
+            user_properties=[],
+        )
+        return fake_report
+
+    def _report_run(self, item: _pytest.nodes.Item, test_class: dict) -> None:
+        """
+        Report the class test run.
+
+        :param item: pytest item
+        :type item: _pytest.nodes.Item
+        :param test_class: test class with tests node ids
+        :type test_class: dict
+        :return: None
+        :rtype: None
+        """
+        self.logger.debug("Reporting node results %s", item.nodeid)
+        if item.nodeid in test_class:
+            reruns = self._load_spilled_reports(test_class[item.nodeid])
+            self._log_reruns(item, reruns)
+        else:  # if there are no reruns or reruns because fail-fast abort, report the test as skipped
+            file, _, test_with_class = item.nodeid.partition("::")
+            class_name, _, test_name = test_with_class.partition("::")
+            test = f"{class_name}.{test_name}" if class_name and test_name else class_name
+            longrepr = (test, 0, "Skipping test due to class execution was aborted during rerun")
+            sections = [("Reason", "Skipping test due to class execution was aborted during rerun")]
+            location = (file, 0, test)
+            fake_report = self._generate_fake_report(item.nodeid, longrepr, sections, location, "skipped")
+            self.logger.debug("Reporting test node was skipped %s", item.nodeid)
+            item.ihook.pytest_runtest_logstart(nodeid=item.nodeid, location=item.location)
+            item.ihook.pytest_runtest_logreport(report=fake_report)
+            item.ihook.pytest_runtest_logfinish(nodeid=item.nodeid, location=item.location)
+        self.registry.release(item.getparent(pytest.Class).nodeid, item.nodeid)  # type: ignore
+
+    def _log_reruns(self, item: _pytest.nodes.Item, reruns: list) -> None:
+        """
+        Log the reports of each attempt of a test, if any.
+
+        :param item: pytest item
+        :type item: _pytest.nodes.Item
+        :param reruns: reports of each attempt of the test
+        :type reruns: list
+        :return: None
+        :rtype: None
+        """
+        if not any(reruns):
+            return  # every report was already streamed, and released
+        item.ihook.pytest_runtest_logstart(nodeid=item.nodeid, location=item.location)
+        for index, rerun in enumerate(reruns):
+            self.logger.debug("Reporting node results %s (%s/%s)", item.nodeid, len(reruns), index)
+            for report in rerun:
+                item.ihook.pytest_runtest_logreport(report=report)
+        item.ihook.pytest_runtest_logfinish(nodeid=item.nodeid, location=item.location)
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_protocol(
+        self, item: _pytest.nodes.Item, nextitem: _pytest.nodes.Item  # pylint: disable=W0613
+    ) -> Optional[bool]:
+        """
+        Run the test protocol.
+
+        :param item: pytest item
+        :type item: _pytest.nodes.Item
+        :param nextitem: next pytest item
+        :type nextitem: _pytest.nodes.Item
+        :return: True if this plugin handled the item, None to defer to other
+                 pytest_runtest_protocol hookimpls (pytest core's default, or another
+                 rerun plugin), False is never returned
+        :rtype: Optional[bool]
+        """
+        parent_class = item.getparent(pytest.Class)
+        module = item.nodeid.split("::")[0]
+
+        if item.cls is None or self.rerun_max <= 0 or not parent_class:  # type: ignore
+            self.logger.debug("Deferring %s to other pytest_runtest_protocol hookimpls", item.nodeid)
+            return None  # let pytest core / other rerun plugins handle non-class items
+
+        key = parent_class.nodeid
+        if key in self.deferred_classes:
+            self.logger.debug("Node %s belongs to deferred class %s, reporting later", item.nodeid, parent_class.name)
+            return True
+        if key in self.streamed_classes:
+            return self._run_streamed_test(self.streamed_classes[key], item)
+        if key in self.registry:
+            self.logger.debug(
+                "Node %s was already executed for %s class, reporting rest", item.nodeid, parent_class.name
+            )
+            self._report_run(item, self.registry.get(key))  # report the rest of the results
+            return True
+
+        siblings = self._collect_sibling_items(item)
+        options = self._get_class_options(parent_class)
+        test_class = self.registry.start(key, [sibling.nodeid for sibling in siblings[:-1]])
+        run = ClassRun(module, item, parent_class, siblings, test_class, options)
+        run.max_attempts = self._get_max_attempts(parent_class.nodeid)
+        if options.snapshot_mode != "fork":
+            run.initial_state = self._save_parent_initial_state(parent_class)
+            if options.stream:
+                self.streamed_classes[key] = run
+                return self._run_streamed_test(run, item)
+        if self._run_class_attempts(run, defer=options.defer):
+            self._process_reports(run.test_class)
+            self._report_run(run.item, run.test_class)
+            self._teardown_test_class(run.item)
+        else:
+            self._defer_class(run)
+        return True
+
+    def _defer_class(self, run: ClassRun) -> None:
+        """
+        Leave the reruns of a failed class for the end of the session, releasing its fixtures until then.
+
+        :param run: class run
+        :type run: ClassRun
+        :return: None
+        :rtype: None
+        """
+        self.logger.info("Deferring reruns of %s::%s to the end of the session", run.module, run.parent_class.name)
+        self.deferred_classes[run.parent_class.nodeid] = run
+        self._teardown_test_class(run.item)
+
+    def _run_streamed_test(self, run: ClassRun, item: _pytest.nodes.Item) -> bool:
+        """
+        Run a test of a class whose first attempt is streamed: each test runs when pytest reaches it and is reported
+        right away if it passes; the first failing one falls back to the reruns of the class, reported with it.
+
+        :param run: class run, on its first attempt
+        :type run: ClassRun
+        :param item: pytest item reached by pytest
+        :type item: _pytest.nodes.Item
+        :return: True, the item was handled
+        :rtype: bool
+        """
+        index = run.positions[item.nodeid]
+        last = run.siblings[index + 1] is None
+        checkpoints = run.checkpoints if run.options.resume == "checkpoint" else None
+        if not run.attempts:
+            run.attempts.append(Attempt(0, len(run.positions)))
+        attempt = run.attempts[0]
+        started = monotonic()
+        run.failed = self._run_attempt(run.siblings[: index + 2], run.test_class, 0, index, checkpoints)
+        attempt.outcomes[index] = Attempt.PASSED if run.failed is None else Attempt.FAILED
+        attempt.duration += monotonic() - started
+        run.attempts_time = run.last_duration = attempt.duration
+        if run.failed is None:
+            if last:  # the whole class passed
+                del self.streamed_classes[run.parent_class.nodeid]
+                self._finish_attempts(run)
+            self._log_streamed_reports(item, run.test_class[item.nodeid])
+            if last:
+                self._release_streamed_reports(run, len(run.siblings) - 1)
+                self._teardown_test_class(run.item)
+            return True
+
+        del self.streamed_classes[run.parent_class.nodeid]
+        if self._end_failed_attempt(run):
+            self._finish_attempts(run)
+        else:
+            self._run_class_attempts(run)  # never deferred, see RerunClassOptions._check_stream_not_deferred
+        self._add_rerun_notice(run, item, index)
+        self._process_reports(run.test_class)
+        self._report_run(item, run.test_class)
+        self._release_streamed_reports(run, index)
+        self._teardown_test_class(run.item)
+        return True
+
+    def _release_streamed_reports(self, run: ClassRun, index: int) -> None:
+        """
+        Release the tests of a streamed class already reported from the registry, once the class is done.
+
+        :param run: class run
+        :type run: ClassRun
+        :param index: number of siblings already reported by streaming
+        :type index: int
+        :return: None
+        :rtype: None
+        """
+        for sibling in run.siblings[:index]:
+            self.registry.release(run.parent_class.nodeid, sibling.nodeid)
+
+    @staticmethod
+    def _log_streamed_reports(item: _pytest.nodes.Item, attempts: list) -> None:
+        """
+        Log the reports of a passing test of a streamed class right away, and drop them: they are never reported
+        again, and the failure filters and rerun notices of the class only need the reports of its failed tests.
+
+        :param item: pytest item
+        :type item: _pytest.nodes.Item
+        :param attempts: reports of each attempt of the test, only the first one so far
+        :type attempts: list
+        :return: None
+        :rtype: None
+        """
+        reports, attempts[0] = attempts[0], []
+        item.ihook.pytest_runtest_logstart(nodeid=item.nodeid, location=item.location)
+        for report in reports:
+            item.ihook.pytest_runtest_logreport(report=report)
+        item.ihook.pytest_runtest_logfinish(nodeid=item.nodeid, location=item.location)
+
+    def _add_rerun_notice(self, run: ClassRun, item: _pytest.nodes.Item, index: int) -> None:
+        """
+        Add a notice to the last reports of the test a streamed class failed on, listing how the tests before it,
+        already reported as passed, did when rerun with the class. A failure of one of them in the last attempt is
+        reported as a failure of that test, since theirs can't be reported again.
+
+        :param run: class run
+        :type run: ClassRun
+        :param item: pytest item of the test the first attempt failed on
+        :type item: _pytest.nodes.Item
+        :param index: index of that test among the siblings
+        :type index: int
+        :return: None
+        :rtype: None
+        """
+        final = run.attempts[-1]
+        outcomes = final.outcomes[:index] if final.number > 0 else []
+        notices = [
+            f"{sibling.nodeid}: {'failed' if outcome == Attempt.FAILED else 'passed'}"
+            for sibling, outcome in zip(run.siblings, outcomes)
+            if outcome != Attempt.NOT_RUN
+        ]
+        if not notices:
+            return  # none of them was rerun
+        reports = self._get_attempt_reports(run.test_class, item.nodeid, final.number)
+        if final.failed is not None and final.failed < index:
+            sibling = run.siblings[final.failed]
+            for failure in [report for report in run.test_class[sibling.nodeid][final.number] if report.failed]:
+                longrepr = f"{sibling.nodeid} failed when rerun with its class:\n{failure.longreprtext}"
+                reports.append(self._generate_fake_report(item.nodeid, longrepr, [], item.location, "failed"))
+        for report in reports:
+            report.sections.append(("rerun notice", "Already reported, rerun with the class:\n" + "\n".join(notices)))
+
+    def _run_class_attempts(self, run: ClassRun, defer: bool = False, waiting_since: Optional[float] = None) -> bool:
+        """
+        Run the attempts of a class until it passes or runs out of reruns.
+
+        :param run: class run
+        :type run: ClassRun
+        :param defer: stop after the first failed attempt, leaving the reruns for the end of the session
+        :type defer: bool
+        :param waiting_since: monotonic time since which the class has been waiting for its next attempt, None if
+                              it only starts waiting now
+        :type waiting_since: Optional[float]
+        :return: False if the class failed and its reruns were deferred, True otherwise
+        :rtype: bool
+        """
+        while run.failed is not None and run.attempt < run.max_attempts:
+            delay = None
+            if run.attempt > 0:
+                delay = self._start_rerun(run, waiting_since)
+                if delay is None:
+                    break
+                waiting_since = None
+            rerun_started = monotonic()
+            attempt = Attempt(run.attempt, len(run.positions))
+            start = run.start
+            self._carry_reports_forward(run.siblings[:start], run.test_class, run.attempt)
+            self._trim_artifacts(run)  # the earlier attempts are over
+            self._spill_attempts(run)
+            attempt_started = monotonic()
+            if run.options.snapshot_mode == "fork":
+                run.failed = self._run_forked_attempt(run.item, run.siblings, run.test_class, run.attempt)
+            else:
+                checkpoints = run.checkpoints if run.options.resume == "checkpoint" else None
+                run.failed = self._run_attempt(run.siblings, run.test_class, run.attempt, start, checkpoints)
+            run.last_duration = attempt.duration = monotonic() - attempt_started
+            run.attempts_time += run.last_duration
+            attempt.record(run.failed)
+            run.attempts.append(attempt)
+            if run.attempt > 0:
+                self._charge_rerun_time(run, rerun_started)
+            if delay is not None:
+                self._record_rerun_delay(run, start, delay)
+            if run.failed is not None:
+                if self._end_failed_attempt(run):
+                    break
+                if defer and run.attempt < run.max_attempts:
+                    return False
+        self._finish_attempts(run)
+        return True
+
+    def _finish_attempts(self, run: ClassRun) -> None:
+        """
+        Record the outcome of the attempts of a class, once they are over.
+
+        :param run: class run
+        :type run: ClassRun
+        :return: None
+        :rtype: None
+        """
+        self._record_breaker_outcome(run)
+        if run.options.history:
+            self._record_history_result(run)
+        self._trim_artifacts(run, final=True)
+
+    def _spill_attempts(self, run: ClassRun) -> None:
+        """
+        Keep the reports of the attempts of a class that are over in memory up to ``--rerun-class-memory-budget``, and
+        spill the others to the report spool, to load them back when they are reported. Reports that can't be
+        serialized stay in memory.
+
+        :param run: class run
+        :type run: ClassRun
+        :return: None
+        :rtype: None
+        """
+        if self.options.memory_budget is None:
+            return
+        budget = self.options.memory_budget * 1024 * 1024
+        for attempt in range(run.spilled, run.attempt):
+            for reruns in run.test_class.values():
+                reports = reruns[attempt] if len(reruns) > attempt else None
+                if not reports:
+                    continue
+                size = sum(_estimate_report_size(report) for report in reports)
+                spilled = None if run.kept_size + size <= budget else self.spool.dump(reports)
+                if spilled is None:
+                    run.kept_size += size
+                else:
+                    reruns[attempt] = spilled
+        run.spilled = max(run.spilled, run.attempt)
+
+    def _load_spilled_reports(self, reruns: list) -> list:
+        """
+        Load the spilled reports of a test back, marked as reruns: only earlier attempts are spilled.
+
+        :param reruns: reports of each attempt of the test
+        :type reruns: list
+        :return: reports of each attempt of the test, all in memory
+        :rtype: list
+        """
+        loaded = []
+        for rerun in reruns:
+            if isinstance(rerun, SpilledReports):
+                rerun = self.spool.load(rerun)
+                self._mark_rerun_reports(rerun)
+            loaded.append(rerun)
+        return loaded
+
+    def _trim_artifacts(self, run: ClassRun, final: bool = False) -> None:
+        """
+        Reduce the reports of the attempts of a class that are over to the artifacts kept by
+        ``--rerun-class-keep-artifacts``, and cap their size with ``--rerun-class-artifact-max-size``. Called before
+        each attempt, for the earlier ones, and once the class is done, for its last attempt.
+
+        :param run: class run
+        :type run: ClassRun
+        :param final: whether the class is done, its last attempt being over too
+        :type final: bool
+        :return: None
+        :rtype: None
+        """
+        keep, max_size = self.options.keep_artifacts, self.options.artifact_max_size
+        if keep == "all" and max_size is None:
+            return
+        end = max((len(reruns) for reruns in run.test_class.values()), default=0)
+        end = end if final else min(end, run.attempt)
+        for attempt in range(run.trimmed, end):
+            last = final and attempt == end - 1
+            compact = (
+                keep == "none" or (keep == "last" and not last) or (keep == "first-last" and attempt > 0 and not last)
+            )
+            for reruns in run.test_class.values():
+                for report in reruns[attempt] if len(reruns) > attempt else []:
+                    if compact:
+                        _compact_report(report)
+                    if max_size is not None:
+                        _cap_report(report, max_size)
+        run.trimmed = max(run.trimmed, end)
+
+    def _get_max_attempts(self, class_nodeid: str) -> int:
+        """
+        Get the number of attempts a class may run, adapted to its rerun history with ``--rerun-class-adaptive``.
+
+        :param class_nodeid: class node id
+        :type class_nodeid: str
+        :return: number of attempts, the initial one included
+        :rtype: int
+        """
+        entry = self.history.get(class_nodeid)
+        if not self.options.adaptive or entry is None:
+            return self.rerun_max
+        if entry["failed_first"] >= HISTORY_MIN_FAILURES and entry["recovered"] == 0:
+            self.logger.info(
+                "Not rerunning %s: it never recovered in %s failed sessions", class_nodeid, entry["failed_first"]
+            )
+            return 1
+        needed = max((int(attempt) for attempt in entry["passed_on"]), default=0) + 1
+        if needed > self.rerun_max:
+            self.logger.info("Allowing %s with %s reruns: it once needed that many", class_nodeid, needed - 1)
+        return max(self.rerun_max, needed)
+
+    @staticmethod
+    def _record_history_result(run: ClassRun) -> None:
+        """
+        Record the result of the attempts of a class in the reports of its last attempt, for the history saved in
+        the pytest cache at the end of the session (by the controller process too, with pytest-xdist). It is set as
+        a report attribute rather than a user property, to stay out of the junitxml report.
+
+        :param run: class run
+        :type run: ClassRun
+        :return: None
+        :rtype: None
+        """
+        attempts = run.attempt + 1 if run.failed is None else run.attempt
+        result = {
+            "attempts": attempts,
+            "passed": run.failed is None,
+            "duration": round(run.attempts_time / max(attempts, 1), 3),
+        }
+        for reports in run.test_class.values():
+            for report in reports[attempts - 1] if len(reports) >= attempts else []:
+                report.rerun_class_history = result
+
+    def _end_failed_attempt(self, run: ClassRun) -> bool:
+        """
+        Count a failed attempt of a class, and tell whether its failure rules out any further rerun: it doesn't
+        match the failure filters, or it repeats the same failure too many times.
+
+        :param run: class run, its failed sibling and attempt being those of the failed attempt
+        :type run: ClassRun
+        :return: True if the class shouldn't be rerun
+        :rtype: bool
+        """
+        unmatched = self._check_rerun_filters(run)
+        repeated = self._check_same_failure(run)
+        run.attempt += 1
+        if unmatched is not None:
+            self.logger.info("Not rerunning %s::%s: %s", run.module, run.parent_class.name, unmatched)
+            return True
+        if repeated is not None and run.attempt < run.max_attempts:
+            self._record_reruns_stopped(run, "rerun_class_abandoned", repeated)
+            return True
+        return False
+
+    def _start_rerun(self, run: ClassRun, waiting_since: Optional[float]) -> Optional[float]:
+        """
+        Prepare the next attempt of a failed class if the circuit breaker and the rerun budgets allow it, probing
+        its failed test first before its first rerun if asked to. The time waited and the probe are charged to the
+        rerun budgets, and the budgets are checked again after the probe; a class they refuse then still fails.
+
+        :param run: class run
+        :type run: ClassRun
+        :param waiting_since: monotonic time since which the class has been waiting, None if it only starts now
+        :type waiting_since: Optional[float]
+        :return: delay waited before the attempt, None if the class isn't rerun
+        :rtype: Optional[float]
+        """
+        started = monotonic()
+        refusal = self._check_rerun_allowed(run)
+        if refusal is None:
+            delay = self._prepare_rerun(run, waiting_since)
+            if not run.options.probe or run.attempt > 1:
+                self._charge_rerun_time(run, started)
+                return delay
+            failed_again = self._run_probe(run)
+            self._charge_rerun_time(run, started)
+            if failed_again:
+                return None
+            refusal = self._check_rerun_allowed(run)
+            if refusal is None:
+                return delay
+            self._report_probed_failure(run)
+        self._record_reruns_stopped(run, *refusal)
+        return None
+
+    def _report_probed_failure(self, run: ClassRun) -> None:
+        """
+        Report the original failure of a class whose probe passed but which can't be rerun as a whole: the tests
+        before the probed one keep their last result, and the probed test its failure, the probe being a rerun.
+
+        :param run: class run, its probe being its last attempt
+        :type run: ClassRun
+        :return: None
+        :rtype: None
+        """
+        self._carry_reports_forward(run.siblings[: run.failed], run.test_class, run.attempt - 1)
+        attempts = run.test_class[run.siblings[run.failed].nodeid]  # type: ignore
+        attempts[-2], attempts[-1] = attempts[-1], attempts[-2]
+
+    def _charge_rerun_time(self, run: ClassRun, started: float) -> None:
+        """
+        Charge the time spent rerunning a class since ``started`` to the session and class rerun budgets.
+
+        :param run: class run
+        :type run: ClassRun
+        :param started: monotonic time the rerun work started
+        :type started: float
+        :return: None
+        :rtype: None
+        """
+        elapsed = monotonic() - started
+        run.rerun_time += elapsed
+        self.rerun_time += elapsed
+
+    def _run_probe(self, run: ClassRun) -> bool:
+        """
+        Rerun only the failed test of a class, its state being restored, to tell a deterministic failure from an
+        order-dependent or flaky one before rerunning the whole class. The probe is recorded as an attempt of its
+        own, which doesn't count as a rerun.
+
+        :param run: class run, prepared for its first rerun
+        :type run: ClassRun
+        :return: True if the probe failed the same way, and the class shouldn't be rerun
+        :rtype: bool
+        """
+        probe = run.siblings[run.failed]  # type: ignore
+        self.logger.info("Probing %s before rerunning its class", probe.nodeid)
+        if self.options.keep_artifacts != "all":
+            probe._report_sections = []  # pylint: disable=protected-access
+        reports = runtestprotocol(probe, nextitem=run.siblings[0], log=False)
+        self._get_attempt_reports(run.test_class, probe.nodeid, run.attempt).extend(reports)
+        signature = tuple(
+            _failure_signature(report) for report in reports if report.failed and not hasattr(report, "wasxfail")
+        )
+        run.attempt += 1
+        if signature == run.last_signature:
+            self.logger.info(
+                "Not rerunning %s::%s: the probe of %s failed the same way",
+                run.module,
+                run.parent_class.name,
+                probe.nodeid,
+            )
+            self._carry_reports_forward(run.siblings[: run.failed], run.test_class, run.attempt - 1)
+            return True
+        run.max_attempts += 1
+        run.item, run.parent_class, run.siblings = self._teardown_rerun(
+            run.item, run.parent_class, run.siblings, run.initial_state
+        )
+        return False
+
+    def _check_rerun_allowed(self, run: ClassRun) -> Optional[tuple]:
+        """
+        Check whether a failed class may be rerun once more, according to the circuit breaker and the rerun budgets.
+
+        :param run: class run
+        :type run: ClassRun
+        :return: user property recording why the class can't be rerun and the reason, None if it can
+        :rtype: Optional[tuple]
+        """
+        state = self.breaker.state
+        if not self.breaker.allow():
+            return "rerun_class_breaker_open", f"rerun circuit breaker open ({self.breaker.reason})"
+        if self.breaker.state != state:
+            self.logger.info("Rerun circuit breaker half-open, probing with %s::%s", run.module, run.parent_class.name)
+        exhausted = self._check_rerun_budget(run)
+        if exhausted is not None:
+            return "rerun_class_budget_exhausted", exhausted
+        return None
+
+    def _record_breaker_outcome(self, run: ClassRun) -> None:
+        """
+        Record the outcome of the reruns of a class in the circuit breaker, if it was rerun at all.
+
+        :param run: class run
+        :type run: ClassRun
+        :return: None
+        :rtype: None
+        """
+        last_attempt = run.attempt if run.failed is None else run.attempt - 1
+        if last_attempt < 1:
+            return
+        state = self.breaker.record(run.failed is None)
+        if state == "open":
+            self.logger.warning(
+                "\nRerun circuit breaker open: %s, not rerunning classes %s",
+                self.breaker.reason,
+                (
+                    "for the rest of the session"
+                    if self.breaker.cooldown is None
+                    else f"for {self.breaker.cooldown:g} seconds"
+                ),
+            )
+        elif state == "closed":
+            self.logger.info("Rerun circuit breaker closed: %s::%s passed", run.module, run.parent_class.name)
+
+    @staticmethod
+    def _record_rerun_delay(run: ClassRun, start: int, delay: float) -> None:
+        """
+        Record the delay waited before the last attempt of a class in the reports of that attempt.
+
+        :param run: class run
+        :type run: ClassRun
+        :param start: index of the sibling the attempt started from
+        :type start: int
+        :param delay: delay waited before the attempt, in seconds
+        :type delay: float
+        :return: None
+        :rtype: None
+        """
+        for sibling in run.siblings[start:-1]:
+            attempts = run.test_class.get(sibling.nodeid, [])
+            for report in attempts[run.attempt] if len(attempts) > run.attempt else []:
+                report.user_properties.append(("rerun_class_delay", delay))
+
+    @staticmethod
+    def _check_rerun_filters(run: ClassRun) -> Optional[str]:
+        """
+        Check whether the failure of the last attempt of a class is worth a rerun, according to its only_on and
+        except_on patterns.
+
+        :param run: class run, its failed sibling and attempt being those of the last attempt
+        :type run: ClassRun
+        :return: why the class isn't rerun, None if it is
+        :rtype: Optional[str]
+        """
+        options = run.options
+        if not options.only_on and not options.except_on:
+            return None
+        nodeid = run.siblings[run.failed].nodeid  # type: ignore
+        failures = [report for report in run.test_class[nodeid][run.attempt] if report.failed]
+        for report in failures:
+            pattern = _match_failure(report, options.except_on)
+            if pattern is not None:
+                return f"failure of {nodeid} matches except pattern {pattern!r}"
+        if options.only_on and not any(_match_failure(report, options.only_on) for report in failures):
+            return f"failure of {nodeid} matches none of the only_on patterns"
+        return None
+
+    @staticmethod
+    def _check_same_failure(run: ClassRun) -> Optional[str]:
+        """
+        Count the consecutive attempts of a class failing with the same signature, and tell whether that is enough
+        to consider its failure deterministic.
+
+        :param run: class run, its failed sibling and attempt being those of the last attempt
+        :type run: ClassRun
+        :return: why the reruns are abandoned, None if the class may be rerun
+        :rtype: Optional[str]
+        """
+        nodeid = run.siblings[run.failed].nodeid  # type: ignore
+        signature = tuple(_failure_signature(report) for report in run.test_class[nodeid][run.attempt] if report.failed)
+        run.same_failures = run.same_failures + 1 if signature == run.last_signature else 1
+        run.last_signature = signature
+        same_failure_max = run.options.same_failure_max
+        if same_failure_max is None or run.same_failures < same_failure_max:
+            return None
+        return (
+            f"deterministic failure, reruns abandoned ({nodeid} failed the same way "
+            f"in {run.same_failures} consecutive attempts)"
+        )
+
+    def _check_rerun_budget(self, run: ClassRun) -> Optional[str]:
+        """
+        Check whether the session and class rerun budgets have room left for one more attempt of a class, assuming
+        it lasts as long as its last attempt.
+
+        :param run: class run
+        :type run: ClassRun
+        :return: why the class can't be rerun, None if it can
+        :rtype: Optional[str]
+        """
+        session_budget = self.options.session_budget
+        if session_budget is not None and self.rerun_time + run.last_duration > session_budget:
+            return (
+                f"session rerun budget of {session_budget:g}s exhausted "
+                f"({self.rerun_time:.1f}s spent, last attempt took {run.last_duration:.1f}s)"
+            )
+        class_budget = run.options.class_budget
+        if class_budget is not None and run.rerun_time + run.last_duration > class_budget:
+            return (
+                f"class rerun budget of {class_budget:g}s exhausted "
+                f"({run.rerun_time:.1f}s spent, last attempt took {run.last_duration:.1f}s)"
+            )
+        return None
+
+    def _record_reruns_stopped(self, run: ClassRun, name: str, reason: str) -> None:
+        """
+        Stop rerunning a class before it ran out of reruns: log why and record it in the reports of its last attempt,
+        for the terminal summary (of the controller process too, with pytest-xdist).
+
+        :param run: class run
+        :type run: ClassRun
+        :param name: user property recording the reason, one of RERUNS_STOPPED_SECTIONS
+        :type name: str
+        :param reason: why the class isn't rerun again
+        :type reason: str
+        :return: None
+        :rtype: None
+        """
+        self.logger.warning("\nNot rerunning %s::%s again: %s", run.module, run.parent_class.name, reason)
+        for attempts in run.test_class.values():
+            for report in attempts[run.attempt - 1] if len(attempts) >= run.attempt else []:
+                report.user_properties.append((name, reason))
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_makereport(self, item: _pytest.nodes.Item, call: pytest.CallInfo):  # pylint: disable=W0613
+        """
+        Record the exception type names of a failure on its report, for the only_on and except_on patterns (the
+        assertion rewriting leaves the type out of the crash message).
+
+        :param item: pytest item
+        :type item: _pytest.nodes.Item
+        :param call: call information
+        :type call: pytest.CallInfo
+        :return: generator
+        :rtype: Generator
+        """
+        outcome = yield
+        report = outcome.get_result()
+        if report.failed and call.excinfo is not None:
+            report.rerun_class_exception_types = [
+                name
+                for exception_type in call.excinfo.type.__mro__[:-1]
+                for name in (exception_type.__qualname__, f"{exception_type.__module__}.{exception_type.__qualname__}")
+            ]
+
+    def pytest_runtest_logreport(self, report: TestReport) -> None:
+        """
+        Collect the classes that weren't rerun again: for lack of budget, because their reruns were abandoned or
+        because the circuit breaker was open; and the results of the classes for the rerun history.
+
+        :param report: test report
+        :type report: TestReport
+        :return: None
+        :rtype: None
+        """
+        for name, value in report.user_properties:
+            if name in RERUNS_STOPPED_SECTIONS:
+                self.reruns_stopped.setdefault(name, {})[report.nodeid.rsplit("::", 1)[0]] = value
+        if hasattr(report, "rerun_class_history"):
+            self.history_results[report.nodeid.rsplit("::", 1)[0]] = report.rerun_class_history
+
+    def _prepare_rerun(self, run: ClassRun, waiting_since: Optional[float]) -> float:
+        """
+        Prepare the next attempt of a failed class: tear it down, restore its state and wait for the rerun delay.
+
+        :param run: class run
+        :type run: ClassRun
+        :param waiting_since: monotonic time since which the class has been waiting, None if it only starts now
+        :type waiting_since: Optional[float]
+        :return: delay waited before the attempt, in seconds
+        :rtype: float
+        """
+        if run.options.snapshot_mode != "fork":  # a forked attempt never touched this process, nothing to restore
+            run.start, state = self._get_resume_point(
+                run.options.resume, run.failed, run.checkpoints, run.initial_state  # type: ignore
+            )
+            run.item, run.parent_class, run.siblings = self._teardown_rerun(
+                run.item, run.parent_class, run.siblings, state
+            )
+        delay = self._wait_until_ready(run, waiting_since)
+        self.logger.info(
+            "Rerunning %s::%s - %s time(s) after %s seconds", run.module, run.parent_class.name, run.attempt, delay
+        )
+        return delay
+
+    def _wait_until_ready(self, run: ClassRun, waiting_since: Optional[float] = None) -> float:
+        """
+        Wait before the next rerun of a class: poll the ``pytest_rerunclass_ready`` probes until they are all ready
+        (or the ready timeout expires), or wait for the class's rerun delay if no probe applies to it. Both count
+        from ``waiting_since`` if given, so that the time a deferred class already spent waiting isn't waited again.
+
+        :param run: class run
+        :type run: ClassRun
+        :param waiting_since: monotonic time since which the class has been waiting, None if it only starts now
+        :type waiting_since: Optional[float]
+        :return: time actually waited by this call, in seconds
+        :rtype: float
+        """
+        entered = monotonic()
+        started = entered if waiting_since is None else waiting_since
+        results = self._poll_ready(run)
+        if not results:  # no probe for this class, fall back to a blind delay
+            delay = self._get_rerun_delay(run)
+            sleep(max(delay - (monotonic() - started), 0))
+            return monotonic() - entered
+        options = run.options
+        while not all(results):
+            elapsed = monotonic() - started
+            if elapsed >= options.ready_timeout:
+                self.logger.warning(
+                    "\n%s::%s isn't ready after %s seconds, rerunning anyway",
+                    run.module,
+                    run.parent_class.name,
+                    options.ready_timeout,
+                )
+                break
+            sleep(min(options.ready_interval, options.ready_timeout - elapsed))
+            results = self._poll_ready(run)
+        return monotonic() - entered
+
+    def _poll_ready(self, run: ClassRun) -> list:
+        """
+        Poll the ``pytest_rerunclass_ready`` probes once; a probe raising an exception counts as not ready.
+
+        :param run: class run
+        :type run: ClassRun
+        :return: results of the probes applying to the class
+        :rtype: list
+        """
+        config = run.item.config
+        hook = run.parent_class.ihook  # only the conftests in scope of the class
+        try:
+            return hook.pytest_rerunclass_ready(config=config, cls=run.parent_class.obj, attempt=run.attempt)
+        except Exception as error:  # pylint: disable=broad-except
+            self.logger.debug("Readiness probe of %s failed: %s", run.parent_class.name, error)
+            return [False]
+
+    @staticmethod
+    def _get_rerun_delay(run: ClassRun) -> float:
+        """
+        Get the delay to wait before the next rerun of a class, according to its delay policy.
+
+        :param run: class run, its attempt being the number of the coming rerun
+        :type run: ClassRun
+        :return: delay in seconds
+        :rtype: float
+        """
+        options = run.options
+        if options.delay_policy == "linear":
+            delay = options.delay * run.attempt
+        elif options.delay_policy == "exponential":
+            delay = options.delay * 2 ** (run.attempt - 1)
+        elif options.delay_policy == "jitter":
+            delay = random.uniform(options.delay, max(options.delay, run.last_delay * 3))  # nosec B311 - not crypto
+        else:
+            delay = options.delay
+        if options.delay_max is not None:
+            delay = min(delay, options.delay_max)
+        run.last_delay = delay
+        return delay
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtestloop(self, session: pytest.Session):
+        """
+        Rerun the deferred classes once every other test of the session has run, each once its probes are ready
+        or its rerun delay is over, counted from the end of the run loop so that the classes share their delay.
+
+        If the session was stopped (``--maxfail``, ``-x``), the deferred classes aren't rerun, but the reports of
+        their first attempt are still logged before the stop propagates.
+
+        :param session: pytest session
+        :type session: pytest.Session
+        :return: generator
+        :rtype: Generator
+        """
+        outcome = yield
+        if not self.deferred_classes:
+            return
+        if outcome.excinfo is not None and not isinstance(outcome.excinfo[1], (session.Failed, session.Interrupted)):
+            return
+        runs = list(self.deferred_classes.values())
+        rerun = outcome.excinfo is None and not (session.shouldfail or session.shouldstop)
+        waiting_since = monotonic()
+        if rerun:
+            self.logger.info("Rerunning %s deferred class(es)", len(runs))
+        for run in runs:
+            if rerun:
+                self._run_class_attempts(run, waiting_since=waiting_since)
+            del self.deferred_classes[run.parent_class.nodeid]
+            self._process_reports(run.test_class)
+            for sibling in run.siblings[:-1]:
+                self._report_run(sibling, run.test_class)
+            self._teardown_test_class(run.item)
+
+    @staticmethod
+    def _get_attempt_reports(test_class: dict, nodeid: str, attempt: int) -> list:
+        """
+        Get the list collecting the reports of a test for an attempt, creating it (and any missing one before it).
+
+        :param test_class: test class results, node id -> reports of each attempt
+        :type test_class: dict
+        :param nodeid: test node id
+        :type nodeid: str
+        :param attempt: index of the attempt
+        :type attempt: int
+        :return: reports of the test for the attempt
+        :rtype: list
+        """
+        attempts = test_class.setdefault(nodeid, [])
+        if len(attempts) <= attempt:
+            attempts.extend([] for _ in range(attempt + 1 - len(attempts)))
+        return attempts[attempt]
+
+    def _run_attempt(  # pylint: disable=too-many-positional-arguments
+        self, siblings: list, test_class: dict, attempt: int, start: int = 0, checkpoints: Optional[dict] = None
+    ) -> Optional[int]:
+        """
+        Run one attempt of a class: its tests in order from the given one, stopping at the first failure.
+
+        :param siblings: sibling items of the class, terminated by None
+        :type siblings: list
+        :param test_class: test class results, node id -> reports of each attempt
+        :type test_class: dict
+        :param attempt: index of the attempt
+        :type attempt: int
+        :param start: index of the sibling to start from
+        :type start: int
+        :param checkpoints: sibling index -> class state saved before it, filled for each checkpoint test reached
+                            for the first time; None if checkpoints aren't used
+        :type checkpoints: Optional[dict]
+        :return: index of the sibling that failed, None if every test passed
+        :rtype: Optional[int]
+        """
+        for i in range(start, len(siblings) - 1):
+            if (
+                checkpoints is not None
+                and i not in checkpoints
+                and siblings[i].get_closest_marker("rerun_class_checkpoint") is not None
+            ):
+                checkpoints[i] = self._save_parent_initial_state(siblings[i].getparent(pytest.Class))
+            # Before run, we need to ensure that finalizers are not called (indicated by None in the stack)
+            nextitem = siblings[i + 1] if siblings[i + 1] is not None else siblings[0]
+            if self.options.keep_artifacts != "all":  # don't carry the output captured by earlier attempts
+                siblings[i]._report_sections = []  # pylint: disable=protected-access
+            item_reports = runtestprotocol(siblings[i], nextitem=nextitem, log=False)
+
+            reports = self._get_attempt_reports(test_class, siblings[i].nodeid, attempt)
+            passed = True
+            for report in item_reports:
+                reports.append(report)
+                if report.failed and not hasattr(report, "wasxfail"):
+                    passed = False
+
+            if not passed:
+                return i  # fail fast
+        return None
 
-    def __init__(self, config: pytest.Config) -> None:
+    def _carry_reports_forward(self, skipped_siblings: list, test_class: dict, attempt: int) -> None:
         """
-        Initialize RerunClassPlugin class.
+        Move the reports of tests a resumed attempt doesn't rerun to that attempt, so their last run is reported as
+        their final result instead of as a rerun.
 
-        :param config: pytest config
-        :type config: _pytest.config.Config
+        :param skipped_siblings: sibling items before the one the attempt resumes from
+        :type skipped_siblings: list
+        :param test_class: test class results, node id -> reports of each attempt
+        :type test_class: dict
+        :param attempt: index of the attempt
+        :type attempt: int
         :return: None
         :rtype: None
         """
-        self.logger = logging.getLogger("pytest")
-        self.rerun_classes: dict = {}  # test classed already rerun
-        try:
-            options = RerunClassOptions(
-                rerun_max=config.getoption("--rerun-class-max"),
-                delay=config.getoption("--rerun-delay"),
-                only_last=config.getoption("--rerun-show-only-last"),
-                hide_terminal_output=config.getoption("--hide-rerun-details"),
-            )
-        except ValidationError as error:
-            self.logger.warning("pytest-rerunclassfailures: invalid option value(s): %s", error)
-            raise pytest.UsageError(f"pytest-rerunclassfailures: invalid option value(s):\n{error}") from error
-        self.logger.debug("pytest-rerunclassfailures options validated: %s", options)
-        # increment by 1 to include the initial run
-        self.rerun_max = options.rerun_max + 1 if options.rerun_max > 0 else 0
-        self.delay = options.delay  # delay between reruns in seconds
-        self.only_last = options.only_last  # rerun only the last failed test
-        self.hide_terminal_output = options.hide_terminal_output  # hide rerun details in terminal output
-        self.logger.debug("pytest-rerunclassfailures plugin initialized!")
+        for sibling in skipped_siblings:
+            attempts = test_class[sibling.nodeid]
+            reports, attempts[-1] = attempts[-1], []
+            self._get_attempt_reports(test_class, sibling.nodeid, attempt).extend(reports)
 
     @staticmethod
-    def _generate_fake_report(
-        nodeid: str,
-        longrepr: Union[None, ExceptionInfo[BaseException], Tuple[str, int, str], str, TerminalRepr],
-        sections: list,
-        location: tuple,
-        outcome: Literal["passed", "failed", "skipped", "rerun", "error", "xfailed", "xpassed"],
-    ) -> TestReport:
+    def _get_resume_point(resume: str, failed: int, checkpoints: dict, initial_state: dict) -> tuple:
         """
-        Generate a fake report for the skipped or error test.
-        :param nodeid: node id
-        :type nodeid: str
-        :param longrepr: longrepr
-        :type longrepr: Union[None, ExceptionInfo[BaseException], Tuple[str, int, str], str, TerminalRepr]
-        :param sections: sections
-        :type sections: list
-        :param location: location
-        :type location: tuple
-        :param outcome: outcome
-        :type outcome: Literal["passed", "failed", "skipped", "rerun", "error", "xfailed", "xpassed"]
-        :return: fake report
-        :rtype: TestReport
+        Get where the next attempt of a class starts, and the class state to restore before it.
+
+        :param resume: resume mode
+        :type resume: str
+        :param failed: index of the sibling that failed
+        :type failed: int
+        :param checkpoints: sibling index -> class state saved before that checkpoint test ran
+        :type checkpoints: dict
+        :param initial_state: class state saved before the first attempt
+        :type initial_state: dict
+        :return: index of the sibling to start from, and the class state to restore (None to keep it as it is)
+        :rtype: tuple
         """
-        fake_report = TestReport(
-            nodeid=nodeid,
-            location=location,
-            keywords={},
-            outcome=outcome,  # type: ignore
-            longrepr=longrepr,
-            when="call",
-            sections=sections,
-            duration=0.0,
-            start=0.0,
-            stop=0.0,
-            user_properties=[],
-        )
-        return fake_report
-
-    def _report_run(self, item: _pytest.nodes.Item, test_class: dict) -> None:
+        if resume == "failed":
+            return failed, None
+        if resume == "checkpoint":
+            checkpoint = max((index for index in checkpoints if index <= failed), default=None)
+            if checkpoint is not None:
+                return checkpoint, checkpoints[checkpoint]
+        return 0, initial_state
+
+    def _run_forked_attempt(
+        self, item: _pytest.nodes.Item, siblings: list, test_class: dict, attempt: int
+    ) -> Optional[int]:
         """
-        Report the class test run.
+        Run one attempt of a class in a forked child process, so every attempt starts from the untouched state of
+        this process (class attributes, module globals and everything else), and collect its reports over a pipe.
 
         :param item: pytest item
         :type item: _pytest.nodes.Item
-        :param test_class: test class with tests node ids
+        :param siblings: sibling items of the class, terminated by None
+        :type siblings: list
+        :param test_class: test class results, node id -> reports of each attempt
         :type test_class: dict
-        :return: None
-        :rtype: None
+        :param attempt: index of the attempt
+        :type attempt: int
+        :return: index of the sibling that failed, None if every test passed
+        :rtype: Optional[int]
         """
-        self.logger.debug("Reporting node results %s", item.nodeid)
-        if item.nodeid in test_class:
-            item.ihook.pytest_runtest_logstart(nodeid=item.nodeid, location=item.location)
-            for index, rerun in enumerate(test_class[item.nodeid]):
-                self.logger.debug("Reporting node results %s (%s/%s)", item.nodeid, len(test_class[item.nodeid]), index)
-                for report in rerun:
-                    item.ihook.pytest_runtest_logreport(report=report)
-            item.ihook.pytest_runtest_logfinish(nodeid=item.nodeid, location=item.location)
-        else:  # if there are no reruns or reruns because fail-fast abort, report the test as skipped
-            file, _, test_with_class = item.nodeid.partition("::")
-            class_name, _, test_name = test_with_class.partition("::")
-            test = f"{class_name}.{test_name}" if class_name and test_name else class_name
-            longrepr = (test, 0, "Skipping test due to class execution was aborted during rerun")
-            sections = [("Reason", "Skipping test due to class execution was aborted during rerun")]
-            location = (file, 0, test)
-            fake_report = self._generate_fake_report(item.nodeid, longrepr, sections, location, "skipped")
-            self.logger.debug("Reporting test node was skipped %s", item.nodeid)
-            item.ihook.pytest_runtest_logstart(nodeid=item.nodeid, location=item.location)
-            item.ihook.pytest_runtest_logreport(report=fake_report)
-            item.ihook.pytest_runtest_logfinish(nodeid=item.nodeid, location=item.location)
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:  # child: run the attempt, send its reports and never return into the session
+            os.close(read_fd)
+            self._run_forked_child(item, siblings, attempt, write_fd)
+        os.close(write_fd)
+        with os.fdopen(read_fd, "rb") as reader:
+            payload = reader.read()  # read everything before waiting, so a big payload can't block the child
+        _, status = os.waitpid(pid, 0)
+        try:
+            result = json.loads(payload)
+        except ValueError:
+            result = None
+        if result is None or "error" in result:
+            error = None if result is None else result["error"]
+            self._record_forked_crash(item, test_class, attempt, os.waitstatus_to_exitcode(status), error)
+            return 0
+        for nodeid, reports in result["reports"].items():
+            self._get_attempt_reports(test_class, nodeid, attempt).extend(
+                item.config.hook.pytest_report_from_serializable(config=item.config, data=data) for data in reports
+            )
+        return result["failed"]
 
-    @pytest.hookimpl(tryfirst=True)
-    def pytest_runtest_protocol(
-        self, item: _pytest.nodes.Item, nextitem: _pytest.nodes.Item  # pylint: disable=W0613
-    ) -> Optional[bool]:
+    def _record_forked_crash(  # pylint: disable=too-many-positional-arguments
+        self, item: _pytest.nodes.Item, test_class: dict, attempt: int, exit_code: int, error: Optional[str] = None
+    ) -> None:
         """
-        Run the test protocol.
+        Record a failed report for a forked attempt whose child process died or couldn't send its results.
 
         :param item: pytest item
         :type item: _pytest.nodes.Item
-        :param nextitem: next pytest item
-        :type nextitem: _pytest.nodes.Item
-        :return: True if this plugin handled the item, None to defer to other
-                 pytest_runtest_protocol hookimpls (pytest core's default, or another
-                 rerun plugin), False is never returned
-        :rtype: Optional[bool]
+        :param test_class: test class results, node id -> reports of each attempt
+        :type test_class: dict
+        :param attempt: index of the attempt
+        :type attempt: int
+        :param exit_code: exit code of the child process (negative signal number if it was killed)
+        :type exit_code: int
+        :param error: traceback sent by the child process if its results couldn't be serialized
+        :type error: Optional[str]
+        :return: None
+        :rtype: None
         """
-        parent_class = item.getparent(pytest.Class)
-        module = item.nodeid.split("::")[0]
-
-        if item.cls is None or self.rerun_max <= 0 or not parent_class:  # type: ignore
-            self.logger.debug("Deferring %s to other pytest_runtest_protocol hookimpls", item.nodeid)
-            return None  # let pytest core / other rerun plugins handle non-class items
-
-        if module not in self.rerun_classes:
-            self.rerun_classes[module] = {}
-        if parent_class.name not in self.rerun_classes[module]:
-            self.rerun_classes[module][parent_class.name] = {}  # to store class run results
+        if error is None:
+            error = f"forked test process exited with code {exit_code} without results"
         else:
-            self.logger.debug(
-                "Node %s was already executed for %s class, reporting rest", item.nodeid, parent_class.name
-            )
-            self._report_run(item, self.rerun_classes[module][parent_class.name])  # report the rest of the results
-            return True
+            error = f"forked test process couldn't send its results:\n{error}"
+        self.logger.warning("\n%s: %s", item.nodeid, error)
+        file, _, test = item.nodeid.partition("::")
+        fake_report = self._generate_fake_report(item.nodeid, error, [], (file, 0, test), "failed")
+        self._get_attempt_reports(test_class, item.nodeid, attempt).append(fake_report)
 
-        siblings = self._collect_sibling_items(item)
+    def _teardown_forked_attempt(self, stack: dict, inherited: dict) -> None:
+        """
+        Tear down what a forked attempt set up: the class and function scope, and any fixture of a wider scope first
+        requested by the class. Finalizers inherited from the parent process are left alone, they belong to it.
 
-        rerun_count = 0
-        passed = False
-        initial_state = self._save_parent_initial_state(parent_class)
-        while not passed and rerun_count < self.rerun_max:
-            passed = True
-            for i in range(len(siblings) - 1):
-                # Before run, we need to ensure that finalizers are not called (indicated by None in the stack)
-                nextitem = siblings[i + 1] if siblings[i + 1] is not None else siblings[0]
-                siblings[i].reports = runtestprotocol(siblings[i], nextitem=nextitem, log=False)
-
-                if siblings[i].nodeid not in self.rerun_classes[module][parent_class.name]:
-                    self.rerun_classes[module][parent_class.name][siblings[i].nodeid] = []
-                while len(self.rerun_classes[module][parent_class.name][siblings[i].nodeid]) <= rerun_count:
-                    self.rerun_classes[module][parent_class.name][siblings[i].nodeid].append([])
-
-                for report in siblings[i].reports:
-                    self.rerun_classes[module][parent_class.name][siblings[i].nodeid][rerun_count].append(report)
-                    if report.failed and not hasattr(report, "wasxfail"):
-                        passed = False
-
-                if not passed:
-                    rerun_count += 1
-                    break  # fail fast
-
-            if not passed and rerun_count < self.rerun_max:
-                item, parent_class, siblings = self._teardown_rerun(item, parent_class, siblings, initial_state)
-                self.logger.info(
-                    "Rerunning %s::%s - %s time(s) after %s seconds", module, parent_class.name, rerun_count, self.delay
-                )
-                sleep(self.delay)
+        :param stack: pytest's SetupState stack in the child process
+        :type stack: dict
+        :param inherited: node -> number of its finalizers inherited from the parent process
+        :type inherited: dict
+        :return: None
+        :rtype: None
+        """
+        for node, (finalizers, _exc) in reversed(list(stack.items())):
+            while len(finalizers) > inherited.get(node, 0):
+                fin = finalizers.pop()
+                try:
+                    fin()
+                except Exception as error:  # pylint: disable=broad-except
+                    self.logger.warning("\nException during teardown: %s: %s", type(error).__name__, error)
 
-        self._process_reports(self.rerun_classes[module][parent_class.name])
-        self._report_run(item, self.rerun_classes[module][parent_class.name])
-        self._teardown_test_class(item)
-        return True
+    def _run_forked_child(self, item: _pytest.nodes.Item, siblings: list, attempt: int, write_fd: int) -> None:
+        """
+        Run one attempt of a class in the forked child process, send its serialized reports to the parent and exit.
+
+        :param item: pytest item
+        :type item: _pytest.nodes.Item
+        :param siblings: sibling items of the class, terminated by None
+        :type siblings: list
+        :param attempt: index of the attempt
+        :type attempt: int
+        :param write_fd: write end of the pipe to the parent
+        :type write_fd: int
+        :return: None, never returns
+        :rtype: None
+        """
+        exit_code = 1
+        try:
+            stack = item.session._setupstate.stack  # pylint: disable=protected-access
+            inherited = {node: len(finalizers) for node, (finalizers, _exc) in stack.items()}
+            test_class: dict = {}
+            failed = self._run_attempt(siblings, test_class, attempt)
+            reports = {
+                nodeid: [
+                    item.config.hook.pytest_report_to_serializable(config=item.config, report=report)
+                    for report in attempts[attempt]
+                ]
+                for nodeid, attempts in test_class.items()
+            }
+            try:  # values that aren't JSON-serializable, e.g. in user_properties, are sent as their repr
+                payload = json.dumps({"failed": failed, "reports": reports}, default=repr)
+            except Exception:  # pylint: disable=broad-except
+                payload = json.dumps({"error": traceback.format_exc()})
+            with os.fdopen(write_fd, "wb") as writer:
+                writer.write(payload.encode())
+            self._teardown_forked_attempt(stack, inherited)
+            exit_code = 0
+        finally:
+            os._exit(exit_code)  # pylint: disable=protected-access
 
     def _teardown_test_class(self, item: _pytest.nodes.Item) -> None:
         """
@@ -265,7 +2479,7 @@ class RerunClassPlugin:  # pylint: disable=too-few-public-methods
             self.logger.warning("\nException during teardown: %s: %s", type(error).__name__, error)
 
     def _teardown_rerun(
-        self, item: _pytest.nodes.Item, parent_class: pytest.Class, siblings: list, initial_state: dict
+        self, item: _pytest.nodes.Item, parent_class: pytest.Class, siblings: list, initial_state: Optional[dict]
     ) -> Tuple[_pytest.nodes.Item, pytest.Class, list]:
         """
         Teardown rerun
@@ -276,8 +2490,8 @@ class RerunClassPlugin:  # pylint: disable=too-few-public-methods
         :type parent_class: pytest.Class
         :param siblings: siblings of the parent class
         :type siblings: list
-        :param initial_state: initial attributes of class
-        :type initial_state: dict
+        :param initial_state: initial attributes of class, None to keep the class attributes as they are
+        :type initial_state: Optional[dict]
         :return: tuple
         """
         # Genuinely tear down class/function-scope fixtures via pytest's own finalizer chain
@@ -287,6 +2501,171 @@ class RerunClassPlugin:  # pylint: disable=too-few-public-methods
         item.parent = parent_class  # ensure that we're using updated class
         return item, parent_class, siblings
 
+    def pytest_sessionstart(self, session: pytest.Session) -> None:
+        """
+        Load the rerun history of the classes from the pytest cache.
+
+        :param session: pytest session
+        :type session: pytest.Session
+        :return: None
+        :rtype: None
+        """
+        cache = getattr(session.config, "cache", None)
+        if self.options.history and cache is not None:
+            self.history = cache.get(HISTORY_CACHE_KEY, {})
+
+    def pytest_sessionfinish(self, session: pytest.Session) -> None:
+        """
+        Merge the results of the classes run in the session into their rerun history, and save it to the pytest cache.
+
+        :param session: pytest session
+        :type session: pytest.Session
+        :return: None
+        :rtype: None
+        """
+        self.spool.close()
+        cache = getattr(session.config, "cache", None)
+        if not self.history_results or cache is None or hasattr(session.config, "workerinput"):
+            return  # nothing to save, or a pytest-xdist worker: its results reach the controller with the reports
+        for class_nodeid, result in self.history_results.items():
+            entry = self.history.setdefault(
+                class_nodeid, {"sessions": 0, "failed_first": 0, "recovered": 0, "passed_on": {}, "duration": 0.0}
+            )
+            entry["sessions"] += 1
+            entry["duration"] += (result["duration"] - entry["duration"]) / entry["sessions"]  # running mean
+            if result["attempts"] > 1 or not result["passed"]:
+                entry["failed_first"] += 1
+            if result["passed"]:
+                rerun = str(result["attempts"] - 1)
+                entry["passed_on"][rerun] = entry["passed_on"].get(rerun, 0) + 1
+                entry["recovered"] += result["attempts"] > 1
+        cache.set(HISTORY_CACHE_KEY, self.history)
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_collection_modifyitems(self, items: list) -> None:
+        """
+        Move the classes that recovered on a rerun in past sessions to the front of the session, with
+        ``--rerun-class-flaky-first``: the flakiest first, each class kept contiguous and in its own order.
+
+        :param items: session items, reordered in place
+        :type items: list
+        :return: None
+        :rtype: None
+        """
+        if not self.options.flaky_first or not self.history:
+            return
+        class_keys: dict = {}  # pytest class -> sort key of its items, None if it isn't flaky
+        keys = []
+        for position, item in enumerate(items):
+            parent_class = item.getparent(pytest.Class) if getattr(item, "cls", None) is not None else None
+            if parent_class is None:
+                keys.append((1, 0.0, position, position))
+                continue
+            if parent_class not in class_keys:
+                entry = self.history.get(parent_class.nodeid)
+                if entry is not None and entry["recovered"] > 0:
+                    class_keys[parent_class] = (0, -entry["recovered"] / entry["sessions"], position)
+                else:
+                    class_keys[parent_class] = None
+            class_key = class_keys[parent_class]
+            keys.append((*class_key, position) if class_key is not None else (1, 0.0, position, position))
+        flaky_classes = sum(key is not None for key in class_keys.values())
+        if flaky_classes:
+            self.logger.debug("Moving %s flaky class(es) to the front of the session", flaky_classes)
+            items[:] = [item for _, item in sorted(zip(keys, items), key=lambda pair: pair[0])]
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_collection_finish(self, session: pytest.Session) -> None:
+        """
+        Build the class index once collection (and every other plugin's reordering) is done.
+
+        Per-class options are resolved here as well, so an invalid ``rerun_class`` marker is reported as a usage
+        error before any test runs.
+
+        :param session: pytest session
+        :type session: pytest.Session
+        :return: None
+        :rtype: None
+        """
+        self._build_class_index(session.items)
+        for parent_class in self.class_index:
+            self._get_class_options(parent_class)
+
+    def _get_class_options(self, parent_class: pytest.Class) -> RerunClassOptions:
+        """
+        Get the effective options of a class: the session options overridden by its ``rerun_class`` marker.
+
+        :param parent_class: pytest class
+        :type parent_class: pytest.Class
+        :return: validated class options
+        :rtype: RerunClassOptions
+        """
+        options = self.class_options.get(parent_class)
+        if options is not None:
+            return options
+        marker = parent_class.get_closest_marker("rerun_class")
+        if marker is None:
+            options = self.options
+        else:
+            unknown = sorted(set(marker.kwargs) - set(CLASS_MARKER_OPTIONS))
+            if unknown:
+                raise pytest.UsageError(
+                    f"pytest-rerunclassfailures: unknown rerun_class marker option(s) on {parent_class.nodeid}: "
+                    f"{', '.join(unknown)} (allowed: {', '.join(CLASS_MARKER_OPTIONS)})"
+                )
+            overrides = dict(marker.kwargs)
+            if overrides.get("defer") and self.options.distributed:
+                self.logger.warning("Not deferring %s: pytest-xdist distributes the tests", parent_class.nodeid)
+                overrides["defer"] = False  # rerun inline, as its results must be reported while its tests run
+            try:
+                options = RerunClassOptions.model_validate({**self.options.model_dump(), **overrides})
+            except ValidationError as error:
+                raise pytest.UsageError(
+                    f"pytest-rerunclassfailures: invalid rerun_class marker on {parent_class.nodeid}:\n{error}"
+                ) from error
+            self.logger.debug("Options of %s overridden by marker: %s", parent_class.nodeid, marker.kwargs)
+        self.class_options[parent_class] = options
+        return options
+
+    def _build_class_index(self, items: list) -> None:
+        """
+        Index items by their parent class node, keeping the session order within each class.
+
+        :param items: session items
+        :type items: list
+        :return: None
+        :rtype: None
+        """
+        self.logger.debug("Building class index for %s items", len(items))
+        self.class_index = {}
+        self.item_positions = {}
+        for position, item in enumerate(items):
+            self.item_positions[item] = position
+            if getattr(item, "cls", None) is None:
+                continue
+            parent_class = item.getparent(pytest.Class)
+            if parent_class is not None:
+                self.class_index.setdefault(parent_class, []).append(item)
+
+    def _is_class_index_valid(self, items: list, class_items: list) -> bool:
+        """
+        Check that the indexed items of a class still sit where they were when the index was built.
+
+        Only the class's own items are checked, so validation is O(class size), not O(session size).
+
+        :param items: session items
+        :type items: list
+        :param class_items: indexed items of the class
+        :type class_items: list
+        :return: True if the index entry is still valid
+        :rtype: bool
+        """
+        for class_item in class_items:
+            position = self.item_positions.get(class_item)
+            if position is None or position >= len(items) or items[position] is not class_item:
+                return False
+        return True
+
     def _collect_sibling_items(self, item: _pytest.nodes.Item) -> list:
         """
         Collect sibling items.
@@ -297,12 +2676,18 @@ class RerunClassPlugin:  # pylint: disable=too-few-public-methods
         :rtype: list
         """
         self.logger.debug("Collecting siblings for %s", item.nodeid)
-        siblings = [item]
         items = item.session.items
+        parent_class = item.getparent(pytest.Class)
+        class_items = self.class_index.get(parent_class)
+        if class_items is None or not self._is_class_index_valid(items, class_items):
+            # session.items was reordered (or never indexed) since the index was built
+            self._build_class_index(items)
+            class_items = self.class_index.get(parent_class, [item])
 
-        for i in items[items.index(item) + 1 :]:
-            if item.cls == i.cls:  # type: ignore
-                siblings.append(i)
+        try:
+            siblings = class_items[class_items.index(item) :]
+        except ValueError:  # item isn't part of session.items at all
+            siblings = [item]
         siblings.append(None)  # type: ignore
         self.logger.debug("Collected siblings: %s", len(siblings) - 1)
 
@@ -312,47 +2697,262 @@ class RerunClassPlugin:  # pylint: disable=too-few-public-methods
         """
         Save the parent initial state.
 
+        Values that can't be mutated in place (see ``_is_immutable``) are kept by reference instead of being
+        copied, so a class that passes on its first run pays nothing for them. Other values are first offered to
+        the ``pytest_rerunclass_snapshot_attribute`` hook, then saved with the snapshot backend.
+
         :param parent: pytest item
         :type parent: _pytest.Item
         :return: parent initial state
         :rtype: dict
         """
         self.logger.debug("Saving state of parent class %s", parent.name)
+        options = self._get_class_options(parent)
         obj = parent.obj
-        attrs = {}
-        for attr_name in dir(obj):
-            if (
-                not callable(getattr(obj, attr_name))
-                and not attr_name.startswith("__")
-                and not attr_name.startswith("___")
-                and attr_name != "pytestmark"
-            ):
-                attr_value = getattr(obj, attr_name)
-                try:
-                    attrs[attr_name] = deepcopy(attr_value)
-                except Exception as error:  # pylint: disable=broad-except
-                    # sometimes we can't deepcopy, in this case, store the value
-                    attrs[attr_name] = attr_value  # sometimes we can't deepcopy, in this case, create a link
-                    self.logger.debug("While saving state of parent class: can't deepcopy %s: %s", attr_name, error)
+        attrs = ClassSnapshot()
+        memo: dict = {}
+        snapshot_hook = parent.ihook.pytest_rerunclass_snapshot_attribute  # only the conftests in scope of the class
+        has_snapshot_hooks = bool(snapshot_hook.get_hookimpls())
+        for attr_name, owner in self._get_attribute_plan(obj).items():
+            attr_value = getattr(obj, attr_name)
+            if owner is not obj:
+                attrs.owners[attr_name] = owner
+            if _is_immutable(attr_value, self.immutable_types):
+                attrs[attr_name] = attr_value
+                attrs.by_reference.add(attr_name)
+                continue
+            fingerprint = _fingerprint(attr_value)
+            if fingerprint is not None:
+                attrs.fingerprints[attr_name] = fingerprint
+            saved = None
+            if has_snapshot_hooks:
+                saved = snapshot_hook(config=parent.config, cls=obj, name=attr_name, value=attr_value)
+            if saved is not None:
+                attrs[attr_name] = saved
+                attrs.encoded[attr_name] = "hook"
+            elif owner is obj:
+                self._save_attribute(attrs, attr_name, attr_value, options.snapshot_backend, memo)
+            else:
+                self._save_base_attribute(attrs, owner, attr_name, attr_value, options.snapshot_backend, memo)
         return attrs
 
+    def _get_attribute_plan(self, obj: type) -> dict:
+        """
+        Get the data attributes visible on a class, each with the class of its MRO that owns it.
+
+        Each class's own plan is computed once and cached for the session, so a base class shared by many test
+        classes is scanned once; it is recomputed only if the keys of that class's ``__dict__`` changed.
+
+        :param obj: python class
+        :type obj: type
+        :return: attribute name -> owner class, for every data attribute
+        :rtype: dict
+        """
+        if not isinstance(obj, type):  # not a real class, so there is no MRO to walk: scan the object directly
+            return {
+                attr_name: obj
+                for attr_name in dir(obj)
+                if not attr_name.startswith("__")
+                and attr_name != "pytestmark"
+                and not callable(getattr(obj, attr_name))
+            }
+        owners: dict = {}
+        seen: set = set()
+        for klass in obj.__mro__[:-1]:  # everything on object is a dunder
+            for attr_name, is_data in self._get_own_attribute_plan(klass).items():
+                if attr_name not in seen:
+                    seen.add(attr_name)
+                    if is_data:
+                        owners[attr_name] = klass
+        return owners
+
+    def _get_own_attribute_plan(self, klass: type) -> dict:
+        """
+        Get (from the cache if still valid) which attributes defined by a class itself are data attributes.
+
+        :param klass: python class
+        :type klass: type
+        :return: own attribute name -> True if it is a data (non-callable) attribute
+        :rtype: dict
+        """
+        keys = tuple(vars(klass))
+        cached = self.attribute_plans.get(klass)
+        if cached is not None and cached[0] == keys:
+            return cached[1]
+        plan = {
+            attr_name: not callable(getattr(klass, attr_name))
+            for attr_name in keys
+            if not attr_name.startswith("__") and attr_name != "pytestmark"
+        }
+        self.attribute_plans[klass] = (keys, plan)
+        return plan
+
+    def _save_base_attribute(  # pylint: disable=too-many-positional-arguments
+        self, attrs: ClassSnapshot, owner: type, attr_name: str, attr_value: Any, backend: str, memo: dict
+    ) -> None:
+        """
+        Save an attribute owned by a base class, reusing the copy saved for a previous subclass of the same base if
+        the attribute's content hasn't changed since, and unless this snapshot already copied it for another attribute.
+
+        :param attrs: snapshot being built
+        :type attrs: ClassSnapshot
+        :param owner: base class owning the attribute
+        :type owner: type
+        :param attr_name: attribute name
+        :type attr_name: str
+        :param attr_value: attribute value
+        :type attr_value: Any
+        :param backend: snapshot backend
+        :type backend: str
+        :param memo: deepcopy memo shared by the whole snapshot
+        :type memo: dict
+        :return: None
+        :rtype: None
+        """
+        if id(attr_value) in memo:  # already copied for an attribute aliasing it, which must keep sharing that copy
+            self._save_attribute(attrs, attr_name, attr_value, backend, memo)
+            return
+        key = (owner, attr_name, backend)
+        digest = _content_digest(attr_value)
+        cached = self.base_snapshots.get(key)
+        if digest is not None and cached is not None and cached[0] == digest:
+            self.logger.debug("Reusing saved state of %s.%s", owner.__name__, attr_name)
+            attrs[attr_name] = cached[1]
+            if cached[2]:
+                attrs.encoded[attr_name] = cached[2]
+            else:
+                memo[id(attr_value)] = cached[1]  # keep aliasing with other attributes copied in this snapshot
+            return
+        self._save_attribute(attrs, attr_name, attr_value, backend, memo)
+        if digest is not None and attrs[attr_name] is not attr_value:  # a plain reference can't be reused
+            self.base_snapshots[key] = (digest, attrs[attr_name], attrs.encoded.get(attr_name))
+
+    def _save_attribute(  # pylint: disable=too-many-positional-arguments
+        self, attrs: ClassSnapshot, attr_name: str, attr_value: Any, backend: str, memo: dict
+    ) -> None:
+        """
+        Save a single attribute with the given backend, falling back per attribute: marshal, pickle, deepcopy, and
+        finally a plain reference. A pickled value is loaded back once, so a value that can't be unpickled falls back
+        too instead of failing the restore.
+
+        :param attrs: snapshot being built
+        :type attrs: ClassSnapshot
+        :param attr_name: attribute name
+        :type attr_name: str
+        :param attr_value: attribute value
+        :type attr_value: Any
+        :param backend: snapshot backend to try first
+        :type backend: str
+        :param memo: deepcopy memo shared by the whole snapshot
+        :type memo: dict
+        :return: None
+        :rtype: None
+        """
+        if backend == "marshal":
+            try:
+                attrs[attr_name] = marshal.dumps(attr_value)
+                attrs.encoded[attr_name] = "marshal"
+                return
+            except ValueError as error:  # not a builtin type (or contains one)
+                self.logger.debug("While saving state of parent class: can't marshal %s: %s", attr_name, error)
+                backend = "pickle"
+        if backend == "pickle":
+            try:
+                dumped = pickle.dumps(attr_value, protocol=5)
+                pickle.loads(dumped)  # nosec B301 - some values pickle fine but can't be unpickled
+                attrs[attr_name] = dumped
+                attrs.encoded[attr_name] = "pickle"
+                return
+            except Exception as error:  # pylint: disable=broad-except
+                self.logger.debug("While saving state of parent class: can't pickle %s: %s", attr_name, error)
+        try:
+            attrs[attr_name] = _deepcopy_shared(attr_value, memo)
+        except Exception as error:  # pylint: disable=broad-except
+            # sometimes we can't deepcopy, in this case, store the value
+            attrs[attr_name] = attr_value  # sometimes we can't deepcopy, in this case, create a link
+            self.logger.debug("While saving state of parent class: can't deepcopy %s: %s", attr_name, error)
+
+    def _load_attribute(  # pylint: disable=too-many-positional-arguments
+        self, parent: pytest.Class, state: dict, attr_name: str, attr_value: Any, memo: dict
+    ) -> Any:
+        """
+        Produce a fresh copy of a saved attribute value.
+
+        :param parent: pytest class
+        :type parent: pytest.Class
+        :param state: parent initial state
+        :type state: dict
+        :param attr_name: attribute name
+        :type attr_name: str
+        :param attr_value: saved value (serialized bytes for an encoded attribute)
+        :type attr_value: Any
+        :param memo: deepcopy memo shared by the whole restore
+        :type memo: dict
+        :return: value to set on the class
+        :rtype: Any
+        """
+        encoding = getattr(state, "encoded", {}).get(attr_name)
+        if encoding == "marshal":
+            return marshal.loads(attr_value)  # nosec B302
+        if encoding == "pickle":
+            return pickle.loads(attr_value)  # nosec B301
+        if encoding == "hook":
+            restored_value = parent.ihook.pytest_rerunclass_restore_attribute(
+                config=parent.config,
+                cls=parent.obj,
+                name=attr_name,
+                value=getattr(parent.obj, attr_name, None),
+                saved=attr_value,
+            )
+            if restored_value is not None:
+                return restored_value
+        try:
+            return _deepcopy_shared(attr_value, memo)
+        except Exception as error:  # pylint: disable=broad-except
+            # sometimes we can't deepcopy, in this case, store the value
+            self.logger.debug("While loading state of parent class: can't deepcopy %s: %s", attr_name, error)
+            return attr_value
+
     def _set_parent_initial_state(self, parent: pytest.Class, state: dict) -> pytest.Class:
         """
         Set the parent initial state.
 
+        Immutable attributes are written back with a plain setattr, and fingerprinted attributes are only written
+        back if their fingerprint changed.
+
         :param parent: pytest class
         :type parent: pytest.Class
         :param state: parent initial state
         :type state: dict
         """
         self.logger.debug("Loading state of parent class %s", parent.name)
+        by_reference = getattr(state, "by_reference", ())
+        fingerprints = getattr(state, "fingerprints", {})
+        owners = getattr(state, "owners", {})
+        memo: dict = {}
+        to_restore = []
+        skipped = 0
         for attr_name, attr_value in state.items():
-            try:
-                setattr(parent.obj, attr_name, deepcopy(attr_value))
-            except Exception as error:  # pylint: disable=broad-except
-                # sometimes we can't deepcopy, in this case, store the value
-                setattr(parent.obj, attr_name, attr_value)
-                self.logger.debug("While loading state of parent class: can't deepcopy %s: %s", attr_name, error)
+            owner = owners.get(attr_name, parent.obj)
+            if owner is not parent.obj and attr_name in vars(parent.obj):
+                delattr(parent.obj, attr_name)  # drop a binding the run made on the class, shadowing its base's one
+            current_value = getattr(parent.obj, attr_name, _MISSING)
+            if attr_name in by_reference:
+                setattr(owner, attr_name, attr_value)
+            elif attr_name in fingerprints and _fingerprint(current_value) == fingerprints[attr_name]:
+                # anything restored below that shared this object must keep sharing the live, unchanged one
+                memo[id(attr_value)] = current_value
+                skipped += 1
+            else:
+                to_restore.append((owner, attr_name, attr_value))
+        for owner, attr_name, attr_value in to_restore:
+            restored_value = self._load_attribute(parent, state, attr_name, attr_value, memo)
+            setattr(owner, attr_name, restored_value)
+            if attr_name in fingerprints:  # the class now holds a new object, so the next check must compare to it
+                fingerprints[attr_name] = _fingerprint(restored_value)
+        self.logger.debug(
+            "Restored %s attribute(s) of %s, skipped %s unchanged", len(state) - skipped, parent.name, skipped
+        )
         return parent
 
     def _remove_non_initial_attributes(self, parent: pytest.Class, initial_state: dict) -> None:
@@ -373,18 +2973,12 @@ class RerunClassPlugin:  # pylint: disable=too-few-public-methods
         :rtype: None
         """
         self.logger.debug("Removing non-default attributes from %s", parent.name)
-        for attr_name in dir(parent.obj):
-            if (
-                not callable(getattr(parent.obj, attr_name))
-                and not attr_name.startswith("__")
-                and not attr_name.startswith("___")
-                and attr_name != "pytestmark"
-                and attr_name not in initial_state
-            ):
+        for attr_name, owner in self._get_attribute_plan(parent.obj).items():
+            if attr_name not in initial_state:
                 self.logger.debug("Removing non-default attribute %s from %s", attr_name, parent.name)
-                delattr(parent.obj, attr_name)
+                delattr(owner, attr_name)
 
-    def _recreate_test_class(self, test_class: pytest.Class, siblings: list, initial_state: dict) -> tuple:
+    def _recreate_test_class(self, test_class: pytest.Class, siblings: list, initial_state: Optional[dict]) -> tuple:
         """
         Recreate the test class.
 
@@ -392,8 +2986,8 @@ class RerunClassPlugin:  # pylint: disable=too-few-public-methods
         :type test_class: pytest.Class
         :param siblings: list of siblings
         :type siblings: list
-        :param initial_state: parent initial state
-        :type initial_state: dict
+        :param initial_state: parent initial state, None to keep the class attributes as they are
+        :type initial_state: Optional[dict]
         :return: test_class and siblings
         :rtype: tuple
         """
@@ -402,9 +2996,10 @@ class RerunClassPlugin:  # pylint: disable=too-few-public-methods
         if hasattr(test_class, "_previousfailed"):
             delattr(test_class, "_previousfailed")
 
-        self._remove_non_initial_attributes(test_class, initial_state)
-        # Load the original test class from the pytest Class object and propagate to the siblings
-        self._set_parent_initial_state(test_class, initial_state)
+        if initial_state is not None:
+            self._remove_non_initial_attributes(test_class, initial_state)
+            # Load the original test class from the pytest Class object and propagate to the siblings
+            self._set_parent_initial_state(test_class, initial_state)
         for i in range(len(siblings) - 1):
             siblings[i].parent = test_class
             # Drop the memoized bound instance/method (Function._instance / Function._obj) so
@@ -435,10 +3030,21 @@ class RerunClassPlugin:  # pylint: disable=too-few-public-methods
             else:
                 for rerun_index, rerun in enumerate(reruns):
                     if rerun_index < max_reruns - 1:
-                        for report in rerun:
-                            dummy_report = self._check_and_add_dummy_rerun_if_needed(report)
-                            rerun.append(dummy_report) if dummy_report else None  # pylint: disable=W0106
-                            report.outcome = "rerun"
+                        self._mark_rerun_reports(rerun)
+
+    def _mark_rerun_reports(self, rerun: list) -> None:
+        """
+        Mark the reports of an earlier attempt of a test as reruns.
+
+        :param rerun: reports of the test for the attempt
+        :type rerun: list
+        :return: None
+        :rtype: None
+        """
+        for report in rerun:
+            dummy_report = self._check_and_add_dummy_rerun_if_needed(report)
+            rerun.append(dummy_report) if dummy_report else None  # pylint: disable=W0106
+            report.outcome = "rerun"
 
     def _check_and_add_dummy_rerun_if_needed(self, report: TestReport) -> Union[None, TestReport]:
         """
@@ -501,7 +3107,8 @@ class RerunClassPlugin:  # pylint: disable=too-few-public-methods
         self, terminalreporter: TerminalReporter, exitstatus: int, config: Config  # pylint: disable=unused-argument
     ) -> None:
         """
-        Reports reruns section to terminal.
+        Reports reruns section to terminal, and the classes that weren't rerun again: for lack of budget, because
+        they failed the same way every time or because the circuit breaker was open.
 
         :param terminalreporter: pytest terminal reporter
         :type terminalreporter: _pytest.terminal.TerminalReporter
@@ -512,6 +3119,12 @@ class RerunClassPlugin:  # pylint: disable=too-few-public-methods
         :return: None
         :rtype: None
         """
+        for name, title in RERUNS_STOPPED_SECTIONS.items():
+            if name in self.reruns_stopped:
+                terminalreporter._tw.sep("=", title)  # pylint: disable=W0212
+                for class_nodeid, reason in self.reruns_stopped[name].items():
+                    terminalreporter._tw.line(f"NOT RERUN {class_nodeid}: {reason}")  # pylint: disable=W0212
+
         if "rerun" not in terminalreporter.stats or self.hide_terminal_output:
             self.logger.debug("Skipping passing reruns section to terminal, because no reruns or hiding rerun details")
             return
@@ -532,6 +3145,11 @@ class RerunClassPlugin:  # pylint: disable=too-few-public-methods
                     if rerun_test.longrepr:
                         terminalreporter._tw.line(str(rerun_test.longrepr))  # pylint: disable=W0212
 
+        if self.registry.rerun_classes:
+            terminalreporter._tw.line(  # pylint: disable=W0212
+                f"{self.registry.rerun_classes} class(es) rerun, {self.registry.reruns} rerun(s) in total"
+            )
+
 
 def _emit_config_warning(config: Config, message: str) -> None:
     """
@@ -563,6 +3181,16 @@ def pytest_configure(config: Config) -> None:
     :return: None
     :rtype: None
     """
+    config.addinivalue_line(
+        "markers",
+        "rerun_class_checkpoint: with --rerun-class-resume=checkpoint, a rerun of the class resumes from this test "
+        "(the last one marked before the failed test), with the class attributes saved right before it ran",
+    )
+    config.addinivalue_line(
+        "markers",
+        "rerun_class(**options): override pytest-rerunclassfailures options for this class "
+        f"(allowed: {', '.join(CLASS_MARKER_OPTIONS)})",
+    )
     if config.getoption("--rerun-class-max") != 0:
         if config.pluginmanager.has_plugin("rerunfailures") and not config.getoption("--allow-rerunfailures"):
             _emit_config_warning(
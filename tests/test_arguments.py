@@ -1,9 +1,10 @@
 """Test against the different command-line arguments passed to the plugin."""
 
+import json
 from os import environ, pathsep
 from os.path import abspath
 from random import randint, choice
-from re import findall
+from re import findall, match, sub
 from subprocess import check_output, STDOUT, CalledProcessError
 
 import pytest
@@ -317,3 +318,507 @@ def test_arguments_rerun_section_hidden_no_data(run_tests_with_plugin):  # pylin
     assert output.count("    assert False") == 0
     assert output.count("E   assert False") == 0
     assert " 1 passed in " in output
+
+
+@pytest.mark.parametrize("args", [[], ["-n", "2", "--dist", "loadscope"]], ids=["sequential", "xdist"])
+def test_arguments_rerun_class_defer(run_tests_with_plugin, args, tmp_path):  # pylint: disable=W0621
+    """
+    Test that failed classes are rerun at the end of the session with --rerun-class-defer, from their saved state,
+    sharing one rerun delay, and that deferring is refused when pytest-xdist distributes the tests.
+
+    :param run_tests_with_plugin: fixture to run pytest with the plugin
+    :type run_tests_with_plugin: function
+    :param args: extra pytest arguments
+    :type args: list
+    :param tmp_path: temporary directory for the JUnit XML report
+    :type tmp_path: pathlib.Path
+    :return: none
+    """
+    junitxml = tmp_path / "report.xml"
+    options = ["--rerun-class-max=1", "--rerun-class-defer", "--rerun-delay=0.5", f"--junitxml={junitxml}", "-v"]
+    error_code, output = run_tests_with_plugin("tests/test_source/test_deferred_class.py", options + args)
+    if args:
+        assert error_code == 4
+        assert "defer can't be used when pytest-xdist distributes the tests" in output
+        assert "INTERNALERROR" not in output
+        return
+    assert error_code == 0
+    assert " 4 passed, 3 rerun in " in output
+    results = findall(r"::(\w+) (PASSED|RERUN)", output)
+    assert results[0] == ("test_deferred_second", "PASSED")  # the passing class is reported before the deferred ones
+    assert results[1:] == [
+        ("test_deferred_first_mutate", "RERUN"),
+        ("test_deferred_first_mutate", "PASSED"),
+        ("test_deferred_first_flaky", "RERUN"),
+        ("test_deferred_first_flaky", "PASSED"),
+        ("test_deferred_third_flaky", "RERUN"),
+        ("test_deferred_third_flaky", "PASSED"),
+    ]
+    delays = dict(
+        findall(
+            r'name="(\w+)" time="[\d.]+"><properties><property name="rerun_class_delay" value="([\d.e-]+)"',
+            junitxml.read_text(),
+        )
+    )
+    assert 0.5 <= float(delays["test_deferred_first_flaky"]) < 1  # the first class waits for the shared delay
+    assert float(delays["test_deferred_third_flaky"]) < 0.25  # the last one has already waited for it
+
+
+def test_arguments_rerun_class_defer_maxfail(run_tests_with_plugin):  # pylint: disable=W0621
+    """
+    Test that a deferred class isn't rerun once --maxfail stops the session, but the reports of its first attempt
+    are still logged.
+
+    :param run_tests_with_plugin: fixture to run pytest with the plugin
+    :type run_tests_with_plugin: function
+    :return: none
+    """
+    args = ["--rerun-class-max=1", "--rerun-class-defer", "--rerun-delay=0", "--maxfail=1", "-v"]
+    error_code, output = run_tests_with_plugin("tests/test_source/test_deferred_maxfail.py", args)
+    assert error_code == 1
+    assert "stopping after 2 failures" in output  # the deferred failure is logged after --maxfail was reached
+    assert " 2 failed, 1 passed in " in output
+    assert "RERUN" not in output
+    assert findall(r"::(\w+) (PASSED|FAILED)", output) == [
+        ("test_standalone_fail", "FAILED"),
+        ("test_deferred_maxfail_pass", "PASSED"),
+        ("test_deferred_maxfail_fail", "FAILED"),
+    ]
+
+
+@pytest.mark.parametrize(
+    "filters, reruns",
+    [
+        ([], 4),
+        (["--rerun-class-only-on=OSError"], 2),
+        (["--rerun-class-only-on=builtins.ConnectionResetError", "--rerun-class-only-on=reset by peer"], 2),
+        (["--rerun-class-except=AssertionError"], 2),
+    ],
+)
+def test_arguments_rerun_class_filters(run_tests_with_plugin, filters, reruns):  # pylint: disable=W0621
+    """
+    Test that classes are rerun only if their failure matches the only_on patterns and none of the except_on ones.
+
+    :param run_tests_with_plugin: fixture to run pytest with the plugin
+    :type run_tests_with_plugin: function
+    :param filters: failure filter options
+    :type filters: list
+    :param reruns: expected number of reruns
+    :type reruns: int
+    :return: none
+    """
+    args = ["--rerun-class-max=2", "--rerun-delay=0"] + filters
+    error_code, output = run_tests_with_plugin("tests/test_source/test_rerun_filters.py", args)
+    assert error_code == 1
+    assert f" 1 failed, 2 passed, {reruns} rerun in " in output
+
+
+def test_arguments_rerun_class_same_failure_max(run_tests_with_plugin):  # pylint: disable=W0621
+    """
+    Test that a class failing the same way in consecutive attempts isn't rerun again, and that the terminal summary
+    lists it.
+
+    :param run_tests_with_plugin: fixture to run pytest with the plugin
+    :type run_tests_with_plugin: function
+    :return: none
+    """
+    test_path = "tests/test_source/test_same_failure.py"
+    args = ["--rerun-class-max=4", "--rerun-delay=0"]
+    error_code, output = run_tests_with_plugin(test_path, args)
+    assert error_code == 1
+    assert " 2 failed, 8 rerun in " in output
+    assert "= RERUNS ABANDONED =" not in output
+
+    error_code, output = run_tests_with_plugin(test_path, args + ["--rerun-class-same-failure-max=2"])
+    assert error_code == 1
+    assert " 2 failed, 5 rerun in " in output
+    assert "= RERUNS ABANDONED =" in output
+    assert (
+        "NOT RERUN tests/test_source/test_same_failure.py::TestDeterministic: deterministic failure, reruns abandoned"
+        in output
+    )
+    assert "NOT RERUN tests/test_source/test_same_failure.py::TestChangingFailure" not in output
+
+
+@pytest.mark.parametrize(
+    "breaker, summary, not_rerun",
+    [
+        ([], " 3 failed, 1 passed, 7 rerun in ", []),
+        (["--rerun-class-breaker-failures=2"], " 4 failed, 4 rerun in ", ["TestOutageThird", "TestAfterOutage"]),
+        (
+            ["--rerun-class-breaker-rate=0.5", "--rerun-class-breaker-window=2"],
+            " 4 failed, 4 rerun in ",
+            ["TestOutageThird", "TestAfterOutage"],
+        ),
+        (
+            ["--rerun-class-breaker-failures=2", "--rerun-class-breaker-cooldown=0"],
+            " 3 failed, 1 passed, 7 rerun in ",
+            [],
+        ),
+    ],
+)
+def test_arguments_rerun_class_breaker(run_tests_with_plugin, breaker, summary, not_rerun):  # pylint: disable=W0621
+    """
+    Test that the circuit breaker stops the reruns once rerun classes keep failing, and resumes them with a probe
+    class after its cooldown.
+
+    :param run_tests_with_plugin: fixture to run pytest with the plugin
+    :type run_tests_with_plugin: function
+    :param breaker: circuit breaker options
+    :type breaker: list
+    :param summary: expected test summary
+    :type summary: str
+    :param not_rerun: classes expected not to be rerun because of the open breaker
+    :type not_rerun: list
+    :return: none
+    """
+    args = ["--rerun-class-max=2", "--rerun-delay=0", "--hide-rerun-details"] + breaker
+    error_code, output = run_tests_with_plugin("tests/test_source/test_circuit_breaker.py", args)
+    assert error_code == 1
+    assert summary in output
+    assert ("= RERUN CIRCUIT BREAKER OPEN =" in output) == bool(not_rerun)
+    for class_name in not_rerun:
+        assert (
+            f"NOT RERUN tests/test_source/test_circuit_breaker.py::{class_name}: rerun circuit breaker open" in output
+        )
+
+
+def test_arguments_rerun_class_adaptive(run_tests_with_plugin, tmp_path):  # pylint: disable=W0621
+    """
+    Test that the rerun history of the classes is kept in the pytest cache, and that --rerun-class-adaptive gives
+    a class as many reruns as it once needed, and none once it never recovered in several sessions.
+
+    :param run_tests_with_plugin: fixture to run pytest with the plugin
+    :type run_tests_with_plugin: function
+    :param tmp_path: temporary directory
+    :type tmp_path: pathlib.Path
+    :return: none
+    """
+    test_path = "tests/test_source/test_rerun_history.py"
+    args = ["--rerun-delay=0", "--hide-rerun-details", "-o", f"cache_dir={tmp_path}"]
+    expected = [
+        ("--rerun-class-max=3", " 1 failed, 1 passed, 6 rerun in "),
+        ("--rerun-class-max=1", " 1 failed, 1 passed, 4 rerun in "),  # the class once needed 3 reruns to pass
+        ("--rerun-class-max=1", " 1 failed, 1 passed, 4 rerun in "),
+        ("--rerun-class-max=1", " 1 failed, 1 passed, 3 rerun in "),  # never recovered in 3 sessions
+    ]
+    for rerun_max, summary in expected:
+        error_code, output = run_tests_with_plugin(test_path, args + [rerun_max, "--rerun-class-adaptive"])
+        assert error_code == 1
+        assert summary in output
+
+    history = json.loads((tmp_path / "v" / "rerunclassfailures" / "history").read_text())
+    never_recovers = history["tests/test_source/test_rerun_history.py::TestNeverRecovers"]
+    assert never_recovers["sessions"] == never_recovers["failed_first"] == 4
+    assert never_recovers["recovered"] == 0
+    assert never_recovers["passed_on"] == {}
+    needs_three_reruns = history["tests/test_source/test_rerun_history.py::TestNeedsThreeReruns"]
+    assert needs_three_reruns["sessions"] == needs_three_reruns["recovered"] == 4
+    assert needs_three_reruns["passed_on"] == {"3": 4}
+    assert needs_three_reruns["duration"] >= 0
+
+    junitxml = tmp_path / "report.xml"
+    error_code, output = run_tests_with_plugin(
+        test_path, args + ["--rerun-class-max=1", "--rerun-class-history", f"--junitxml={junitxml}"]
+    )
+    assert error_code == 1
+    assert " 2 failed, 2 rerun in " in output  # the history is recorded, but not used without --rerun-class-adaptive
+    assert "rerun_class_history" not in junitxml.read_text()
+
+
+def test_arguments_rerun_class_flaky_first(run_tests_with_plugin, tmp_path):  # pylint: disable=W0621
+    """
+    Test that --rerun-class-flaky-first runs the classes that recovered on a rerun in past sessions first, keeping
+    their tests together and in order, and the rest of the session in its order.
+
+    :param run_tests_with_plugin: fixture to run pytest with the plugin
+    :type run_tests_with_plugin: function
+    :param tmp_path: temporary directory
+    :type tmp_path: pathlib.Path
+    :return: none
+    """
+    test_path = "tests/test_source/test_flaky_first.py"
+    args = ["--rerun-class-max=1", "--rerun-delay=0", "--rerun-class-flaky-first", "-v", "-o", f"cache_dir={tmp_path}"]
+    order = []
+    for _ in range(2):
+        error_code, output = run_tests_with_plugin(test_path, args)
+        assert error_code == 0
+        assert " 5 passed, 2 rerun in " in output
+        order.append(list(dict.fromkeys(findall(r"::(\w+) (?:PASSED|RERUN)", output))))
+    assert order[0] == [  # no history yet
+        "test_module_level",
+        "test_stable_first",
+        "test_flaky_step_one",
+        "test_flaky_step_two",
+        "test_stable_last",
+    ]
+    assert order[1] == [
+        "test_flaky_step_one",
+        "test_flaky_step_two",
+        "test_module_level",
+        "test_stable_first",
+        "test_stable_last",
+    ]
+
+
+@pytest.mark.parametrize(
+    "args, summary",
+    [
+        (["--rerun-class-max=2"], " 1 failed, 3 passed, 1 skipped, 6 rerun in "),
+        (["--rerun-class-max=2", "--rerun-class-probe"], " 1 failed, 3 passed, 1 skipped, 4 rerun in "),
+        (["--rerun-class-max=1", "--rerun-class-probe"], " 1 failed, 3 passed, 1 skipped, 4 rerun in "),
+    ],
+)
+def test_arguments_rerun_class_probe(run_tests_with_plugin, args, summary):  # pylint: disable=W0621
+    """
+    Test that --rerun-class-probe fails a class whose failed test fails the same way when rerun alone, and reruns
+    the whole class otherwise, the probe not counting as a rerun.
+
+    :param run_tests_with_plugin: fixture to run pytest with the plugin
+    :type run_tests_with_plugin: function
+    :param args: rerun options
+    :type args: list
+    :param summary: expected test summary
+    :type summary: str
+    :return: none
+    """
+    error_code, output = run_tests_with_plugin("tests/test_source/test_probe.py", args + ["--rerun-delay=0", "-v"])
+    assert error_code == 1
+    assert summary in output
+    assert "::TestOrderDependentProbed::test_use_prepared PASSED" in output
+
+
+def test_arguments_rerun_class_probe_budget_and_breaker(run_tests_with_plugin):  # pylint: disable=W0621
+    """
+    Test that the time of a probe is charged to the rerun budgets, and that a class failing its probe counts as a
+    failed rerun class for the circuit breaker.
+
+    :param run_tests_with_plugin: fixture to run pytest with the plugin
+    :type run_tests_with_plugin: function
+    :return: none
+    """
+    args = ["--rerun-class-max=2", "--rerun-delay=0", "--rerun-class-probe"]
+    error_code, output = run_tests_with_plugin(
+        "tests/test_source/test_probe_budget.py", args + ["--rerun-class-budget=1.8"]
+    )
+    assert error_code == 1
+    assert " 1 failed, 1 rerun in " in output  # the probe only, no room left for a rerun of the whole class
+    assert "NOT RERUN tests/test_source/test_probe_budget.py::TestSlowProbe: session rerun budget of 1.8s" in output
+
+    error_code, output = run_tests_with_plugin(
+        "tests/test_source/test_probe.py", args + ["--rerun-class-breaker-failures=1"]
+    )
+    assert error_code == 1
+    assert " 2 failed, 2 passed, 1 skipped, 1 rerun in " in output
+    assert "NOT RERUN tests/test_source/test_probe.py::TestOrderDependentProbed: rerun circuit breaker open" in output
+
+
+def test_arguments_nested_classes_same_name(run_tests_with_plugin):  # pylint: disable=W0621
+    """
+    Test that nested classes with the same name in one module are run and rerun as distinct classes.
+
+    :param run_tests_with_plugin: fixture to run pytest with the plugin
+    :type run_tests_with_plugin: function
+    :return: none
+    """
+    test_path = "tests/test_source/test_nested_same_name.py"
+    error_code, output = run_tests_with_plugin(test_path, ["--rerun-class-max=1", "--rerun-delay=0", "-v"])
+    assert error_code == 0
+    assert " 3 passed, 1 rerun in " in output
+    assert "::TestSecondOuter::TestInner::test_second_inner PASSED" in output
+
+
+def test_arguments_rerun_class_not_streamed(run_tests_with_plugin):  # pylint: disable=W0621
+    """
+    Test that without --rerun-class-stream, no test of a class is reported before the whole class is done.
+
+    :param run_tests_with_plugin: fixture to run pytest with the plugin
+    :type run_tests_with_plugin: function
+    :return: none
+    """
+    error_code, output = run_tests_with_plugin(
+        "tests/test_source/streaming_scenario", ["--rerun-class-max=1", "--rerun-delay=0"]
+    )
+    assert error_code == 1
+    assert " 2 failed, 2 passed, 1 skipped, " in output
+
+
+@pytest.mark.parametrize("args", [[], ["-n", "2", "--dist", "loadscope"]], ids=["sequential", "xdist"])
+def test_arguments_rerun_class_stream(run_tests_with_plugin, args):  # pylint: disable=W0621
+    """
+    Test that --rerun-class-stream reports each passed test of the first attempt of a class before the next one runs,
+    and reruns the whole class from its start once a test fails, with a notice of how the tests already reported did
+    in that rerun; and that it can't be combined with the fork snapshot mode.
+
+    :param run_tests_with_plugin: fixture to run pytest with the plugin
+    :type run_tests_with_plugin: function
+    :param args: extra pytest arguments
+    :type args: list
+    :return: none
+    """
+    test_path = "tests/test_source/streaming_scenario"
+    options = ["--rerun-class-stream", "--rerun-class-max=1", "--rerun-delay=0", "-rA"]
+    error_code, output = run_tests_with_plugin(test_path, options + args)
+    assert error_code == 0
+    assert " 5 passed, 1 rerun in " in output
+    assert "rerun notice" in output
+    assert "::TestStreamedFlaky::test_streamed_before_failure: passed" in output
+
+    error_code, output = run_tests_with_plugin(test_path, options + args + ["--rerun-class-snapshot=fork"])
+    assert error_code == 4
+    assert "stream can't be used with the 'fork' snapshot mode" in output
+
+
+def test_arguments_rerun_class_stream_defer(run_tests_with_plugin):  # pylint: disable=W0621
+    """
+    Test that --rerun-class-stream can't be combined with --rerun-class-defer, which would report the tests already
+    streamed as passed again with the deferred reruns.
+
+    :param run_tests_with_plugin: fixture to run pytest with the plugin
+    :type run_tests_with_plugin: function
+    :return: none
+    """
+    args = ["--rerun-class-stream", "--rerun-class-defer", "--rerun-class-max=1", "--rerun-delay=0"]
+    error_code, output = run_tests_with_plugin("tests/test_source/streaming_scenario", args)
+    assert error_code == 4
+    assert "defer can't be used with stream" in output
+
+
+@pytest.mark.parametrize("keep, compacted", [("all", 0), ("first-last", 1), ("last", 2), ("none", 3)])
+def test_arguments_rerun_class_keep_artifacts(run_tests_with_plugin, keep, compacted):  # pylint: disable=W0621
+    """
+    Test that the reports of the attempts outside --rerun-class-keep-artifacts are reduced to a compact summary of
+    their failure, and that --rerun-class-artifact-max-size caps the captured output of the others.
+
+    :param run_tests_with_plugin: fixture to run pytest with the plugin
+    :type run_tests_with_plugin: function
+    :param keep: attempts keeping their full reports
+    :type keep: str
+    :param compacted: number of reports expected to be compacted, the final one included
+    :type compacted: int
+    :return: none
+    """
+    args = [
+        "--rerun-class-max=2",
+        "--rerun-delay=0",
+        f"--rerun-class-keep-artifacts={keep}",
+        "--rerun-class-artifact-max-size=100",
+    ]
+    error_code, output = run_tests_with_plugin("tests/test_source/test_large_output.py", args)
+    assert error_code == 1
+    assert "1 failed, 2 rerun in " in output
+    assert output.count("\nAssertionError: assert False (") == compacted
+    assert "x" * 101 not in output
+    assert ("... (901 more characters truncated)" in output) is (keep != "none")
+
+
+@pytest.mark.parametrize("args", [[], ["-n", "2", "--dist", "loadscope"]], ids=["sequential", "xdist"])
+def test_arguments_rerun_class_memory_budget(run_tests_with_plugin, args):  # pylint: disable=W0621
+    """
+    Test that spilling the reports of earlier attempts above --rerun-class-memory-budget to a temporary file doesn't
+    change what is reported.
+
+    :param run_tests_with_plugin: fixture to run pytest with the plugin
+    :type run_tests_with_plugin: function
+    :param args: extra pytest arguments
+    :type args: list
+    :return: none
+    """
+    outputs = []
+    for budget in ([], ["--rerun-class-memory-budget=0"]):
+        options = ["--rerun-class-max=2", "--rerun-delay=0", "-rA"] + budget + args
+        error_code, output = run_tests_with_plugin("tests/test_source/test_failed_on_second_run.py", options)
+        summary = findall(r"=+ (.*) in [\d.]+s", output)
+        # the padding of separator lines depends on the session duration, and worker ids may change between runs
+        lines = [line for line in sub(r"\[gw\d\] ", "", output).splitlines() if not match(r"[=_]+ .* [=_]+$", line)]
+        outputs.append((error_code, summary, sorted(lines)))
+    assert outputs[0] == outputs[1]
+    assert outputs[1][:2] == (1, ["1 failed, 1 passed, 5 rerun"])
+
+
+def test_arguments_rerun_delay_policy(run_tests_with_plugin, tmp_path):  # pylint: disable=W0621
+    """
+    Test that the delay waited before each rerun follows --rerun-delay-policy and --rerun-delay-max, and is
+    recorded in the reports of the rerun (as a rerun_class_delay user property, e.g. in the JUnit XML report).
+
+    :param run_tests_with_plugin: fixture to run pytest with the plugin
+    :type run_tests_with_plugin: function
+    :param tmp_path: temporary directory for the JUnit XML report
+    :type tmp_path: pathlib.Path
+    :return: none
+    """
+    junitxml = tmp_path / "report.xml"
+    args = [
+        "--rerun-class-max=3",
+        "--rerun-delay=0.01",
+        "--rerun-delay-policy=exponential",
+        "--rerun-delay-max=0.03",
+        f"--junitxml={junitxml}",
+    ]
+    error_code, output = run_tests_with_plugin("tests/test_source/test_always_fails.py", args)
+    assert error_code == 1
+    assert "1 failed, 3 rerun in " in output
+    delays = findall(r'<property name="rerun_class_delay" value="([\d.e-]+)" />', junitxml.read_text())
+    assert len(delays) == 3
+    for delay, expected in zip(delays, [0.01, 0.02, 0.03]):
+        assert expected <= float(delay) < expected + 0.05  # the time actually slept, at least the policy's delay
+
+
+def test_arguments_rerun_ready_probe(run_tests_with_plugin):  # pylint: disable=W0621
+    """
+    Test that a class is rerun as soon as its pytest_rerunclass_ready probe is ready instead of after the rerun
+    delay, and once the ready timeout expires if it never is.
+
+    :param run_tests_with_plugin: fixture to run pytest with the plugin
+    :type run_tests_with_plugin: function
+    :return: none
+    """
+    test_path = "tests/test_source/ready_probe_scenario/test_ready_probe.py"
+    args = ["--rerun-class-max=1", "--rerun-delay=600", "--rerun-ready-interval=0.01", "--rerun-ready-timeout=0.5"]
+    error_code, output = run_tests_with_plugin(test_path, args)
+    assert error_code == 0
+    assert " 2 passed, 2 rerun in " in output
+    assert float(findall(r" rerun in ([\d.]+)s", output)[0]) < 60  # neither class waited for the rerun delay
+
+
+def test_arguments_rerun_hooks_conftest_scope(run_tests_with_plugin):  # pylint: disable=W0621
+    """
+    Test that the snapshot and ready hooks of a conftest.py only apply to the classes under its directory.
+
+    :param run_tests_with_plugin: fixture to run pytest with the plugin
+    :type run_tests_with_plugin: function
+    :return: none
+    """
+    test_path = "tests/test_source/hook_scope_scenario"
+    args = ["--rerun-class-max=1", "--rerun-delay=0", "--rerun-ready-timeout=60"]
+    error_code, output = run_tests_with_plugin(test_path, args)
+    assert error_code == 0
+    assert "INTERNALERROR" not in output
+    assert " 3 passed, 2 rerun in " in output
+    assert float(findall(r" rerun in ([\d.]+)s", output)[0]) < 30  # b/ didn't wait on the ready probe of a/
+
+
+def test_arguments_rerun_class_budget(run_tests_with_plugin):  # pylint: disable=W0621
+    """
+    Test that classes aren't rerun again once the session or class rerun budget can't fit one more attempt, and that
+    the terminal summary lists them.
+
+    :param run_tests_with_plugin: fixture to run pytest with the plugin
+    :type run_tests_with_plugin: function
+    :return: none
+    """
+    test_path = "tests/test_source/test_rerun_budget.py"
+    args = ["--rerun-class-max=5", "--rerun-delay=0", "--hide-rerun-details"]
+    error_code, output = run_tests_with_plugin(test_path, args)
+    assert error_code == 1
+    assert " 2 failed, 5 rerun in " in output  # only the marker's class budget applies
+    assert "= RERUN BUDGET EXHAUSTED =" in output
+    assert "NOT RERUN tests/test_source/test_rerun_budget.py::TestClassBudget: class rerun budget of 0.1s" in output
+    assert "NOT RERUN tests/test_source/test_rerun_budget.py::TestSessionBudget" not in output
+
+    error_code, output = run_tests_with_plugin(test_path, args + ["--rerun-class-budget=0.15"])
+    assert error_code == 1
+    assert " 2 failed in " in output
+    assert (
+        "NOT RERUN tests/test_source/test_rerun_budget.py::TestSessionBudget: session rerun budget of 0.15s" in output
+    )
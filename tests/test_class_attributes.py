@@ -1,5 +1,9 @@
 """This test checks that the plugin correctly handles a class attributes and fixtures"""
 
+import os
+
+import pytest
+
 
 def test_class_attributes_non_init(run_default_tests):  # pylint: disable=W0613
     """
@@ -184,3 +188,128 @@ def test_class_attributes_unpickable(run_default_tests):  # pylint: disable=W061
     assert "test_unpickleable_attributes_initial PASSED [ 33%]" in output
     assert "test_unpickleable_attributes_changed PASSED [ 66%]" in output
     assert "test_unpickleable_attributes_fail FAILED [100%]" in output
+
+
+@pytest.mark.parametrize(
+    "snapshot_args",
+    [
+        "--rerun-class-snapshot=eager",
+        "--rerun-class-snapshot-backend=pickle",
+        "--rerun-class-snapshot-backend=marshal",
+        "-o rerun_class_snapshot_backend=pickle",
+    ],
+)
+def test_class_attributes_restored_per_snapshot_mode(run_default_tests, snapshot_args):  # pylint: disable=W0613
+    """
+    This test check that rebound and mutated class attributes are restored whatever the snapshot mode is
+
+    :param run_default_tests: fixture to run pytest with the plugin and default arguments
+    :type run_default_tests: function
+    :param snapshot_args: snapshot mode/backend arguments
+    :type snapshot_args: str
+    """
+    return_code, output = run_default_tests("tests/test_source/test_class_state_restored.py", snapshot_args)
+    assert return_code == 0
+    assert output.count("RERUN") == 2
+    assert " 2 passed, 2 rerun in " in output
+
+
+def test_class_attributes_invalid_class_marker(run_default_tests):  # pylint: disable=W0613
+    """
+    This test check that an invalid rerun_class marker is reported as a usage error before any test runs
+
+    :param run_default_tests: fixture to run pytest with the plugin and default arguments
+    :type run_default_tests: function
+    """
+    return_code, output = run_default_tests("tests/test_source/test_invalid_class_marker.py")
+    assert return_code == 4
+    assert (
+        "invalid rerun_class marker on tests/test_source/test_invalid_class_marker.py::TestInvalidClassMarker" in output
+    )
+
+
+def test_class_attributes_shared_base_class(run_default_tests):  # pylint: disable=W0613
+    """
+    This test check that base class data shared by several test classes is restored to its state at the start of
+    the class being rerun, even though snapshots of base class data are reused between subclasses
+
+    :param run_default_tests: fixture to run pytest with the plugin and default arguments
+    :type run_default_tests: function
+    """
+    return_code, output = run_default_tests("tests/test_source/test_base_class_attributes.py")
+    assert return_code == 0
+    assert output.count("RERUN") == 4
+    assert " 4 passed, 4 rerun in " in output
+
+
+def test_class_attributes_snapshot_hooks(run_default_tests):  # pylint: disable=W0613
+    """
+    This test check that class attributes are saved and restored by the snapshot hooks implemented in a conftest
+    (an in-memory sqlite connection, which can't be deep-copied)
+
+    :param run_default_tests: fixture to run pytest with the plugin and default arguments
+    :type run_default_tests: function
+    """
+    return_code, output = run_default_tests("tests/test_source/snapshot_hooks_scenario/test_sqlite_class_attribute.py")
+    assert return_code == 0
+    assert output.count("RERUN") == 2
+    assert " 2 passed, 2 rerun in " in output
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="the fork snapshot mode needs os.fork()")
+def test_class_attributes_fork_snapshot(run_default_tests):  # pylint: disable=W0613
+    """
+    This test check that every attempt of a class in fork snapshot mode starts from pristine class attributes and
+    module globals, and that the reports of the forked attempts are reported by the parent process
+
+    :param run_default_tests: fixture to run pytest with the plugin and default arguments
+    :type run_default_tests: function
+    """
+    return_code, output = run_default_tests("tests/test_source/test_fork_snapshot.py")
+    assert return_code == 0
+    assert output.count("RERUN") == 2
+    assert " 2 passed, 2 rerun in " in output
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="the fork snapshot mode needs os.fork()")
+def test_class_attributes_fork_user_properties(run_default_tests):  # pylint: disable=W0613
+    """
+    This test check that a user property JSON can't serialize doesn't fail a test in fork snapshot mode, and that
+    an attempt whose results can't be sent at all fails with the traceback of the child process
+
+    :param run_default_tests: fixture to run pytest with the plugin and default arguments
+    :type run_default_tests: function
+    """
+    return_code, output = run_default_tests("tests/test_source/test_fork_user_properties.py", "--rerun-delay=0")
+    assert return_code == 1
+    assert "test_fork_object_property PASSED" in output
+    assert "test_fork_circular_property FAILED" in output
+    assert "forked test process couldn't send its results" in output
+    assert "ValueError: Circular reference detected" in output
+    assert " 1 failed, 1 passed, 1 rerun in " in output
+
+
+@pytest.mark.parametrize(
+    "resume_args, reruns",
+    [
+        ("--rerun-class-resume=restart", 4),
+        ("--rerun-class-resume=failed", 1),
+        ("--rerun-class-resume=checkpoint", 2),
+    ],
+)
+def test_class_attributes_resume_from_failure(run_default_tests, resume_args, reruns):  # pylint: disable=W0613
+    """
+    This test check that a rerun restarts the class, or resumes from the failed test or from the last checkpoint
+    before it, with the class state of that point, and that the passing reports of earlier attempts are kept
+
+    :param run_default_tests: fixture to run pytest with the plugin and default arguments
+    :type run_default_tests: function
+    :param resume_args: resume mode arguments
+    :type resume_args: str
+    :param reruns: expected number of rerun tests
+    :type reruns: int
+    """
+    return_code, output = run_default_tests("tests/test_source/test_resume_from_failure.py", resume_args)
+    assert return_code == 0
+    assert output.count("RERUN") == reruns
+    assert f" 5 passed, {reruns} rerun in " in output
@@ -0,0 +1,11 @@
+"""Snapshot and readiness hooks that must only apply to the classes under this directory."""
+
+
+def pytest_rerunclass_snapshot_attribute(config, cls, name, value):  # pylint: disable=unused-argument
+    """Fail loudly when called for a class out of scope of this conftest."""
+    assert cls.__name__ == "TestInA", f"a/conftest.py snapshot hook called for {cls.__name__}"
+
+
+def pytest_rerunclass_ready(config, cls, attempt):  # pylint: disable=unused-argument
+    """Never ready: a class out of scope of this conftest would wait for the readiness timeout."""
+    return False
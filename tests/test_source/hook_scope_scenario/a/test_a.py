@@ -0,0 +1,11 @@
+"""Test class in scope of the hooks of a/conftest.py"""
+
+
+class TestInA:  # pylint: disable=too-few-public-methods
+    """Test class passing at once"""
+
+    items: list = []
+
+    def test_in_a(self):
+        """Always passes"""
+        assert not self.items
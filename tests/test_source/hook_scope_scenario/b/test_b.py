@@ -0,0 +1,19 @@
+"""Test class out of scope of the hooks of a/conftest.py"""
+
+attempts: list = []
+
+
+class TestInB:
+    """Test class failing on its first attempt"""
+
+    items: list = []
+
+    def test_in_b_mutate(self):
+        """Check the initial state, then mutate a class attribute"""
+        assert not self.items
+        self.items.append("changed")
+
+    def test_in_b_flaky(self):
+        """Fails on the first attempt only"""
+        attempts.append(True)
+        assert len(attempts) > 1
@@ -0,0 +1,11 @@
+"""Readiness probes: one becoming ready on its third poll, one never ready."""
+
+
+def pytest_rerunclass_ready(config, cls, attempt):  # pylint: disable=unused-argument
+    """Count the polls on the class, which the rerun checks."""
+    if cls.__name__ == "TestNeverReady":
+        return False
+    if cls.__name__ != "TestReadyProbe":
+        return None
+    cls.ready_polls += 1
+    return cls.ready_polls >= 3
@@ -0,0 +1,24 @@
+"""Test classes rerun once their readiness probe is ready, instead of after the rerun delay"""
+
+attempts: list = []
+never_ready_runs: list = []
+
+
+class TestReadyProbe:
+    """Test class whose probe is ready on its third poll"""
+
+    ready_polls = 0
+
+    def test_ready_probe_flaky(self):
+        """Fails on the first attempt only, the rerun must come after three polls"""
+        attempts.append(type(self).ready_polls)
+        assert attempts == [0, 3]
+
+
+class TestNeverReady:
+    """Test class whose probe is never ready"""
+
+    def test_never_ready_flaky(self):
+        """Fails on the first attempt only, rerun anyway once the ready timeout expires"""
+        never_ready_runs.append(True)
+        assert len(never_ready_runs) > 1
@@ -0,0 +1,20 @@
+"""Save and restore in-memory sqlite databases kept on test classes with sqlite's backup API."""
+
+import sqlite3
+
+
+def pytest_rerunclass_snapshot_attribute(config, cls, name, value):  # pylint: disable=unused-argument
+    """Copy a database into a new in-memory one, leave every other attribute to the plugin."""
+    if not isinstance(getattr(value, "connection", None), sqlite3.Connection):
+        return None
+    saved = sqlite3.connect(":memory:")
+    value.connection.backup(saved)
+    return saved
+
+
+def pytest_rerunclass_restore_attribute(config, cls, name, value, saved):  # pylint: disable=unused-argument,R0913
+    """Copy the saved database back into the one still set on the class."""
+    if not isinstance(getattr(value, "connection", None), sqlite3.Connection):
+        return None
+    saved.backup(value.connection)
+    return value
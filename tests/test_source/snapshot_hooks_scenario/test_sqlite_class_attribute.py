@@ -0,0 +1,32 @@
+"""Test class keeping an in-memory sqlite database, which can't be deep-copied"""
+
+import sqlite3
+
+attempts: list = []
+
+
+class Database:  # pylint: disable=too-few-public-methods
+    """In-memory database with a single row"""
+
+    def __init__(self):
+        self.connection = sqlite3.connect(":memory:")
+        self.connection.execute("CREATE TABLE users (name TEXT)")
+        self.connection.execute("INSERT INTO users VALUES ('initial')")
+        self.connection.commit()
+
+
+class TestSqliteClassAttribute:
+    """Test class that only passes on rerun if the database was restored"""
+
+    database = Database()
+
+    def test_sqlite_insert(self):
+        """Check the initial rows, then add one"""
+        assert self.database.connection.execute("SELECT COUNT(*) FROM users").fetchone() == (1,)
+        self.database.connection.execute("INSERT INTO users VALUES ('changed')")
+        self.database.connection.commit()
+
+    def test_sqlite_flaky(self):
+        """Fails on the first attempt only"""
+        attempts.append(True)
+        assert len(attempts) > 1
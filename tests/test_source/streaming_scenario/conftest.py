@@ -0,0 +1,22 @@
+"""Record the call reports as they are logged, for the tests to check what was already reported."""
+
+import pytest
+
+logged: list = []
+
+
+def pytest_runtest_logreport(report):
+    """Record the outcome of each call report."""
+    if report.when == "call":
+        logged.append((report.nodeid.rsplit("::", 1)[-1], report.outcome))
+
+
+@pytest.fixture
+def logged_reports():
+    """
+    Call reports logged so far.
+
+    :return: test name and outcome of each call report logged so far
+    :rtype: list
+    """
+    return logged
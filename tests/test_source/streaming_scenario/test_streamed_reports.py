@@ -0,0 +1,32 @@
+"""Test classes whose first attempt is reported as its tests pass"""
+
+attempts: list = []
+
+
+class TestStreamedPass:
+    """Test class passing on its first attempt"""
+
+    def test_streamed_first(self, logged_reports):
+        """Nothing reported yet"""
+        assert not logged_reports
+
+    def test_streamed_second(self, logged_reports):
+        """The first test was reported when this one started"""
+        assert logged_reports == [("test_streamed_first", "passed")]
+
+    def test_streamed_third(self, logged_reports):
+        """The second test was reported when this one started"""
+        assert logged_reports == [("test_streamed_first", "passed"), ("test_streamed_second", "passed")]
+
+
+class TestStreamedFlaky:
+    """Test class failing on its first attempt"""
+
+    def test_streamed_before_failure(self):
+        """Always passes"""
+
+    def test_streamed_flaky(self, logged_reports):
+        """Fails on the first attempt only, once the test before it was reported"""
+        assert logged_reports[-1] == ("test_streamed_before_failure", "passed")
+        attempts.append(True)
+        assert len(attempts) > 1
@@ -0,0 +1,38 @@
+"""Test classes sharing a base class whose data attributes are mutated"""
+
+attempts: dict = {"first": [], "second": []}
+
+
+class BaseWithSharedData:  # pylint: disable=too-few-public-methods
+    """Base class owning the data shared by every test class below"""
+
+    shared: list = ["initial"]
+    constants: dict = {"limit": 10, "names": ("a", "b")}
+
+
+class TestFirstChild(BaseWithSharedData):
+    """First test class, mutates the base data then fails once"""
+
+    def test_first_child_state(self):
+        """Check and mutate the base data"""
+        assert BaseWithSharedData.shared == ["initial"]
+        BaseWithSharedData.shared.append("first")
+
+    def test_first_child_flaky(self):
+        """Fails on the first attempt only"""
+        attempts["first"].append(True)
+        assert len(attempts["first"]) > 1
+
+
+class TestSecondChild(BaseWithSharedData):
+    """Second test class, must be restored to the base data as left by the first class"""
+
+    def test_second_child_state(self):
+        """Check and mutate the base data"""
+        assert BaseWithSharedData.shared == ["initial", "first"]
+        BaseWithSharedData.shared.append("second")
+
+    def test_second_child_flaky(self):
+        """Fails on the first attempt only"""
+        attempts["second"].append(True)
+        assert len(attempts["second"]) > 1
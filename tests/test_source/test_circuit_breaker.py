@@ -0,0 +1,36 @@
+"""Test classes failing during an outage of a shared dependency, then one failing only once after it"""
+
+attempts: list = []
+
+
+class TestOutageFirst:
+    """Test class failing on every attempt"""
+
+    def test_outage_first(self):
+        """Always fails"""
+        raise ConnectionRefusedError("backend is down")
+
+
+class TestOutageSecond:
+    """Test class failing on every attempt"""
+
+    def test_outage_second(self):
+        """Always fails"""
+        raise ConnectionRefusedError("backend is down")
+
+
+class TestOutageThird:
+    """Test class failing on every attempt"""
+
+    def test_outage_third(self):
+        """Always fails"""
+        raise ConnectionRefusedError("backend is down")
+
+
+class TestAfterOutage:
+    """Test class failing on its first attempt only"""
+
+    def test_after_outage_flaky(self):
+        """Fails on the first attempt only"""
+        attempts.append(True)
+        assert len(attempts) > 1
@@ -0,0 +1,25 @@
+"""Test class whose attributes are rebound and mutated before a flaky failure"""
+
+attempts: list = []
+
+
+class TestClassStateRestored:
+    """Test class that only passes on rerun if every class attribute was restored"""
+
+    counter = 0
+    name = "initial"
+    items: list = ["initial"]
+
+    def test_class_state_initial(self):
+        """Check the initial state, then rebind and mutate class attributes"""
+        assert type(self).counter == 0
+        assert type(self).name == "initial"
+        assert type(self).items == ["initial"]
+        type(self).counter += 1
+        type(self).name = "changed"
+        type(self).items.append("changed")
+
+    def test_class_state_flaky(self):
+        """Fails on the first attempt only"""
+        attempts.append(True)
+        assert len(attempts) > 1
@@ -0,0 +1,39 @@
+"""Test classes failing on their first attempt, rerun at the end of the session in deferred mode"""
+
+attempts: list = []
+executed: list = []
+
+
+class TestDeferredFirst:
+    """Test class failing on its first attempt"""
+
+    items: list = []
+
+    def test_deferred_first_mutate(self):
+        """Check the initial state, then mutate a class attribute"""
+        executed.append("first")
+        assert not self.items
+        self.items.append("changed")
+
+    def test_deferred_first_flaky(self):
+        """Fails on the first attempt only"""
+        attempts.append(True)
+        assert len(attempts) > 1
+
+
+class TestDeferredSecond:
+    """Test class passing at once, which runs before the deferred reruns"""
+
+    def test_deferred_second(self):
+        """Check that the failed class wasn't rerun yet"""
+        executed.append("second")
+        assert executed == ["first", "second"]
+
+
+class TestDeferredThird:
+    """Test class failing on its first attempt"""
+
+    def test_deferred_third_flaky(self):
+        """Fails on the first attempt only"""
+        executed.append("third")
+        assert executed.count("third") > 1
@@ -0,0 +1,18 @@
+"""Test class failing on its first attempt, deferred, then a failing test stopping the session with --maxfail"""
+
+
+class TestDeferredMaxfail:
+    """Test class failing on its first attempt"""
+
+    def test_deferred_maxfail_pass(self):
+        """Always passes"""
+        assert True
+
+    def test_deferred_maxfail_fail(self):
+        """Always fails"""
+        assert False
+
+
+def test_standalone_fail():
+    """Always fails, reaching --maxfail before the deferred class is rerun"""
+    assert False
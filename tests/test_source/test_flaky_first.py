@@ -0,0 +1,33 @@
+"""Test classes, one of them flaky, to be reordered by their rerun history"""
+
+attempts: list = []
+
+
+def test_module_level():
+    """Passes, outside any class"""
+
+
+class TestStableFirst:
+    """Test class always passing"""
+
+    def test_stable_first(self):
+        """Always passes"""
+
+
+class TestFlakyOnce:
+    """Test class failing on its first attempt in every session"""
+
+    def test_flaky_step_one(self):
+        """Always passes"""
+
+    def test_flaky_step_two(self):
+        """Fails on the first attempt only"""
+        attempts.append(True)
+        assert len(attempts) > 1
+
+
+class TestStableLast:
+    """Test class always passing"""
+
+    def test_stable_last(self):
+        """Always passes"""
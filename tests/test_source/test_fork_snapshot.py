@@ -0,0 +1,32 @@
+"""Test class run in forked child processes, mutating class attributes and module globals"""
+
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# attempts run in separate processes, so the flaky test keeps track of them in a file named after the parent process
+first_attempt_marker = Path(tempfile.gettempdir()) / f"pytest-rerunclassfailures-fork-{os.getppid()}"
+settings = {"mode": "initial"}
+
+
+@pytest.mark.rerun_class(snapshot_mode="fork")
+class TestForkSnapshot:
+    """Test class that only passes on rerun if the class attributes and module globals are pristine"""
+
+    items: list = ["initial"]
+
+    def test_fork_state_initial(self):
+        """Check the initial state, then mutate a class attribute and a module global"""
+        assert settings == {"mode": "initial"}
+        assert self.items == ["initial"]
+        settings["mode"] = "changed"
+        self.items.append("changed")
+
+    def test_fork_flaky(self):
+        """Fails on the first attempt only"""
+        if not first_attempt_marker.exists():
+            first_attempt_marker.touch()
+            pytest.fail("first attempt")
+        first_attempt_marker.unlink()
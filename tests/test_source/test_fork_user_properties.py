@@ -0,0 +1,24 @@
+"""Test classes run in forked child processes, recording user properties that aren't JSON-serializable"""
+
+import pytest
+
+circular: list = []
+circular.append(circular)
+
+
+@pytest.mark.rerun_class(snapshot_mode="fork")
+class TestForkUserProperties:
+    """Test class recording a user property that JSON can't serialize, sent as its repr"""
+
+    def test_fork_object_property(self, record_property):
+        """Records an arbitrary object"""
+        record_property("obj", object())
+
+
+@pytest.mark.rerun_class(snapshot_mode="fork")
+class TestForkCircularUserProperty:
+    """Test class recording a user property that can't be serialized at all"""
+
+    def test_fork_circular_property(self, record_property):
+        """Records a list containing itself"""
+        record_property("circular", circular)
@@ -0,0 +1,12 @@
+"""Test class with an invalid rerun_class marker"""
+
+import pytest
+
+
+@pytest.mark.rerun_class(snapshot_backend="json")
+class TestInvalidClassMarker:
+    """Test class with an unsupported snapshot backend"""
+
+    def test_invalid_class_marker(self):
+        """This test never runs"""
+        assert True
@@ -0,0 +1,10 @@
+"""Test class with a lot of captured output"""
+
+
+class TestLargeOutput:  # pylint: disable=too-few-public-methods
+    """This class always fails, with a lot of captured output"""
+
+    def test_large_output(self):
+        """This test prints a lot, then fails"""
+        print("x" * 1000)
+        assert False
@@ -0,0 +1,28 @@
+"""Nested test classes with the same name in one module"""
+
+attempts: list = []
+
+
+class TestFirstOuter:
+    """Outer test class"""
+
+    class TestInner:
+        """Inner test class, named like the other one"""
+
+        def test_first_inner(self):
+            """Always passes"""
+
+        def test_first_inner_second(self):
+            """Always passes"""
+
+
+class TestSecondOuter:
+    """Other outer test class"""
+
+    class TestInner:
+        """Inner test class, named like the other one"""
+
+        def test_second_inner(self):
+            """Fails on the first attempt only"""
+            attempts.append(True)
+            assert len(attempts) > 1
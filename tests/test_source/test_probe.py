@@ -0,0 +1,34 @@
+"""Test classes probed by rerunning their failed test alone before rerunning them"""
+
+attempts: list = []
+
+
+class TestRegressionProbed:
+    """Test class with a real regression, failing the same way when its failed test is rerun alone"""
+
+    def test_regression_step_passes(self):
+        """Always passes"""
+
+    def test_regression(self):
+        """Always fails"""
+        assert 1 + 1 == 3
+
+    def test_regression_after(self):
+        """Never reached"""
+
+
+class TestOrderDependentProbed:
+    """Test class whose failed test needs the state left by the test before it"""
+
+    steps: list = []
+
+    def test_prepare(self):
+        """Leaves a state for the next test"""
+        self.steps.append("prepared")
+
+    def test_use_prepared(self):
+        """Fails with a transient error on the first attempt, and needs the prepared state"""
+        attempts.append(True)
+        if len(attempts) == 1:
+            raise ConnectionResetError("connection reset by peer")
+        assert self.steps == ["prepared"]
@@ -0,0 +1,17 @@
+"""Test class whose probe uses up the rerun budget"""
+
+from time import sleep
+
+attempts: list = []
+
+
+class TestSlowProbe:  # pylint: disable=too-few-public-methods
+    """Test class whose only test is slow and fails with a different transient error on each attempt"""
+
+    def test_slow_transient(self):
+        """Slow, then fails"""
+        attempts.append(True)
+        sleep(1)
+        if len(attempts) % 2:
+            raise ConnectionResetError("connection reset by peer")
+        raise TimeoutError("timed out")
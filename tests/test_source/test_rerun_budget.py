@@ -0,0 +1,24 @@
+"""Slow test classes always failing, rerun only while the rerun budget lasts"""
+
+from time import sleep
+
+import pytest
+
+
+class TestSessionBudget:
+    """Test class limited by the session rerun budget"""
+
+    def test_session_budget_slow_failure(self):
+        """Always fails after a while"""
+        sleep(0.2)
+        assert False
+
+
+@pytest.mark.rerun_class(class_budget=0.1)
+class TestClassBudget:
+    """Test class whose own rerun budget is shorter than a single attempt"""
+
+    def test_class_budget_slow_failure(self):
+        """Always fails after a while"""
+        sleep(0.2)
+        assert False
@@ -0,0 +1,34 @@
+"""Test classes failing with a transient error or a deterministic one, rerun only if their failure matches"""
+
+import pytest
+
+attempts: list = []
+
+
+class TestConnectionReset:
+    """Test class failing with a connection reset on its first attempt"""
+
+    def test_connection_reset_flaky(self):
+        """Fails on the first attempt only"""
+        attempts.append("reset")
+        if attempts.count("reset") == 1:
+            raise ConnectionResetError("connection reset by peer")
+
+
+class TestRegression:
+    """Test class failing on an assertion every time"""
+
+    def test_regression(self):
+        """Always fails"""
+        assert 1 + 1 == 3
+
+
+@pytest.mark.rerun_class(only_on="timed out")
+class TestMarkedTimeout:
+    """Test class rerun only on time outs, whatever the command line filters"""
+
+    def test_marked_timeout_flaky(self):
+        """Fails on the first attempt only"""
+        attempts.append("timeout")
+        if attempts.count("timeout") == 1:
+            raise TimeoutError("read timed out")
@@ -0,0 +1,20 @@
+"""Test classes whose rerun history tells how many reruns they need"""
+
+attempts: list = []
+
+
+class TestNeverRecovers:
+    """Test class failing on every attempt, in every session"""
+
+    def test_never_recovers(self):
+        """Always fails"""
+        assert False
+
+
+class TestNeedsThreeReruns:
+    """Test class passing on its third rerun only"""
+
+    def test_needs_three_reruns(self):
+        """Fails on the first three attempts of a session"""
+        attempts.append(True)
+        assert len(attempts) > 3
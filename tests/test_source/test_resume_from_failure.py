@@ -0,0 +1,38 @@
+"""Test class of ordered steps, where a step in the middle is flaky"""
+
+import pytest
+
+attempts: list = []
+
+
+class TestResumeFromFailure:
+    """Test class whose steps build on the class state left by the previous ones"""
+
+    progress: list = []
+
+    def test_step_1(self):
+        """First step"""
+        assert not self.progress
+        self.progress.append(1)
+
+    def test_step_2(self):
+        """Second step"""
+        assert self.progress == [1]
+        self.progress.append(2)
+
+    @pytest.mark.rerun_class_checkpoint
+    def test_step_3(self):
+        """Checkpoint step"""
+        assert self.progress == [1, 2]
+        self.progress.append(3)
+
+    def test_step_4(self):
+        """Fails on the first attempt only"""
+        attempts.append(True)
+        assert len(attempts) > 1
+        assert self.progress == [1, 2, 3]
+        self.progress.append(4)
+
+    def test_step_5(self):
+        """Last step"""
+        assert self.progress == [1, 2, 3, 4]
@@ -0,0 +1,23 @@
+"""Test classes failing on every attempt, the same way or differently each time"""
+
+attempts: list = []
+
+
+class TestDeterministic:
+    """Test class failing the same way on every attempt, only the numbers in its message change"""
+
+    def test_deterministic_failure(self):
+        """Always fails on the same assertion"""
+        attempts.append("deterministic")
+        assert attempts.count("deterministic") == 0
+
+
+class TestChangingFailure:
+    """Test class failing with a different error on each attempt"""
+
+    def test_changing_failure(self):
+        """Always fails, alternating between two exception types"""
+        attempts.append("changing")
+        if attempts.count("changing") % 2:
+            raise ConnectionResetError("connection reset by peer")
+        raise TimeoutError("read timed out")
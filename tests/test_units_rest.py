@@ -1,15 +1,32 @@
 """Rest of the tests not covered by the other test modules (mocked, in-process unit tests)."""
 
+# pylint: disable=too-many-lines
+
+import dataclasses
+import enum
 from unittest.mock import MagicMock, create_autospec
 
 import pydantic
 import pytest
+from _pytest.reports import TestReport
 from _pytest.terminal import TerminalReporter
 
 from pytest_rerunclassfailures.pytest_rerunclassfailures import (  # type: ignore
+    Attempt,
+    ClassRun,
+    ClassSnapshot,
+    RerunCircuitBreaker,
     RerunClassPlugin,
     RerunClassOptions,
+    RerunRegistry,
+    ReportSpool,
+    SpilledReports,
+    IMMUTABLE_TYPE_REGISTRY,
+    _failure_signature,
+    _is_immutable,
+    _match_failure,
     pytest_configure,
+    register_immutable_type,
 )
 
 
@@ -21,9 +38,7 @@ def mock_pytest_config() -> MagicMock:
     :return: mock of pytest.Config
     :rtype: MagicMock
     """
-    config = MagicMock()
-    config.getoption = MagicMock(side_effect=lambda x: 1 if x == "--rerun-class-max" else 0)
-    return config
+    return _make_config_mock()
 
 
 @pytest.fixture
@@ -285,14 +300,42 @@ def _make_config_mock(  # pylint: disable=too-many-positional-arguments
         "--rerun-delay": 0.5,
         "--rerun-show-only-last": False,
         "--hide-rerun-details": False,
+        "--rerun-class-snapshot": "eager",
+        "--rerun-class-snapshot-backend": "deepcopy",
+        "--rerun-class-resume": "restart",
+        "--rerun-class-defer": False,
+        "--rerun-class-probe": False,
+        "--rerun-class-stream": False,
+        "--rerun-delay-policy": "fixed",
+        "--rerun-delay-max": None,
+        "--rerun-ready-interval": 0.05,
+        "--rerun-ready-timeout": 30.0,
+        "--rerun-class-budget": None,
+        "--rerun-class-budget-per-class": None,
+        "--rerun-class-same-failure-max": None,
+        "--rerun-class-history": False,
+        "--rerun-class-adaptive": False,
+        "--rerun-class-flaky-first": False,
+        "--rerun-class-breaker-failures": None,
+        "--rerun-class-breaker-rate": None,
+        "--rerun-class-breaker-window": 10,
+        "--rerun-class-breaker-cooldown": None,
+        "--rerun-class-only-on": None,
+        "--rerun-class-except": None,
+        "--rerun-class-keep-artifacts": "all",
+        "--rerun-class-artifact-max-size": None,
+        "--rerun-class-memory-budget": None,
         "--allow-rerunfailures": allow_rerunfailures,
         "dist": dist_mode,
     }
+    ini = {"rerun_class_snapshot_backend": "deepcopy", "rerun_class_immutable_types": []}
     plugins = {"rerunfailures": has_rerunfailures, "xdist": has_xdist}
     config = MagicMock()
     config.getoption = MagicMock(side_effect=lambda name, default=None: options.get(name, default))
+    config.getini = MagicMock(side_effect=ini.get)
     config.pluginmanager.has_plugin = MagicMock(side_effect=lambda name: plugins.get(name, False))
     config.pluginmanager.is_blocked = MagicMock(return_value=warnings_blocked)
+    del config.workerinput  # not a pytest-xdist worker
     return config
 
 
@@ -405,3 +448,926 @@ def test_unit_recreate_test_class_drops_memoized_instance_and_obj(rerun_class_pl
     assert not hasattr(sibling_with_state, "_obj")
     assert sibling_with_state.parent is test_class_mock
     assert sibling_without_state.parent is test_class_mock
+
+
+def _make_class_items(parent_class, count):
+    """
+    Build MagicMock items that belong to the given class node.
+
+    :param parent_class: class node the items belong to
+    :type parent_class: MagicMock
+    :param count: number of items to build
+    :type count: int
+    :return: list of item mocks
+    :rtype: list
+    """
+    items = []
+    for index in range(count):
+        item = MagicMock()
+        item.nodeid = f"test_module.py::{parent_class.name}::test_{index}"
+        item.getparent.return_value = parent_class
+        items.append(item)
+    return items
+
+
+def test_unit_class_index_groups_items_by_class_node(rerun_class_plugin):  # pylint: disable=W0621
+    """Test that the class index is built once per collection and keeps the session order within a class."""
+    class_a, class_b = MagicMock(), MagicMock()
+    class_a.name, class_b.name = "TestA", "TestB"
+    items_a, items_b = _make_class_items(class_a, 3), _make_class_items(class_b, 2)
+    standalone = MagicMock()
+    standalone.cls = None
+    session = MagicMock()
+    session.items = [items_a[0], items_b[0], standalone, items_a[1], items_b[1], items_a[2]]
+
+    rerun_class_plugin.pytest_collection_finish(session)
+
+    assert rerun_class_plugin.class_index == {class_a: items_a, class_b: items_b}
+    items_a[0].session = session
+    assert rerun_class_plugin._collect_sibling_items(items_a[0]) == items_a + [None]  # pylint: disable=W0212
+    items_a[1].session = session
+    assert rerun_class_plugin._collect_sibling_items(items_a[1]) == items_a[1:] + [None]  # pylint: disable=W0212
+
+
+def test_unit_class_index_rebuilt_after_reorder(rerun_class_plugin):  # pylint: disable=W0621
+    """Test that a reorder of session.items after collection invalidates the class index entry."""
+    class_a = MagicMock()
+    class_a.name = "TestA"
+    items_a = _make_class_items(class_a, 3)
+    session = MagicMock()
+    session.items = list(items_a)
+    rerun_class_plugin.pytest_collection_finish(session)
+
+    session.items[:] = [items_a[2], items_a[0], items_a[1]]  # e.g. an ordering plugin running late
+    items_a[2].session = session
+
+    siblings = rerun_class_plugin._collect_sibling_items(items_a[2])  # pylint: disable=W0212
+
+    assert siblings == [items_a[2], items_a[0], items_a[1], None]
+
+
+def _make_parent(obj, **marker_kwargs):
+    """
+    Build a MagicMock pytest.Class node wrapping the given class, with an optional rerun_class marker.
+
+    :param obj: python class the node wraps
+    :type obj: type
+    :param marker_kwargs: rerun_class marker options, no marker if empty
+    :type marker_kwargs: dict
+    :return: class node mock
+    :rtype: MagicMock
+    """
+    parent = MagicMock()
+    parent.obj = obj
+    parent.name = obj.__name__
+    parent.nodeid = f"test_module.py::{obj.__name__}"
+    parent.get_closest_marker.return_value = pytest.mark.rerun_class(**marker_kwargs).mark if marker_kwargs else None
+    parent.ihook.pytest_rerunclass_snapshot_attribute.get_hookimpls.return_value = []
+    return parent
+
+
+def test_unit_snapshot_keeps_immutables_by_reference(rerun_class_plugin):  # pylint: disable=W0621
+    """Test that snapshots keep immutable values by reference and only deep-copy mutable ones."""
+
+    class _FakeTestClass:  # pylint: disable=too-few-public-methods
+        constant = "a" * 1000
+        mutable: list = [1, 2]
+
+    parent = _make_parent(_FakeTestClass)
+
+    snapshot = rerun_class_plugin._save_parent_initial_state(parent)  # pylint: disable=protected-access
+
+    assert isinstance(snapshot, ClassSnapshot)
+    assert snapshot.by_reference == {"constant"}
+    assert snapshot["constant"] is _FakeTestClass.constant
+    assert snapshot["mutable"] == [1, 2] and snapshot["mutable"] is not _FakeTestClass.mutable
+
+
+def test_unit_restore_skips_attributes_with_unchanged_fingerprint(rerun_class_plugin):  # pylint: disable=W0621
+    """Test that attributes whose fingerprint still matches aren't deep-copied back, and changed ones are."""
+
+    class _FakeTestClass:  # pylint: disable=too-few-public-methods
+        lookup_table = bytearray(b"x" * 4096)
+        mutated_buffer = bytearray(b"initial")
+        mutable: list = []
+
+    parent = _make_parent(_FakeTestClass)
+    lookup_table = _FakeTestClass.lookup_table
+    snapshot = rerun_class_plugin._save_parent_initial_state(parent)  # pylint: disable=protected-access
+    _FakeTestClass.mutated_buffer[0:7] = b"changed"
+    _FakeTestClass.mutable.append(1)
+
+    rerun_class_plugin._set_parent_initial_state(parent, snapshot)  # pylint: disable=protected-access
+
+    assert _FakeTestClass.lookup_table is lookup_table
+    assert _FakeTestClass.mutated_buffer == bytearray(b"initial")
+    assert not _FakeTestClass.mutable
+    rerun_class_plugin.logger.debug.assert_any_call(
+        "Restored %s attribute(s) of %s, skipped %s unchanged", 2, "_FakeTestClass", 1
+    )
+
+    rerun_class_plugin._set_parent_initial_state(parent, snapshot)  # pylint: disable=protected-access
+
+    rerun_class_plugin.logger.debug.assert_any_call(
+        "Restored %s attribute(s) of %s, skipped %s unchanged", 1, "_FakeTestClass", 2
+    )
+
+
+@pytest.mark.parametrize("backend", ["pickle", "marshal"])
+def test_unit_serializing_backend_round_trips_builtins(rerun_class_plugin, backend):  # pylint: disable=W0621
+    """Test that builtin fixtures are serialized once by the chosen backend and loaded back on every restore."""
+
+    class _FakeTestClass:  # pylint: disable=too-few-public-methods
+        table: dict = {"rows": [[1, 2], [3, 4]], "names": {"a", "b"}}
+
+    parent = _make_parent(_FakeTestClass, snapshot_backend=backend)
+    snapshot = rerun_class_plugin._save_parent_initial_state(parent)  # pylint: disable=protected-access
+    assert snapshot.encoded == {"table": backend}
+    assert isinstance(snapshot["table"], bytes)
+
+    for _ in range(2):
+        _FakeTestClass.table["rows"].append([5, 6])
+        rerun_class_plugin._set_parent_initial_state(parent, snapshot)  # pylint: disable=protected-access
+        assert _FakeTestClass.table == {"rows": [[1, 2], [3, 4]], "names": {"a", "b"}}
+
+
+def test_unit_serializing_backend_falls_back_per_attribute(rerun_class_plugin):  # pylint: disable=W0621
+    """Test that marshal falls back to pickle, then deepcopy, then a plain reference, per attribute."""
+
+    class _Picklable:  # pylint: disable=too-few-public-methods
+        """Module-level-like class instance that marshal can't handle."""
+
+    class _FakeTestClass:  # pylint: disable=too-few-public-methods
+        builtin: list = [1]
+        local_object = _Picklable()  # a local class can't be pickled, but can be deep-copied
+        unpicklable = (item for item in [])  # a generator can't even be deep-copied
+
+    parent = _make_parent(_FakeTestClass, snapshot_backend="marshal")
+
+    snapshot = rerun_class_plugin._save_parent_initial_state(parent)  # pylint: disable=protected-access
+
+    assert snapshot.encoded == {"builtin": "marshal"}
+    assert isinstance(snapshot["local_object"], _Picklable)
+    assert snapshot["local_object"] is not _FakeTestClass.local_object
+    assert snapshot["unpicklable"] is _FakeTestClass.unpicklable
+
+
+class _TwoArgumentError(Exception):
+    """Exception that pickles fine but can't be unpickled, its __init__ taking more arguments than its args."""
+
+    def __init__(self, code, reason):
+        super().__init__(f"{code}: {reason}")
+
+
+def test_unit_pickle_backend_falls_back_on_values_that_cant_be_unpickled(rerun_class_plugin):  # pylint: disable=W0621
+    """Test that an attribute the pickle backend can dump but not load back isn't saved pickled."""
+
+    class _FakeTestClass:  # pylint: disable=too-few-public-methods
+        error = _TwoArgumentError(1, 2)
+        rows: list = [1]
+
+    parent = _make_parent(_FakeTestClass, snapshot_backend="pickle")
+    snapshot = rerun_class_plugin._save_parent_initial_state(parent)  # pylint: disable=protected-access
+    assert snapshot.encoded == {"rows": "pickle"}
+
+    error = _FakeTestClass.error
+    _FakeTestClass.rows.append(2)
+    rerun_class_plugin._set_parent_initial_state(parent, snapshot)  # pylint: disable=protected-access
+
+    assert _FakeTestClass.rows == [1]
+    assert _FakeTestClass.error is error  # can't be copied either, so kept by reference
+
+
+def test_unit_class_options_marker_rejects_unknown_and_invalid_values(rerun_class_plugin):  # pylint: disable=W0621
+    """Test that a rerun_class marker with an unknown option or an invalid value is a usage error."""
+
+    class _FakeTestClass:  # pylint: disable=too-few-public-methods
+        pass
+
+    with pytest.raises(pytest.UsageError, match="unknown rerun_class marker option"):
+        rerun_class_plugin._get_class_options(_make_parent(_FakeTestClass, rerun_max=5))  # pylint: disable=W0212
+    with pytest.raises(pytest.UsageError, match="invalid rerun_class marker"):
+        rerun_class_plugin._get_class_options(  # pylint: disable=W0212
+            _make_parent(_FakeTestClass, snapshot_backend="json")
+        )
+
+
+def test_unit_snapshot_keeps_aliasing_between_attributes(rerun_class_plugin):  # pylint: disable=W0621
+    """Test that attributes sharing an object are copied once and still share it after a restore."""
+    dataset = [[1, 2, 3]]
+
+    class _FakeTestClass:  # pylint: disable=too-few-public-methods
+        rows = dataset
+        first_row = dataset[0]
+        views: dict = {"all": dataset}
+
+    parent = _make_parent(_FakeTestClass)
+    snapshot = rerun_class_plugin._save_parent_initial_state(parent)  # pylint: disable=protected-access
+    assert snapshot["rows"] is snapshot["views"]["all"]
+    assert snapshot["first_row"] is snapshot["rows"][0]
+
+    _FakeTestClass.rows.append([4])
+    rerun_class_plugin._set_parent_initial_state(parent, snapshot)  # pylint: disable=protected-access
+
+    assert _FakeTestClass.rows == [[1, 2, 3]]
+    assert _FakeTestClass.rows is _FakeTestClass.views["all"]
+    assert _FakeTestClass.first_row is _FakeTestClass.rows[0]
+
+
+@pytest.mark.parametrize("backend", ["pickle", "marshal"])
+def test_unit_serializing_backends_copy_attributes_separately(rerun_class_plugin, backend):  # pylint: disable=W0621
+    """Test that pickle and marshal restore each attribute as its own copy, so attributes no longer share objects."""
+    dataset = [[1, 2, 3]]
+
+    class _FakeTestClass:  # pylint: disable=too-few-public-methods
+        rows = dataset
+        views: dict = {"all": dataset}
+
+    parent = _make_parent(_FakeTestClass, snapshot_backend=backend)
+    snapshot = rerun_class_plugin._save_parent_initial_state(parent)  # pylint: disable=protected-access
+    assert snapshot.encoded == {"rows": backend, "views": backend}
+
+    _FakeTestClass.rows.append([4])
+    rerun_class_plugin._set_parent_initial_state(parent, snapshot)  # pylint: disable=protected-access
+
+    assert _FakeTestClass.rows == [[1, 2, 3]] and _FakeTestClass.views == {"all": [[1, 2, 3]]}
+    assert _FakeTestClass.rows is not _FakeTestClass.views["all"]
+
+
+def test_unit_restore_keeps_aliasing_with_skipped_attributes(rerun_class_plugin):  # pylint: disable=W0621
+    """Test that a restored attribute keeps sharing an unchanged (skipped) attribute's live object."""
+    buffer = bytearray(b"payload")
+
+    class _FakeTestClass:  # pylint: disable=too-few-public-methods
+        data = buffer
+        holders: list = [buffer]
+
+    parent = _make_parent(_FakeTestClass)
+    snapshot = rerun_class_plugin._save_parent_initial_state(parent)  # pylint: disable=protected-access
+    _FakeTestClass.holders.append(None)
+
+    rerun_class_plugin._set_parent_initial_state(parent, snapshot)  # pylint: disable=protected-access
+
+    assert _FakeTestClass.data is buffer
+    assert _FakeTestClass.holders == [buffer] and _FakeTestClass.holders[0] is buffer
+
+
+def test_unit_attribute_plan_cached_per_class(rerun_class_plugin):  # pylint: disable=W0621
+    """Test that a class's own attribute plan is computed once and recomputed only if its __dict__ keys change."""
+
+    class _Base:  # pylint: disable=too-few-public-methods
+        constant = 1
+
+        def method(self):
+            """A method, never part of the data attributes."""
+
+    class _Child(_Base):  # pylint: disable=too-few-public-methods
+        own = [1]
+
+    assert rerun_class_plugin._get_attribute_plan(_Child) == {  # pylint: disable=protected-access
+        "own": _Child,
+        "constant": _Base,
+    }
+    base_plan = rerun_class_plugin.attribute_plans[_Base]
+    rerun_class_plugin._get_attribute_plan(_Child)  # pylint: disable=protected-access
+    assert rerun_class_plugin.attribute_plans[_Base] is base_plan
+
+    _Base.lazy = "created"  # type: ignore  # pylint: disable=attribute-defined-outside-init
+    assert rerun_class_plugin._get_attribute_plan(_Child)["lazy"] is _Base  # pylint: disable=protected-access
+
+
+def test_unit_base_snapshot_reused_until_base_data_changes(rerun_class_plugin):  # pylint: disable=W0621
+    """Test that base-owned data is copied once for all subclasses, unless its content changed in between."""
+
+    class _Base:  # pylint: disable=too-few-public-methods
+        shared_table: dict = {"rows": list(range(100))}
+
+    class _FirstChild(_Base):  # pylint: disable=too-few-public-methods
+        pass
+
+    class _SecondChild(_Base):  # pylint: disable=too-few-public-methods
+        pass
+
+    class _ThirdChild(_Base):  # pylint: disable=too-few-public-methods
+        pass
+
+    first = rerun_class_plugin._save_parent_initial_state(_make_parent(_FirstChild))  # pylint: disable=W0212
+    second = rerun_class_plugin._save_parent_initial_state(_make_parent(_SecondChild))  # pylint: disable=W0212
+    assert second["shared_table"] is first["shared_table"]
+
+    _Base.shared_table["rows"].append(100)
+    third = rerun_class_plugin._save_parent_initial_state(_make_parent(_ThirdChild))  # pylint: disable=W0212
+    assert third["shared_table"] is not first["shared_table"]
+    assert third["shared_table"]["rows"][-1] == 100
+
+
+def test_unit_base_snapshot_reuse_keeps_aliasing_with_own_attributes(rerun_class_plugin):  # pylint: disable=W0621
+    """Test that a subclass aliasing base-owned data keeps sharing it after a restore, once the base copy is cached."""
+
+    class _Base:  # pylint: disable=too-few-public-methods
+        data: list = [1, 2]
+
+    class _FirstChild(_Base):  # pylint: disable=too-few-public-methods
+        pass
+
+    class _SecondChild(_Base):  # pylint: disable=too-few-public-methods
+        view = _Base.data
+
+    rerun_class_plugin._save_parent_initial_state(_make_parent(_FirstChild))  # pylint: disable=W0212
+    parent = _make_parent(_SecondChild)
+    snapshot = rerun_class_plugin._save_parent_initial_state(parent)  # pylint: disable=protected-access
+    assert snapshot["data"] is snapshot["view"]
+
+    _Base.data.append(3)
+    rerun_class_plugin._set_parent_initial_state(parent, snapshot)  # pylint: disable=protected-access
+
+    assert _SecondChild.data == [1, 2]
+    assert _SecondChild.view is _SecondChild.data
+
+
+def test_unit_remove_non_initial_attributes_from_owning_base(rerun_class_plugin):  # pylint: disable=W0621
+    """Test that an attribute lazily created on a base class is removed from that base class."""
+
+    class _Base:  # pylint: disable=too-few-public-methods
+        pass
+
+    class _Child(_Base):  # pylint: disable=too-few-public-methods
+        pass
+
+    _Base.lazily_created = "should-be-removed"  # type: ignore  # pylint: disable=attribute-defined-outside-init
+
+    rerun_class_plugin._remove_non_initial_attributes(_make_parent(_Child), {})  # pylint: disable=W0212
+
+    assert not hasattr(_Base, "lazily_created")
+
+
+class _Color(enum.Enum):
+    RED = [255, 0, 0]  # a mutable value doesn't make the member itself mutable
+
+
+@dataclasses.dataclass(frozen=True)
+class _FrozenPoint:
+    x: int
+    labels: tuple = ()
+
+
+@dataclasses.dataclass
+class _Point:
+    x: int
+
+
+class _Money:  # pylint: disable=too-few-public-methods
+    def __init__(self, amount):
+        self.amount = amount
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (42, True),
+        ("constant", True),
+        (b"bytes", True),
+        (frozenset({1, "two"}), True),
+        ((1, ("nested", None)), True),
+        ((1, [2]), False),
+        (_Color.RED, True),
+        (_FrozenPoint(1, ("a", "b")), True),
+        (_FrozenPoint(1, (["mutable"],)), False),
+        (_Point(1), False),
+        (_FrozenPoint, False),
+        (bytearray(b"buffer"), False),
+        (_Money(1), False),
+    ],
+)
+def test_unit_is_immutable_classifies_values(value, expected):
+    """Test that the classifier accepts values that can't be mutated in place and rejects everything else."""
+    assert _is_immutable(value) is expected
+
+
+def test_unit_register_immutable_type():
+    """Test that registered types, their subclasses and types resolved from the ini option count as immutable."""
+
+    class _Cents(_Money):  # pylint: disable=too-few-public-methods
+        pass
+
+    assert _is_immutable(_Money(1), extra_types=(_Money,))
+    try:
+        register_immutable_type(_Money)
+        assert _is_immutable(_Cents(1)) and _is_immutable((_Money(1), 2))
+    finally:
+        IMMUTABLE_TYPE_REGISTRY.discard(_Money)
+    with pytest.raises(TypeError, match="is not a type"):
+        register_immutable_type(_Money(1))
+
+
+def test_unit_plugin_init_resolves_immutable_types():
+    """Test that the rerun_class_immutable_types ini option is resolved to types, and bad paths are usage errors."""
+    config = _make_config_mock()
+    config.getini = MagicMock(return_value=["collections:OrderedDict", "fractions.Fraction"])
+
+    plugin = RerunClassPlugin(config=config)
+
+    assert [value_type.__name__ for value_type in plugin.immutable_types] == ["OrderedDict", "Fraction"]
+    for path in ("no_such_module.Type", "fractions.gcd_does_not_exist", "os.path:sep"):
+        config.getini = MagicMock(return_value=[path])
+        with pytest.raises(pytest.UsageError, match="pytest-rerunclassfailures: .*immutable type"):
+            RerunClassPlugin(config=config)
+
+
+def test_unit_eager_restore_sets_immutables_by_reference(rerun_class_plugin):  # pylint: disable=W0621
+    """Test that eager mode keeps immutable values by reference and writes them back with a plain setattr."""
+
+    class _FakeTestClass:  # pylint: disable=too-few-public-methods
+        color = _Color.RED
+        point = _FrozenPoint(1)
+        settings = tuple(f"value_{index}" for index in range(1000))
+        money = _Money(1)
+
+    rerun_class_plugin.immutable_types = (_Money,)
+    parent = _make_parent(_FakeTestClass)
+    originals = dict(vars(_FakeTestClass))
+    snapshot = rerun_class_plugin._save_parent_initial_state(parent)  # pylint: disable=protected-access
+    assert snapshot.by_reference == {"color", "point", "settings", "money"}
+    _FakeTestClass.point = _FrozenPoint(2)
+    del _FakeTestClass.color
+
+    rerun_class_plugin._set_parent_initial_state(parent, snapshot)  # pylint: disable=protected-access
+
+    for name in snapshot.by_reference:
+        assert getattr(_FakeTestClass, name) is originals[name]
+    rerun_class_plugin.logger.debug.assert_any_call(
+        "Restored %s attribute(s) of %s, skipped %s unchanged", 4, "_FakeTestClass", 0
+    )
+
+
+def test_unit_snapshot_and_restore_hooks(rerun_class_plugin):  # pylint: disable=W0621
+    """Test that attributes are saved and restored by the rerun class hooks, and fall back to deepcopy on None."""
+
+    class _Buffer:  # pylint: disable=too-few-public-methods
+        def __init__(self, data):
+            self.data = list(data)
+
+    class _FakeTestClass:  # pylint: disable=too-few-public-methods
+        buffer = _Buffer([1, 2])
+        other: list = [1]
+
+    def snapshot_attribute(config, cls, name, value):  # pylint: disable=unused-argument
+        return _Buffer(value.data) if isinstance(value, _Buffer) else None
+
+    def restore_attribute(config, cls, name, value, saved):  # pylint: disable=unused-argument,R0913
+        if name != "buffer" or value is None:
+            return None
+        value.data[:] = saved.data  # copy back in place, keeping the live object
+        return value
+
+    parent = _make_parent(_FakeTestClass)
+    hook = parent.ihook
+    hook.pytest_rerunclass_snapshot_attribute.get_hookimpls.return_value = [MagicMock()]
+    hook.pytest_rerunclass_snapshot_attribute.side_effect = snapshot_attribute
+    hook.pytest_rerunclass_restore_attribute.side_effect = restore_attribute
+    buffer = _FakeTestClass.buffer
+    snapshot = rerun_class_plugin._save_parent_initial_state(parent)  # pylint: disable=protected-access
+    assert snapshot.encoded == {"buffer": "hook"}
+    buffer.data.append(3)
+    _FakeTestClass.other.append(2)
+
+    rerun_class_plugin._set_parent_initial_state(parent, snapshot)  # pylint: disable=protected-access
+
+    assert _FakeTestClass.buffer is buffer and buffer.data == [1, 2]
+    assert _FakeTestClass.other == [1]
+    del _FakeTestClass.buffer
+
+    rerun_class_plugin._set_parent_initial_state(parent, snapshot)  # pylint: disable=protected-access
+
+    assert _FakeTestClass.buffer is not buffer and _FakeTestClass.buffer.data == [1, 2]
+
+
+def test_unit_rerun_class_options_rejects_fork_without_os_fork(monkeypatch):
+    """Test that the fork snapshot mode is rejected on a platform without os.fork()."""
+    kwargs = {"rerun_max": 1, "delay": 0.0, "only_last": False, "hide_terminal_output": False}
+    monkeypatch.delattr("os.fork", raising=False)
+
+    with pytest.raises(pydantic.ValidationError, match="needs os.fork"):
+        RerunClassOptions(snapshot_mode="fork", **kwargs)
+    assert RerunClassOptions(snapshot_mode="eager", **kwargs).snapshot_mode == "eager"
+
+
+def test_unit_get_resume_point():
+    """Test where a rerun resumes from, and which class state is restored before it, for each resume mode."""
+    initial_state, checkpoint_1, checkpoint_3 = {"a": 0}, {"a": 1}, {"a": 3}
+    checkpoints = {1: checkpoint_1, 3: checkpoint_3}
+    get_resume_point = RerunClassPlugin._get_resume_point  # pylint: disable=protected-access
+
+    assert get_resume_point("restart", 4, checkpoints, initial_state) == (0, initial_state)
+    assert get_resume_point("failed", 4, checkpoints, initial_state) == (4, None)
+    assert get_resume_point("checkpoint", 4, checkpoints, initial_state) == (3, checkpoint_3)
+    assert get_resume_point("checkpoint", 3, checkpoints, initial_state) == (3, checkpoint_3)
+    assert get_resume_point("checkpoint", 2, checkpoints, initial_state) == (1, checkpoint_1)
+    assert get_resume_point("checkpoint", 0, checkpoints, initial_state) == (0, initial_state)
+
+
+def test_unit_rerun_class_options_rejects_resume_with_fork():
+    """Test that a forked class can't be resumed, since a forked attempt leaves nothing behind to resume from."""
+    kwargs = {"rerun_max": 1, "delay": 0.0, "only_last": False, "hide_terminal_output": False}
+
+    with pytest.raises(pydantic.ValidationError, match="can't be used with the 'fork' snapshot mode"):
+        RerunClassOptions(snapshot_mode="fork", resume="failed", **kwargs)
+    assert RerunClassOptions(snapshot_mode="eager", resume="checkpoint", **kwargs).resume == "checkpoint"
+
+
+@pytest.mark.parametrize(
+    "policy, delay_max, expected",
+    [
+        ("fixed", None, [0.5, 0.5, 0.5, 0.5]),
+        ("linear", None, [0.5, 1.0, 1.5, 2.0]),
+        ("exponential", None, [0.5, 1.0, 2.0, 4.0]),
+        ("exponential", 1.5, [0.5, 1.0, 1.5, 1.5]),
+        ("linear", 0.5, [0.5, 0.5, 0.5, 0.5]),
+    ],
+)
+def test_unit_get_rerun_delay_policies(policy, delay_max, expected):
+    """Test the delay waited before each rerun of a class for each delay policy, with and without a cap."""
+    options = RerunClassOptions(
+        rerun_max=4, delay=0.5, only_last=False, hide_terminal_output=False, delay_policy=policy, delay_max=delay_max
+    )
+    run = ClassRun("test_module.py", MagicMock(), MagicMock(), [], {}, options)
+    delays = []
+    for attempt in range(1, 5):
+        run.attempt = attempt
+        delays.append(RerunClassPlugin._get_rerun_delay(run))  # pylint: disable=protected-access
+
+    assert delays == expected
+
+
+def test_unit_get_rerun_delay_decorrelated_jitter():
+    """Test that a jittered delay is drawn between the base delay and three times the previous one, within the cap."""
+    options = RerunClassOptions(
+        rerun_max=20, delay=1.0, only_last=False, hide_terminal_output=False, delay_policy="jitter", delay_max=10.0
+    )
+    run = ClassRun("test_module.py", MagicMock(), MagicMock(), [], {}, options)
+    previous = options.delay
+    for attempt in range(1, 20):
+        run.attempt = attempt
+        delay = RerunClassPlugin._get_rerun_delay(run)  # pylint: disable=protected-access
+        assert options.delay <= delay <= min(previous * 3, 10.0)
+        previous = delay
+
+
+def test_unit_rerun_class_options_rejects_delay_max_below_delay():
+    """Test that a delay cap lower than the base delay is rejected."""
+    kwargs = {"rerun_max": 1, "only_last": False, "hide_terminal_output": False}
+
+    with pytest.raises(pydantic.ValidationError, match="delay_max"):
+        RerunClassOptions(delay=2.0, delay_max=1.0, **kwargs)
+    assert RerunClassOptions(delay=1.0, delay_max=1.0, delay_policy="exponential", **kwargs).delay_max == 1.0
+
+
+def test_unit_wait_until_ready(rerun_class_plugin, monkeypatch):  # pylint: disable=W0621
+    """
+    Test that readiness probes are polled until ready, a failing probe counts as not ready, no probe sleeps for
+    whatever is left of the delay, and the time returned is the time actually waited.
+    """
+    options = RerunClassOptions(
+        rerun_max=2, delay=0.5, only_last=False, hide_terminal_output=False, ready_interval=0.25, ready_timeout=1
+    )
+    run = ClassRun("test_module.py", MagicMock(), MagicMock(), [], {}, options)
+    run.attempt = 1
+    clock = [100.0]  # intervals exact in binary, so the fake clock always reaches the timeout
+    sleeps: list = []
+
+    def fake_sleep(seconds):
+        sleeps.append(seconds)
+        clock[0] += seconds
+
+    monkeypatch.setattr("pytest_rerunclassfailures.pytest_rerunclassfailures.sleep", fake_sleep)
+    monkeypatch.setattr("pytest_rerunclassfailures.pytest_rerunclassfailures.monotonic", lambda: clock[0])
+    probe = run.parent_class.ihook.pytest_rerunclass_ready
+    wait_until_ready = rerun_class_plugin._wait_until_ready  # pylint: disable=protected-access
+
+    probe.side_effect = [[False, True], [True, True]]
+    assert wait_until_ready(run) == 0.25
+    assert sleeps == [0.25] and probe.call_count == 2
+
+    sleeps.clear()
+    probe.side_effect = None
+    probe.return_value = []
+    assert wait_until_ready(run) == 0.5
+    assert sleeps == [0.5]
+
+    sleeps.clear()
+    assert wait_until_ready(run, clock[0] - 0.25) == 0.25  # a deferred class already waited part of its delay
+    assert sleeps == [0.25]
+
+    sleeps.clear()
+    assert wait_until_ready(run, clock[0] - 0.5) == 0  # a deferred class already waited its whole delay
+    assert sleeps == [0]
+
+    probe.side_effect = RuntimeError("connection refused")
+    assert wait_until_ready(run) == 1
+    rerun_class_plugin.logger.warning.assert_called_once()
+
+
+def test_unit_check_rerun_budget(rerun_class_plugin):  # pylint: disable=W0621
+    """Test that a rerun is refused once the session or class budget left is shorter than the last attempt."""
+    rerun_class_plugin.options = RerunClassOptions(
+        rerun_max=3, delay=0, only_last=False, hide_terminal_output=False, session_budget=10
+    )
+    class_options = rerun_class_plugin.options.model_copy(update={"class_budget": 4})
+    run = ClassRun("test_module.py", MagicMock(), MagicMock(), [], {}, class_options)
+    check_rerun_budget = rerun_class_plugin._check_rerun_budget  # pylint: disable=protected-access
+
+    run.last_duration = 3.0
+    assert check_rerun_budget(run) is None
+    run.rerun_time = 1.5
+    assert check_rerun_budget(run).startswith("class rerun budget of 4s exhausted")
+    run.rerun_time = 0.0
+    rerun_class_plugin.rerun_time = 8.0
+    assert check_rerun_budget(run).startswith("session rerun budget of 10s exhausted")
+
+
+def test_unit_start_rerun_refused_after_passing_probe(rerun_class_plugin, monkeypatch):  # pylint: disable=W0621
+    """
+    Test that a class whose probe passes, but which the rerun budget then refuses to rerun as a whole, reports its
+    original failure: the tests before the probed one keep their last result, and the probe is a rerun.
+    """
+    rerun_class_plugin.options = RerunClassOptions(
+        rerun_max=2, delay=0.5, only_last=False, hide_terminal_output=False, probe=True, session_budget=0.6
+    )
+    siblings = [MagicMock(nodeid=f"test_module.py::TestClass::test_{name}") for name in "abc"] + [None]
+    first, original, probe = (MagicMock(user_properties=[]) for _ in range(3))
+    test_class = {siblings[0].nodeid: [[first]], siblings[1].nodeid: [[original]]}
+    run = ClassRun("test_module.py", MagicMock(), MagicMock(), siblings, test_class, rerun_class_plugin.options)
+    run.failed, run.attempt, run.last_duration = 1, 1, 0.25
+    clock = [100.0]
+    monkeypatch.setattr("pytest_rerunclassfailures.pytest_rerunclassfailures.monotonic", lambda: clock[0])
+
+    def prepare_rerun(run, waiting_since):  # pylint: disable=unused-argument
+        clock[0] += 0.5  # the rerun delay
+        return 0.5
+
+    def run_probe(run):
+        clock[0] += 0.125  # passes, but leaves too little budget for the whole class
+        test_class[siblings[1].nodeid].append([probe])
+        run.attempt += 1
+        return False
+
+    monkeypatch.setattr(rerun_class_plugin, "_prepare_rerun", prepare_rerun)
+    monkeypatch.setattr(rerun_class_plugin, "_run_probe", run_probe)
+
+    assert rerun_class_plugin._start_rerun(run, None) is None  # pylint: disable=protected-access
+    assert run.failed == 1
+    assert test_class[siblings[0].nodeid] == [[], [first]]
+    assert test_class[siblings[1].nodeid] == [[probe], [original]]
+    assert original.user_properties[0][0] == "rerun_class_budget_exhausted"
+    assert first.user_properties[0][0] == "rerun_class_budget_exhausted"
+
+
+def test_unit_match_failure():
+    """Test that failure patterns match exception type names (bases and qualified names too) or the crash message."""
+    report = MagicMock()
+    report.longrepr.reprcrash.message = "assert 1 == 3"
+    report.rerun_class_exception_types = ["ConnectionResetError", "builtins.ConnectionResetError", "OSError"]
+    assert _match_failure(report, ["OSError"]) == "OSError"
+    assert _match_failure(report, ["Timeout", "builtins\\.Connection.*"]) == "builtins\\.Connection.*"
+    assert _match_failure(report, ["Connection"]) is None  # type names must match as a whole
+    assert _match_failure(report, ["1 == 3"]) == "1 == 3"
+    assert RerunClassOptions(
+        rerun_max=1, delay=0, only_last=False, hide_terminal_output=False, only_on="timed out", except_on=None
+    ).only_on == ["timed out"]
+    with pytest.raises(pydantic.ValidationError):
+        RerunClassOptions(rerun_max=1, delay=0, only_last=False, hide_terminal_output=False, except_on=["("])
+
+
+def test_unit_failure_signature():
+    """Test that failure signatures ignore addresses, numbers and the explanation lines, but not the failure itself."""
+
+    def make_report(message, lineno=12, types=("AssertionError",)):
+        report = MagicMock(nodeid="test_module.py::TestClass::test_one", when="call")
+        report.longrepr.reprcrash.message = message
+        report.longrepr.reprcrash.path = "test_module.py"
+        report.longrepr.reprcrash.lineno = lineno
+        report.rerun_class_exception_types = list(types)
+        return report
+
+    signature = _failure_signature(make_report("assert 1 == 0\n +  where 1 = <list at 0x7f06>.count"))
+    assert _failure_signature(make_report("assert 25 == 0\n +  where 25 = <list at 0x7e11>.count")) == signature
+    assert _failure_signature(make_report("assert 1 == 0", lineno=13)) != signature
+    assert _failure_signature(make_report("assert 1 == 0", types=("ValueError",))) != signature
+    assert _failure_signature(make_report("assert x == 0")) != signature
+
+
+def test_unit_circuit_breaker(monkeypatch):
+    """Test the circuit breaker states: open on failures in a row or on a low success rate, half-open after cooldown."""
+    now = [100.0]
+    monkeypatch.setattr("pytest_rerunclassfailures.pytest_rerunclassfailures.monotonic", lambda: now[0])
+
+    breaker = RerunCircuitBreaker(max_failures=2, min_rate=None, window=10, cooldown=5)
+    assert breaker.record(False) is None
+    assert breaker.record(True) is None  # a passing class resets the failures in a row
+    assert breaker.record(False) is None
+    assert breaker.record(False) == "open"
+    assert breaker.reason == "2 rerun classes failed in a row"
+    assert not breaker.allow()
+    now[0] += 5
+    assert breaker.allow()
+    assert breaker.state == "half-open"
+    assert breaker.record(False) == "open"  # the probe failed
+    assert not breaker.allow()
+    now[0] += 5
+    assert breaker.allow()
+    assert breaker.record(True) == "closed"
+    assert breaker.failures == 0
+
+    breaker = RerunCircuitBreaker(max_failures=None, min_rate=0.5, window=4, cooldown=None)
+    for passed in (True, False, True):
+        assert breaker.record(passed) is None  # not enough classes yet to compute a rate
+    assert breaker.record(False) is None  # 50% isn't below the rate
+    assert breaker.record(False) == "open"
+    assert breaker.reason == "rerun success rate 25% over the last 4 rerun classes"
+    now[0] += 3600
+    assert not breaker.allow()  # no cooldown, open for the rest of the session
+
+
+def test_unit_attempt_outcomes():
+    """Test that an attempt records the tests before the failed one as passed, and the ones after it as not run."""
+    attempt = Attempt(1, 4)
+    assert list(attempt.outcomes) == [Attempt.NOT_RUN] * 4
+    assert attempt.failed is None
+
+    attempt.record(2)
+    assert list(attempt.outcomes) == [Attempt.PASSED, Attempt.PASSED, Attempt.FAILED, Attempt.NOT_RUN]
+    assert attempt.failed == 2
+
+    attempt = Attempt(2, 3)
+    attempt.record(None)
+    assert list(attempt.outcomes) == [Attempt.PASSED] * 3
+    assert attempt.failed is None
+    with pytest.raises(AttributeError):
+        attempt.reports = []  # pylint: disable=assigning-non-slot
+
+
+def test_unit_rerun_registry():
+    """Test that the registry releases the reports of each reported test, and the class once all are reported."""
+    registry = RerunRegistry()
+    key = ("test_module.py", "TestClass")
+    test_class = registry.start(key, ["test_module.py::TestClass::test_a", "test_module.py::TestClass::test_b"])
+    test_class["test_module.py::TestClass::test_a"] = [["first"], ["second"]]
+    test_class["test_module.py::TestClass::test_b"] = [["first"]]
+    assert key in registry
+
+    registry.release(key, "test_module.py::TestClass::test_a")
+    assert registry.get(key) == {"test_module.py::TestClass::test_b": [["first"]]}
+    registry.release(key, "test_module.py::TestClass::test_a")  # already released
+    registry.release(key, "test_module.py::TestClass::test_b")
+    assert key in registry
+    assert not registry.get(key)
+    assert not registry.classes and not registry.pending and not registry.attempts
+    assert (registry.tests, registry.rerun_classes, registry.reruns) == (2, 1, 1)
+
+
+def _make_report(outcome: str) -> TestReport:
+    """
+    Make a call report of a test.
+
+    :param outcome: outcome of the report
+    :type outcome: str
+    :return: test report
+    :rtype: TestReport
+    """
+    longrepr = "assert False" if outcome == "failed" else None
+    return TestReport(
+        "test_module.py::TestClass::test_a",
+        ("test_module.py", 1, "TestClass.test_a"),
+        {},
+        outcome,  # type: ignore
+        longrepr,
+        "call",
+        sections=[("Captured stdout call", "x" * 100)],
+    )
+
+
+def test_unit_report_spool(pytestconfig):
+    """Test that spilled reports are loaded back as they were, and that closing the spool deletes its file."""
+    spool = ReportSpool(pytestconfig)
+    first = spool.dump([_make_report("failed")])
+    second = spool.dump([_make_report("passed"), _make_report("passed")])
+    assert isinstance(first, SpilledReports) and not first
+    assert second.offset == first.size
+
+    (report,) = spool.load(first)
+    assert (report.nodeid, report.outcome, report.longreprtext) == (
+        "test_module.py::TestClass::test_a",
+        "failed",
+        "assert False",
+    )
+    assert [tuple(section) for section in report.sections] == [("Captured stdout call", "x" * 100)]
+    assert [report.outcome for report in spool.load(second)] == ["passed", "passed"]
+    spool.close()
+    assert spool.file is None
+
+    unserializable = _make_report("passed")
+    unserializable.user_properties.append(("payload", {1, 2}))
+    assert spool.dump([unserializable]) is None  # kept in memory by the caller
+    assert spool.file is None
+
+
+def test_unit_spill_attempts(rerun_class_plugin, pytestconfig):  # pylint: disable=W0621
+    """Test that the reports of earlier attempts above the memory budget are spilled, and loaded back as reruns."""
+    rerun_class_plugin.options = rerun_class_plugin.options.model_copy(update={"memory_budget": 150 / 1024 / 1024})
+    rerun_class_plugin.spool = ReportSpool(pytestconfig)
+    reruns = [[_make_report("failed")], [_make_report("failed")], [_make_report("passed")]]
+    test_class = {"test_module.py::TestClass::test_a": reruns}
+    run = ClassRun("test_module.py", MagicMock(), MagicMock(), [], test_class, rerun_class_plugin.options)
+    run.attempt = 2
+
+    rerun_class_plugin._spill_attempts(run)  # pylint: disable=protected-access
+    assert not isinstance(reruns[0], SpilledReports)  # 112 characters, within the budget
+    assert isinstance(reruns[1], SpilledReports)
+    assert run.kept_size == 112
+
+    loaded = rerun_class_plugin._load_spilled_reports(reruns)  # pylint: disable=protected-access
+    assert [[report.outcome for report in rerun] for rerun in loaded] == [["failed"], ["rerun"], ["passed"]]
+    rerun_class_plugin.spool.close()
+
+    reruns.insert(2, [_make_report("failed")])
+    reruns[2][0].user_properties.append(("payload", {1, 2}))  # not JSON-serializable
+    run.attempt = 3
+    rerun_class_plugin._spill_attempts(run)  # pylint: disable=protected-access
+    assert not isinstance(reruns[2], SpilledReports) and reruns[2][0].user_properties == [("payload", {1, 2})]
+    rerun_class_plugin.spool.close()
+
+
+def test_unit_flaky_first_ordering(rerun_class_plugin):  # pylint: disable=W0621
+    """Test that flaky classes move to the front, flakiest first, each kept contiguous and in its own order."""
+    rerun_class_plugin.options = rerun_class_plugin.options.model_copy(update={"flaky_first": True})
+    rerun_class_plugin.history = {
+        "test_module.py::TestRarelyFlaky": {"sessions": 4, "recovered": 1},
+        "test_module.py::TestOftenFlaky": {"sessions": 4, "recovered": 3},
+        "test_module.py::TestStable": {"sessions": 4, "recovered": 0},
+    }
+    classes = {
+        name: MagicMock(nodeid=f"test_module.py::{name}")
+        for name in ("TestStable", "TestRarelyFlaky", "TestOftenFlaky")
+    }
+
+    def make_item(name, class_name=None):
+        item = MagicMock()
+        item.name = name
+        item.cls = None if class_name is None else object
+        item.getparent.return_value = classes.get(class_name)
+        return item
+
+    items = [
+        make_item("stable_one", "TestStable"),
+        make_item("rarely_one", "TestRarelyFlaky"),
+        make_item("function"),
+        make_item("often_one", "TestOftenFlaky"),
+        make_item("rarely_two", "TestRarelyFlaky"),
+        make_item("often_two", "TestOftenFlaky"),
+        make_item("stable_two", "TestStable"),
+    ]
+    rerun_class_plugin.pytest_collection_modifyitems(items)
+    assert [item.name for item in items] == [
+        "often_one",
+        "often_two",
+        "rarely_one",
+        "rarely_two",
+        "stable_one",
+        "function",
+        "stable_two",
+    ]
+
+
+@pytest.mark.parametrize("overrides", [{"snapshot_mode": "fork"}, {"resume": "failed"}, {"resume": "checkpoint"}])
+def test_unit_rerun_class_options_rejects_probe_without_restart(overrides):
+    """Test that the probe is rejected when the class isn't rerun from its start in this process."""
+    with pytest.raises(pydantic.ValidationError, match="probe can only be used"):
+        RerunClassOptions(rerun_max=1, delay=0, only_last=False, hide_terminal_output=False, probe=True, **overrides)
+
+
+def test_unit_rerun_class_options_rejects_distributed_defer():
+    """Test that deferring is rejected when pytest-xdist distributes the tests."""
+    with pytest.raises(pydantic.ValidationError, match="defer can't be used when pytest-xdist"):
+        RerunClassOptions(
+            rerun_max=1, delay=0, only_last=False, hide_terminal_output=False, defer=True, distributed=True
+        )
+
+
+def test_unit_rerun_class_options_rejects_streamed_defer_and_fork():
+    """Test that streamed classes can't be deferred, their passed tests being already reported, nor forked."""
+    with pytest.raises(pydantic.ValidationError, match="defer can't be used with stream"):
+        RerunClassOptions(rerun_max=1, delay=0, only_last=False, hide_terminal_output=False, defer=True, stream=True)
+    with pytest.raises(pydantic.ValidationError, match="stream can't be used with the 'fork' snapshot mode"):
+        RerunClassOptions(
+            rerun_max=1, delay=0, only_last=False, hide_terminal_output=False, snapshot_mode="fork", stream=True
+        )
+
+
+def test_unit_log_streamed_reports_drops_them():
+    """Test that the reports of a streamed test are dropped from the class results once logged."""
+    item = MagicMock()
+    reports = [MagicMock(), MagicMock()]
+    attempts = [reports]
+    RerunClassPlugin._log_streamed_reports(item, attempts)  # pylint: disable=protected-access
+    assert attempts == [[]]
+    assert [call.kwargs["report"] for call in item.ihook.pytest_runtest_logreport.call_args_list] == reports